@@ -1,5 +1,6 @@
 from fastapi import Header
 from fastapi import APIRouter, HTTPException, status
+from app.core.concurrency import run_blocking
 from app.services.auth_service import AuthService
 from app.schemas.user_schema import RegisterRequest, UserResponse
 from app.models.user import User
@@ -8,7 +9,7 @@ router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 @router.post("/register", response_model=UserResponse)
 async def register(user: RegisterRequest):
-    new_user = AuthService.create_user(user.email, user.password, user.name, user.role)
+    new_user = await run_blocking(AuthService.create_user, user.email, user.password, user.name, user.role)
     return new_user
 
 @router.get("/me", response_model=UserResponse)
@@ -24,5 +25,23 @@ async def get_me(authorization: str = Header(None)):
         )
 
     token = authorization.split(" ")[1]  # Extraer solo el token JWT
-    user: User = AuthService.verify_token(token)
-    return user
\ No newline at end of file
+    user: User = await AuthService.verify_token(token, strict=True)
+    return user
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(everywhere: bool = False, authorization: str = Header(None)):
+    """
+    Cierra la sesión: olvida el token en la caché del servidor. Con `everywhere=true` revoca
+    además todas las sesiones del usuario en Firebase (sus tokens dejan de aceptarse).
+    """
+    if not authorization or "Bearer " not in authorization:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token de autorización faltante o mal formateado",
+        )
+
+    token = authorization.split(" ")[1]
+    user: User = await AuthService.verify_token(token)
+    if everywhere:
+        await run_blocking(AuthService.revoke_sessions, user.id)
+    else:
+        AuthService.invalidate_token(token)
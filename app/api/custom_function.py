@@ -1,8 +1,10 @@
 from fastapi import APIRouter, HTTPException, Header, status
-from datetime import datetime
-from app.core.firebase import db
+from app.core.concurrency import run_blocking
+from app.core.rate_limit import admission
+from app.core.responses import conditional_json
 from app.services.auth_service import AuthService
-from app.schemas.custom_function_schema import CustomFunctionRequest, CustomFunctionResponse
+from app.services.function_service import FunctionsService
+from app.schemas.custom_function_schema import CustomFunctionRequest, CustomFunctionResponse, FunctionsBatchDeleteRequest
 
 router = APIRouter(prefix="/functions", tags=["Custom Functions"])
 
@@ -18,32 +20,17 @@ async def save_function(request: CustomFunctionRequest, authorization: str = Hea
         )
 
     token = authorization.split(" ")[1]
-    user = AuthService.verify_token(token)
+    user = await AuthService.verify_token(token)
 
-    try:
-        function_data = {
-            "uid": user.id,
-            "name": request.name,
-            "expression": request.expression,
-            "date": datetime.utcnow().isoformat(),
-        }
-
-        # 🔥 Guardar la función personalizada en Firestore
-        doc_ref = db.collection("custom_functions").add(function_data)
-        function_id = doc_ref[1].id
-
-        # Actualizar el documento con el ID generado
-        db.collection("custom_functions").document(function_id).update({"id": function_id})
-
-        return {**function_data, "id": function_id}
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Error al guardar la función: {str(e)}")
+    async with admission.admit(user.id, "write"):
+        return await run_blocking(FunctionsService.save_function, user.id, request.name, request.expression)
 
 
 @router.get("/saved")
-async def get_saved_functions(authorization: str = Header(None)):
+async def get_saved_functions(if_none_match: str = Header(None), authorization: str = Header(None)):
     """
     Obtiene las funciones personalizadas guardadas por el usuario autenticado.
+    Con `If-None-Match` igual al ETag anterior responde 304 sin consultar Firestore.
     """
     if not authorization or "Bearer " not in authorization:
         raise HTTPException(
@@ -52,24 +39,10 @@ async def get_saved_functions(authorization: str = Header(None)):
         )
 
     token = authorization.split(" ")[1]
-    user = AuthService.verify_token(token)
-
-    try:
-        functions_ref = db.collection("custom_functions").where("uid", "==", user.id).stream()
-        functions = [
-            {
-                "id": doc.id,
-                "name": doc.to_dict().get("name", ""),
-                "expression": doc.to_dict().get("expression", ""),
-                "createdAt": doc.to_dict().get("date", "").isoformat() 
-                if isinstance(doc.to_dict().get("date"), datetime) 
-                else doc.to_dict().get("date", ""),
-            }
-            for doc in functions_ref
-        ]
-        return functions
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error al obtener funciones personalizadas: {str(e)}")
+    user = await AuthService.verify_token(token)
+
+    async with admission.admit(user.id, "read"):
+        return await conditional_json(if_none_match, user.id, "functions", {}, FunctionsService.get_functions, user.id)
 
 
 @router.delete("/delete/{function_id}")
@@ -84,20 +57,50 @@ async def delete_function(function_id: str, authorization: str = Header(None)):
         )
 
     token = authorization.split(" ")[1]
-    user = AuthService.verify_token(token)
+    user = await AuthService.verify_token(token)
 
-    try:
-        function_ref = db.collection("custom_functions").document(function_id)
-        function = function_ref.get()
+    async with admission.admit(user.id, "write"):
+        return await run_blocking(FunctionsService.delete_function, user.id, function_id)
 
-        if not function.exists:
-            raise HTTPException(status_code=404, detail="Función no encontrada")
 
-        function_data = function.to_dict()
-        if function_data["uid"] != user.id:
-            raise HTTPException(status_code=403, detail="No tienes permiso para eliminar esta función")
+@router.post("/delete-batch")
+async def delete_functions(request: FunctionsBatchDeleteRequest, authorization: str = Header(None)):
+    """
+    Elimina varias funciones personalizadas del usuario autenticado en una sola petición.
+    Devuelve el estado de cada id (200, 403 o 404).
+    """
+    if not authorization or "Bearer " not in authorization:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token de autorización faltante o mal formateado"
+        )
+
+    token = authorization.split(" ")[1]
+    user = await AuthService.verify_token(token)
+
+    async with admission.admit(user.id, "write", cost=len(request.ids)):
+        return await run_blocking(FunctionsService.delete_functions, user.id, request.ids)
+
+
+@router.get("/{function_id}/evaluate")
+async def evaluate_function(
+    function_id: str,
+    start: float,
+    end: float,
+    points: int,
+    authorization: str = Header(None)
+):
+    """
+    Evalúa una función personalizada del usuario autenticado sobre `points` puntos de [start, end].
+    """
+    if not authorization or "Bearer " not in authorization:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token de autorización faltante o mal formateado"
+        )
+
+    token = authorization.split(" ")[1]
+    user = await AuthService.verify_token(token)
 
-        function_ref.delete()
-        return {"message": "Función eliminada correctamente"}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error al eliminar función: {str(e)}")
\ No newline at end of file
+    async with admission.admit(user.id, "read"):
+        return await run_blocking(FunctionsService.evaluate_function, user.id, function_id, start, end, points)
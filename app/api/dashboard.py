@@ -0,0 +1,24 @@
+from fastapi import APIRouter, HTTPException, Header, status
+from app.core.concurrency import run_blocking
+from app.core.rate_limit import admission
+from app.services.auth_service import AuthService
+from app.services.dashboard_service import DashboardService
+
+router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
+
+@router.get("/stats")
+async def get_dashboard_stats(authorization: str = Header(None)):
+    """
+    Obtiene las estadísticas globales del dashboard combinando los contadores distribuidos.
+    """
+    if not authorization or "Bearer " not in authorization:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token de autorización faltante o mal formateado"
+        )
+
+    token = authorization.split(" ")[1]
+    user = await AuthService.verify_token(token)
+
+    async with admission.admit(user.id, "read"):
+        return await run_blocking(DashboardService.publish_stats, False)
@@ -0,0 +1,25 @@
+import hmac
+from fastapi import APIRouter, HTTPException, Header, status
+from fastapi.responses import PlainTextResponse
+from app.core.config import settings
+from app.core.metrics import metrics
+
+router = APIRouter(tags=["Metrics"])
+
+PROMETHEUS_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def get_metrics(authorization: str = Header(None)):
+    """
+    Expone en formato Prometheus la latencia por ruta y los contadores de Firestore y Auth.
+    Exige siempre `Authorization: Bearer <METRICS_TOKEN>` (sin token configurado la ruta no
+    se registra).
+    """
+    expected = f"Bearer {settings.METRICS_TOKEN}".encode("utf-8")
+    if not settings.METRICS_TOKEN or not hmac.compare_digest((authorization or "").encode("utf-8"), expected):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token de métricas inválido"
+        )
+
+    return PlainTextResponse(metrics.render(), media_type=PROMETHEUS_MEDIA_TYPE)
@@ -1,17 +1,28 @@
-from fastapi import APIRouter, HTTPException, Header, status
+from fastapi import APIRouter, HTTPException, Header, Query, status
+from app.core.concurrency import run_blocking, iterate_blocking
+from app.core.rate_limit import admission
+from app.core.responses import ClosingStreamingResponse, FastJSONResponse, conditional_json, dumps
 from app.services.auth_service import AuthService
 from app.services.results_service import ResultsService
-from app.schemas.series_schema import SaveResultsRequest, SeriesResponse
-from app.core.firebase import db
-from datetime import datetime
+from app.schemas.series_schema import BatchDeleteRequest, SaveResultsRequest, SeriesResponse
 
 router = APIRouter(prefix="/results", tags=["Results"])
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
 @router.get("/saved")
-async def get_saved_results(authorization: str = Header(None)):
+async def get_saved_results(
+    fields: str = None,
+    maxPoints: int = Query(None, ge=3),
+    if_none_match: str = Header(None),
+    authorization: str = Header(None)
+):
     """
     Obtiene los resultados guardados del usuario autenticado,
     incluyendo la información de la serie asociada.
+    Con `fields=summary` las series se devuelven sin los arrays de `data` y con
+    `maxPoints` los arrays se reducen con LTTB a como máximo ese número de puntos.
+    Con `If-None-Match` igual al ETag anterior responde 304 sin consultar Firestore.
     """
     if not authorization or "Bearer " not in authorization:
         raise HTTPException(
@@ -20,73 +31,21 @@ async def get_saved_results(authorization: str = Header(None)):
         )
 
     token = authorization.split(" ")[1]
-    user = AuthService.verify_token(token)
-
-    try:
-        # 🔹 Obtener los resultados guardados del usuario
-        results_ref = db.collection("series_results").where("uid", "==", user.id).stream()
-        results = [doc.to_dict() for doc in results_ref]
-
-        if not results:
-            return []
-
-        saved_series = []
-
-        # 🔹 Obtener información completa de cada serie desde `series_history`
-        for result in results:
-            series_id = result.get("seriesId")
-
-            if not series_id:
-                continue  # Si no hay un ID válido, omitir este resultado
-
-            series_doc = db.collection("series_history").document(series_id).get()
-
-            if not series_doc.exists:
-                continue  # Si la serie no existe, omitirla
-
-            series_data = series_doc.to_dict()
+    user = await AuthService.verify_token(token)
 
-            # 🔹 Construir la respuesta combinando resultado guardado y la serie
-            saved_series.append({
-                "resultId": result.get("id"),
-                "seriesId": series_id,
-                "dateSaved": result.get("date"),
-                "userId": result.get("uid"),
-                "series": {
-                    "id": series_id,
-                    **series_data
-                }
-            })
-
-        return saved_series
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error al obtener resultados guardados: {str(e)}")
+    async with admission.admit(user.id, "read"):
+        return await conditional_json(
+            if_none_match, user.id, "saved", {"fields": fields, "maxPoints": maxPoints},
+            ResultsService.get_saved_results, user.id, fields, maxPoints
+        )
 
 @router.post("/save")
 async def save_results(request: SaveResultsRequest):
     """
     Guarda la referencia de una serie generada por el usuario en `series_results`
     """
-    try:
-        results_data = {
-            "uid": request.uid,  # 🔹 Guardar UID desde el body
-            "seriesId": request.seriesId,
-            "date": datetime.utcnow(),
-        }
-
-        # 🔥 Guardar solo `uid` y `seriesId`
-        doc_ref = db.collection("series_results").add(results_data)
-
-        # Obtener el ID generado por Firestore
-        result_id = doc_ref[1].id
-        results_data["id"] = result_id
-
-        # Actualizar el documento con el ID generado
-        db.collection("series_results").document(result_id).update({"id": result_id})
-
-        return {"message": "Resultados guardados", "id": result_id}
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Error al guardar los resultados: {str(e)}")
+    results_data = await run_blocking(ResultsService.save_results, request.uid, request.seriesId)
+    return {"message": "Resultados guardados", "id": results_data["id"]}
 
 @router.delete("/delete/{result_id}")
 async def delete_result(result_id: str, authorization: str = Header(None)):
@@ -100,28 +59,48 @@ async def delete_result(result_id: str, authorization: str = Header(None)):
         )
 
     token = authorization.split(" ")[1]
-    user = AuthService.verify_token(token)
+    user = await AuthService.verify_token(token)
 
-    try:
-        result_ref = db.collection("series_results").document(result_id)
-        result = result_ref.get()
+    async with admission.admit(user.id, "write"):
+        return await run_blocking(ResultsService.delete_result, user.id, result_id)
 
-        if not result.exists:
-            raise HTTPException(status_code=404, detail="Resultado no encontrado")
+@router.post("/delete-batch")
+async def delete_results(request: BatchDeleteRequest, authorization: str = Header(None)):
+    """
+    Elimina varios resultados guardados del usuario autenticado en una sola petición.
+    Devuelve el estado de cada id (200, 403 o 404).
+    """
+    if not authorization or "Bearer " not in authorization:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token de autorización faltante o mal formateado"
+        )
 
-        result_data = result.to_dict()
-        if result_data["uid"] != user.id:
-            raise HTTPException(status_code=403, detail="No tienes permiso para eliminar este resultado")
+    token = authorization.split(" ")[1]
+    user = await AuthService.verify_token(token)
 
-        result_ref.delete()
-        return {"message": "Resultado eliminado correctamente"}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error al eliminar resultado: {str(e)}")
+    async with admission.admit(user.id, "write", cost=len(request.ids)):
+        return await run_blocking(ResultsService.delete_results, user.id, request.ids)
     
 @router.get("/history")
-async def get_history(authorization: str = Header(None)):
+async def get_history(
+    limit: int = Query(None, ge=1),
+    cursor: str = None,
+    fields: str = None,
+    maxPoints: int = Query(None, ge=3),
+    accept: str = Header(None),
+    if_none_match: str = Header(None),
+    authorization: str = Header(None)
+):
     """
     Obtiene el historial de series trigonométricas del usuario autenticado.
+      - Sin parámetros: lista completa (comportamiento original).
+      - `limit` (y `cursor`): paginación por fecha, devuelve {items, nextCursor}.
+      - `Accept: application/x-ndjson`: una serie por línea, enviada a medida que llega de Firestore
+        (con `limit`, como máximo ese número de series).
+      - `fields=summary`: solo los campos del resumen (sin los arrays de `data`).
+      - `maxPoints`: reduce los arrays de cada serie con LTTB (conserva picos de error).
+      - `If-None-Match` igual al ETag anterior: 304 sin consultar Firestore (salvo NDJSON).
     """
     if not authorization or "Bearer " not in authorization:
         raise HTTPException(
@@ -130,17 +109,55 @@ async def get_history(authorization: str = Header(None)):
         )
 
     token = authorization.split(" ")[1]
-    user = AuthService.verify_token(token)
-
-    try:
-        history_ref = db.collection("series_history").where("uid", "==", user.id).stream()
-        history = [
-            {
-                "id": doc.id,
-                **doc.to_dict()
-            }
-            for doc in history_ref
-        ]
-        return history
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error al obtener historial: {str(e)}")
\ No newline at end of file
+    user = await AuthService.verify_token(token)
+
+    if accept and NDJSON_MEDIA_TYPE in accept:
+        # La plaza de concurrencia se mantiene hasta que termina el stream, no solo la ruta
+        await admission.acquire(user.id, "read")
+        try:
+            items = await run_blocking(ResultsService.stream_history, user.id, cursor, fields, maxPoints, limit)
+        except BaseException:
+            admission.release()
+            raise
+
+        async def ndjson_lines():
+            async for item in iterate_blocking(items):
+                yield dumps(item) + b"\n"
+
+        return ClosingStreamingResponse(ndjson_lines(), admission.release, media_type=NDJSON_MEDIA_TYPE)
+
+    params = {"limit": limit, "cursor": cursor, "fields": fields, "maxPoints": maxPoints}
+    async with admission.admit(user.id, "read"):
+        if limit is not None or cursor:
+            return await conditional_json(
+                if_none_match, user.id, "history", params,
+                ResultsService.get_history_page,
+                user.id, limit or ResultsService.MAX_PAGE_SIZE, cursor, fields, maxPoints
+            )
+
+        return await conditional_json(
+            if_none_match, user.id, "history", params,
+            ResultsService.get_history, user.id, fields, maxPoints
+        )
+
+@router.get("/history/{series_id}")
+async def get_history_series(
+    series_id: str,
+    maxPoints: int = Query(None, ge=3),
+    authorization: str = Header(None)
+):
+    """
+    Obtiene una serie del historial con sus arrays completos (para abrirla desde la lista resumida).
+    Con `maxPoints` los arrays se reducen con LTTB.
+    """
+    if not authorization or "Bearer " not in authorization:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token de autorización faltante o mal formateado"
+        )
+
+    token = authorization.split(" ")[1]
+    user = await AuthService.verify_token(token)
+
+    async with admission.admit(user.id, "read"):
+        return FastJSONResponse(await run_blocking(ResultsService.get_series, user.id, series_id, maxPoints))
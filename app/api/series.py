@@ -1,7 +1,12 @@
-from fastapi import APIRouter, HTTPException, Header, status
+from fastapi import APIRouter, HTTPException, Header, Request, status
+from app.core.concurrency import run_blocking
+from app.core.rate_limit import admission
+from app.core.responses import FastJSONResponse
+from app.core.series_body import OPENAPI_REQUEST_BODY, parse_series_body, read_series_body
 from app.services.auth_service import AuthService
 from app.services.series_service import SeriesService
-from app.schemas.series_schema import SeriesRequest, SeriesResponseh
+from app.services.taylor_service import TaylorService
+from app.schemas.series_schema import SeriesResponseh, SeriesComputeRequest, SeriesResponse, SeriesBatchRequest
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -9,10 +14,12 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/series", tags=["Series"])
 
-@router.post("/save", response_model=SeriesResponseh)
-async def save_series(series: SeriesRequest, authorization: str = Header(None)):
+@router.post("/save", response_model=SeriesResponseh, openapi_extra={"requestBody": OPENAPI_REQUEST_BODY})
+async def save_series(request: Request, authorization: str = Header(None)):
     """
     Guarda una serie trigonométrica generada por un usuario en Firestore.
+    El cuerpo puede enviarse en JSON, MessagePack (application/msgpack) o como float64
+    empaquetados (application/x-series-float64), según el Content-Type.
     """
     if not authorization or "Bearer " not in authorization:
         raise HTTPException(
@@ -21,8 +28,65 @@ async def save_series(series: SeriesRequest, authorization: str = Header(None)):
         )
 
     token = authorization.split(" ")[1]
-    user = AuthService.verify_token(token)
+    user = await AuthService.verify_token(token)
     logger.info(f"🔹 Usuario autenticado: {user.id}")
 
-    saved_series = SeriesService.save_series(user.id, series)
-    return saved_series
+    async with admission.admit(user.id, "write"):
+        # Decodificar (y validar) el cuerpo fuera del event loop: con miles de puntos no es trivial
+        series = await run_blocking(parse_series_body, request.headers.get("content-type"), await read_series_body(request))
+        saved_series = await run_blocking(SeriesService.save_series, user.id, series)
+    # `saved_series` ya es un SeriesResponseh validado: se serializa sin revalidarlo
+    return FastJSONResponse(saved_series)
+
+@router.post("/save-batch")
+async def save_series_batch(request: SeriesBatchRequest, authorization: str = Header(None)):
+    """
+    Guarda varias series del usuario autenticado en una sola petición.
+    Devuelve el estado y el id de cada serie en el orden recibido.
+    """
+    if not authorization or "Bearer " not in authorization:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token de autorización faltante o mal formateado"
+        )
+
+    token = authorization.split(" ")[1]
+    user = await AuthService.verify_token(token)
+
+    async with admission.admit(user.id, "write", cost=len(request.series)):
+        return await run_blocking(SeriesService.save_series_batch, user.id, request.series)
+
+@router.post("/compute", response_model=SeriesResponse)
+async def compute_series(request: SeriesComputeRequest, authorization: str = Header(None)):
+    """
+    Calcula en el servidor la aproximación de Taylor (sine, cosine, tangent) para un rango,
+    número de puntos y número de términos, devolviendo los arrays y estadísticas de error.
+    """
+    if not authorization or "Bearer " not in authorization:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token de autorización faltante o mal formateado"
+        )
+
+    token = authorization.split(" ")[1]
+    user = await AuthService.verify_token(token)
+
+    async with admission.admit(user.id, "read"):
+        return FastJSONResponse(await run_blocking(TaylorService.compute_series, request))
+
+@router.delete("/delete/{series_id}")
+async def delete_series(series_id: str, authorization: str = Header(None)):
+    """
+    Elimina una serie del historial del usuario autenticado.
+    """
+    if not authorization or "Bearer " not in authorization:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token de autorización faltante o mal formateado"
+        )
+
+    token = authorization.split(" ")[1]
+    user = await AuthService.verify_token(token)
+
+    async with admission.admit(user.id, "write"):
+        return await run_blocking(SeriesService.delete_series, user.id, series_id)
@@ -0,0 +1,270 @@
+# app/core/cache.py
+from cachetools import TTLCache
+from multiprocessing.managers import BaseManager
+from pydantic import BaseModel
+from .config import settings
+from .concurrency import run_blocking
+import hashlib
+import json
+import numpy as np
+import threading
+import uuid
+
+def payload_size(value) -> int:
+    """
+    Tamaño aproximado en memoria de un valor cacheado: los `np.ndarray` cuentan por sus
+    `nbytes` y las listas de números por elemento, sin recorrerlas.
+    """
+    if isinstance(value, np.ndarray):
+        return value.nbytes + 112
+    if isinstance(value, (str, bytes, bytearray)):
+        return len(value) + 49
+    if isinstance(value, BaseModel):
+        value = dict(value)
+    if isinstance(value, dict):
+        return 64 + sum(payload_size(key) + payload_size(item) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        if value and isinstance(value[0], (int, float)):
+            return 56 + 32 * len(value)  # puntero + float de Python por elemento
+        return 56 + 8 * len(value) + sum(payload_size(item) for item in value)
+    return 24
+
+class MemoryCacheBackend:
+    """
+    Backend en proceso: TTLCache acotado por tamaño (`max_bytes`, según `payload_size`)
+    con TTL + LRU, protegido con un lock. Los valores mayores que el límite no se guardan.
+
+    Las versiones de `ReadCache` van aparte, en un dict que no caduca ni expulsa entradas
+    (una por usuario y endpoint): si caducaran, el ETag cambiaría sin que cambien los datos.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float):
+        self._cache = TTLCache(maxsize=max_bytes, ttl=ttl, getsizeof=payload_size)
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def version(self, key: str) -> str:
+        """
+        Versión actual de `key` (se crea la primera vez).
+        """
+        with self._lock:
+            version = self._versions.get(key)
+            if version is None:
+                version = self._versions[key] = uuid.uuid4().hex[:16]
+            return version
+
+    def bump(self, key: str) -> str:
+        """
+        Sustituye la versión de `key` por una nueva y la devuelve.
+        """
+        with self._lock:
+            version = self._versions[key] = uuid.uuid4().hex[:16]
+            return version
+
+    def get(self, key: str):
+        with self._lock:
+            return self._cache.get(key)
+
+    def set(self, key: str, value) -> None:
+        if payload_size(value) > self._cache.maxsize:
+            return
+        with self._lock:
+            self._cache[key] = value
+
+    def delete_prefix(self, prefix: str) -> int:
+        with self._lock:
+            keys = [key for key in self._cache.keys() if key.startswith(prefix)]
+            for key in keys:
+                self._cache.pop(key, None)
+            return len(keys)
+
+class _CacheServerManager(BaseManager):
+    pass
+
+class _CacheClientManager(BaseManager):
+    pass
+
+_CacheClientManager.register("backend")
+_CacheClientManager.register("rate_limiter")
+
+class SharedCacheBackend:
+    """
+    Backend compartido entre workers: delega en un MemoryCacheBackend servido por otro
+    proceso (`python -m app.core.cache`) mediante `multiprocessing.managers`.
+    Si el servidor no está disponible la caché se comporta como vacía (fail-open).
+    """
+
+    typeid = "backend"  # objeto remoto registrado en el servidor
+
+    def __init__(self, address: str, authkey: str):
+        if not authkey:
+            # El servidor intercambia objetos con pickle: sin clave cualquiera que lo alcance
+            # podría ejecutar código en él
+            raise RuntimeError("READ_CACHE_AUTHKEY es obligatorio para usar el servidor de caché compartida")
+        host, port = address.rsplit(":", 1)
+        self._address = (host, int(port))
+        self._authkey = authkey.encode("utf-8")
+        self._backend = None
+        self._lock = threading.Lock()
+
+    def _remote(self):
+        with self._lock:
+            if self._backend is None:
+                manager = _CacheClientManager(address=self._address, authkey=self._authkey)
+                manager.connect()
+                self._backend = getattr(manager, self.typeid)()
+            return self._backend
+
+    def _call(self, method: str, *args, default=None):
+        try:
+            return getattr(self._remote(), method)(*args)
+        except (OSError, EOFError) as e:
+            print(f"⚠️ Caché compartida no disponible: {str(e)}")
+            with self._lock:
+                self._backend = None
+            return default
+
+    def get(self, key: str):
+        return self._call("get", key)
+
+    def set(self, key: str, value) -> None:
+        self._call("set", key, value)
+
+    def delete_prefix(self, prefix: str) -> int:
+        return self._call("delete_prefix", prefix, default=0)
+
+    def version(self, key: str):
+        return self._call("version", key)
+
+    def bump(self, key: str):
+        return self._call("bump", key)
+
+class ReadCache:
+    """
+    Caché de lectura por usuario. Las claves son `uid|endpoint|version|params` y cada ruta
+    de escritura invalida solo los endpoints que modifica.
+
+    Cada (uid, endpoint) tiene su versión, que cambia en cada invalidación y forma el ETag de
+    sus lecturas. Al ir en la clave, una lectura que empezó antes de una escritura guarda su
+    resultado bajo la versión anterior, que ya nadie consulta. Las versiones viven en el
+    backend sin caducar (ver `MemoryCacheBackend`): el ETag solo cambia cuando hay una
+    escritura o se reinicia el proceso que las guarda.
+
+    Con el backend compartido cada operación es una llamada de red: las corrutinas la hacen
+    en el pool de hilos (`run_blocking`) para no bloquear el event loop.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    @staticmethod
+    def _prefix(uid: str, endpoint: str) -> str:
+        return f"{uid}|{endpoint}|"
+
+    @staticmethod
+    def _version_key(uid: str, endpoint: str) -> str:
+        return f"{uid}|{endpoint}#version"
+
+    @staticmethod
+    def key(uid: str, endpoint: str, params: dict = None, version: str = "") -> str:
+        return f"{ReadCache._prefix(uid, endpoint)}{version}|" + json.dumps(params or {}, sort_keys=True, default=str)
+
+    async def _run(self, func, *args):
+        if isinstance(self.backend, MemoryCacheBackend):
+            return func(*args)
+        return await run_blocking(func, *args)
+
+    async def read_through(self, uid: str, endpoint: str, params: dict, func, *args, version: str = None):
+        """
+        Devuelve el valor en caché para (uid, endpoint, params) en la versión actual del
+        endpoint (o en `version`, leída antes de consultar) o ejecuta `func(*args)` en el pool
+        de hilos, guarda el resultado y lo devuelve.
+        """
+        if self.backend is None:
+            return await run_blocking(func, *args)
+
+        # La versión se fija antes de la consulta: si entretanto hay una escritura, el
+        # resultado queda bajo la versión anterior y no se vuelve a servir
+        version = version or await self.current_version(uid, endpoint)
+        key = ReadCache.key(uid, endpoint, params, version)
+        value = await self._run(self.backend.get, key)
+        if value is not None:
+            return value
+
+        value = await run_blocking(func, *args)
+        await self._run(self.backend.set, key, value)
+        return value
+
+    def invalidate(self, uid: str, *endpoints: str) -> None:
+        """
+        Cambia la versión de cada uno de los `endpoints` del usuario (sus entradas y los ETag
+        emitidos hasta ahora dejan de coincidir) y libera sus entradas. Los demás endpoints
+        del usuario conservan su caché.
+        """
+        if self.backend is None:
+            return
+        for endpoint in endpoints:
+            self.backend.bump(ReadCache._version_key(uid, endpoint))
+            self.backend.delete_prefix(ReadCache._prefix(uid, endpoint))
+
+    def version(self, uid: str, endpoint: str):
+        """
+        Versión actual de los datos de (uid, endpoint) (se crea la primera vez). None si la
+        caché está desactivada o el servidor compartido no responde.
+        """
+        if self.backend is None:
+            return None
+        return self.backend.version(ReadCache._version_key(uid, endpoint))
+
+    async def current_version(self, uid: str, endpoint: str):
+        """
+        `version` desde una corrutina (en el pool de hilos con el backend compartido).
+        """
+        return await self._run(self.version, uid, endpoint)
+
+    def etag(self, uid: str, endpoint: str, params: dict = None, version: str = None):
+        """
+        ETag débil de (uid, endpoint, params) en la versión actual del endpoint (o en
+        `version`), o None. Es débil porque la misma representación puede enviarse
+        comprimida o no.
+        """
+        version = version or self.version(uid, endpoint)
+        if version is None:
+            return None
+        digest = hashlib.sha1(ReadCache.key(uid, endpoint, params).encode("utf-8")).hexdigest()[:12]
+        return f'W/"{version}-{digest}"'
+
+def _create_backend():
+    if settings.READ_CACHE_BACKEND == "memory":
+        return MemoryCacheBackend(settings.READ_CACHE_MAX_BYTES, settings.READ_CACHE_TTL)
+    if settings.READ_CACHE_BACKEND == "shared":
+        return SharedCacheBackend(settings.READ_CACHE_ADDRESS, settings.READ_CACHE_AUTHKEY)
+    return None  # "none": caché desactivada
+
+read_cache = ReadCache(_create_backend())
+
+def serve_shared_cache(address: str = None, authkey: str = None) -> None:
+    """
+    Sirve un MemoryCacheBackend para `SharedCacheBackend` y los buckets de
+    `SharedRateLimitBackend` (bloquea hasta que se detiene).
+    También sirve como proceso de apoyo local en pruebas.
+    """
+    from .rate_limit import MemoryRateLimitBackend
+
+    address = address or settings.READ_CACHE_ADDRESS
+    authkey = authkey or settings.READ_CACHE_AUTHKEY
+    if not authkey:
+        raise RuntimeError("Define READ_CACHE_AUTHKEY antes de iniciar el servidor de caché compartida")
+    host, port = address.rsplit(":", 1)
+    backend = MemoryCacheBackend(settings.READ_CACHE_MAX_BYTES, settings.READ_CACHE_TTL)
+
+    rate_limiter = MemoryRateLimitBackend()
+
+    _CacheServerManager.register("backend", callable=lambda: backend)
+    _CacheServerManager.register("rate_limiter", callable=lambda: rate_limiter)
+    manager = _CacheServerManager(address=(host, int(port)), authkey=authkey.encode("utf-8"))
+    print(f"🔹 Caché compartida escuchando en {address}")
+    manager.get_server().serve_forever()
+
+if __name__ == "__main__":
+    serve_shared_cache()
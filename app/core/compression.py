@@ -0,0 +1,63 @@
+# app/core/compression.py
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipResponder, IdentityResponder
+from starlette.types import ASGIApp, Receive, Scope, Send
+import brotli
+
+class BrotliResponder(IdentityResponder):
+    """
+    Igual que `GZipResponder` de Starlette, con Brotli. En respuestas en streaming (NDJSON)
+    cada bloque se vacía al momento para no retrasar las líneas al cliente.
+    """
+
+    content_encoding = "br"
+
+    def __init__(self, app: ASGIApp, minimum_size: int, quality: int = 4) -> None:
+        super().__init__(app, minimum_size)
+        self.compressor = brotli.Compressor(quality=quality)
+
+    def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        body = self.compressor.process(body)
+        return body + (self.compressor.flush() if more_body else self.compressor.finish())
+
+def _accepted(accept_encoding: str) -> set:
+    """
+    Codificaciones aceptadas por el cliente (ignora las marcadas con q=0).
+    """
+    accepted = set()
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.partition(";")
+        quality = params.strip().removeprefix("q=")
+        if name.strip() and quality not in ("0", "0.0", "0.00", "0.000"):
+            accepted.add(name.strip())
+    return accepted
+
+class CompressionMiddleware:
+    """
+    Comprime las respuestas de al menos `minimum_size` bytes con la primera codificación de
+    `encodings` ("br", "gzip") que acepte el cliente. Las respuestas pequeñas, las que ya
+    traen Content-Encoding y los 304 se envían sin cambios.
+    """
+
+    def __init__(self, app: ASGIApp, encodings=("br", "gzip"), minimum_size: int = 1024) -> None:
+        self.app = app
+        self.encodings = tuple(encodings)
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accepted = _accepted(Headers(scope=scope).get("accept-encoding", ""))
+        encoding = next((name for name in self.encodings if name in accepted), None)
+
+        if encoding == "br":
+            responder = BrotliResponder(self.app, self.minimum_size)
+        elif encoding == "gzip":
+            # Nivel 6: casi la misma compresión que 9 en JSON numérico, bastante más rápido
+            responder = GZipResponder(self.app, self.minimum_size, compresslevel=6)
+        else:
+            responder = IdentityResponder(self.app, self.minimum_size)
+
+        await responder(scope, receive, send)
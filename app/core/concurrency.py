@@ -0,0 +1,35 @@
+# app/core/concurrency.py
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from .config import settings
+
+# 🔹 Pool acotado para el SDK síncrono de Firebase: las rutas `async` nunca bloquean el event loop
+_executor = ThreadPoolExecutor(
+    max_workers=settings.FIRESTORE_MAX_WORKERS,
+    thread_name_prefix="firestore"
+)
+
+async def run_blocking(func, *args, **kwargs):
+    """
+    Ejecuta una función bloqueante (Firestore, Firebase Auth) en el pool de hilos y espera
+    su resultado sin bloquear el event loop. Propaga el contexto (contextvars) de la petición.
+    """
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(
+        _executor, functools.partial(ctx.run, func, *args, **kwargs)
+    )
+
+async def iterate_blocking(iterator):
+    """
+    Recorre un iterador bloqueante (por ejemplo, `query.stream()` de Firestore) desde código
+    async, obteniendo cada elemento en el pool de hilos a medida que llega.
+    """
+    sentinel = object()
+    while True:
+        item = await run_blocking(next, iterator, sentinel)
+        if item is sentinel:
+            break
+        yield item
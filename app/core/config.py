@@ -5,5 +5,54 @@ load_dotenv()
 
 class Settings:
     FIREBASE_CREDENTIALS: str = os.getenv("FIREBASE_CREDENTIALS")
+    # "strict": rol y perfil desde Firebase Auth + Firestore; "claims": solo desde el token
+    AUTH_MODE: str = os.getenv("AUTH_MODE", "strict")
+    TOKEN_CACHE_MAXSIZE: int = int(os.getenv("TOKEN_CACHE_MAXSIZE", "1024"))
+    # Hilos dedicados a las llamadas bloqueantes de Firebase Admin / Firestore
+    FIRESTORE_MAX_WORKERS: int = int(os.getenv("FIRESTORE_MAX_WORKERS", "32"))
+    # Contadores distribuidos de `dashboard/stats`
+    DASHBOARD_SHARDS: int = int(os.getenv("DASHBOARD_SHARDS", "10"))
+    DASHBOARD_PUBLISH_INTERVAL: float = float(os.getenv("DASHBOARD_PUBLISH_INTERVAL", "5"))
+    # Formato de `data` en `series_history`: "array" (listas), "float64" o "float32" (bytes empaquetados)
+    SERIES_STORAGE_FORMAT: str = os.getenv("SERIES_STORAGE_FORMAT", "array")
+    # Guardar los arrays de series idénticas una sola vez en `series_payloads` (referenciados por hash)
+    SERIES_DEDUP: bool = os.getenv("SERIES_DEDUP", "true").lower() in ("1", "true", "yes")
+    # Write-behind de los agregados de cada guardado (usuario y dashboard): ventana en segundos
+    # (0 = en la misma transacción que la serie), máximo de series por ventana y tamaño de la cola.
+    # Requiere un proceso de larga duración (uvicorn/gunicorn), no Vercel serverless
+    AGGREGATION_WINDOW: float = float(os.getenv("AGGREGATION_WINDOW", "0"))
+    AGGREGATION_MAX_EVENTS: int = int(os.getenv("AGGREGATION_MAX_EVENTS", "500"))
+    AGGREGATION_QUEUE_SIZE: int = int(os.getenv("AGGREGATION_QUEUE_SIZE", "10000"))
+    # Caché de lectura por usuario: "memory" (en proceso), "shared" (servidor de caché) o "none"
+    READ_CACHE_BACKEND: str = os.getenv("READ_CACHE_BACKEND", "memory")
+    READ_CACHE_TTL: float = float(os.getenv("READ_CACHE_TTL", "60"))
+    # Memoria máxima de la caché de lectura (aproximada a partir del tamaño de los arrays)
+    READ_CACHE_MAX_BYTES: int = int(os.getenv("READ_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    # Servidor de `python -m app.core.cache` (caché y límites "shared"): dirección y clave
+    # obligatoria, sin valor por defecto (el protocolo usa pickle)
+    READ_CACHE_ADDRESS: str = os.getenv("READ_CACHE_ADDRESS", "127.0.0.1:50000")
+    READ_CACHE_AUTHKEY: str = os.getenv("READ_CACHE_AUTHKEY", "")
+    # Compresión de respuestas: codificaciones por orden de preferencia ("br,gzip", "gzip" o "none")
+    COMPRESSION: str = os.getenv("COMPRESSION", "br,gzip")
+    COMPRESSION_MIN_SIZE: int = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+    # Inicialización de Firebase: "background" (en el arranque, sin bloquearlo), "startup" (antes
+    # de aceptar peticiones) o "lazy" (en la primera petición que use Firestore o Auth)
+    FIREBASE_WARMUP: str = os.getenv("FIREBASE_WARMUP", "background")
+    # Registrar los tiempos de arranque (importación de la app e inicialización de Firebase)
+    STARTUP_PROFILE: bool = os.getenv("STARTUP_PROFILE", "false").lower() in ("1", "true", "yes")
+    # Control de admisión por usuario: "memory" (por worker), "shared" (servidor de `python -m
+    # app.core.cache`, compartido entre workers) o "none" (sin límites)
+    RATE_LIMIT_BACKEND: str = os.getenv("RATE_LIMIT_BACKEND", "memory")
+    # Token bucket por usuario: peticiones por segundo y ráfaga máxima, para lecturas y escrituras
+    RATE_LIMIT_READ_RATE: float = float(os.getenv("RATE_LIMIT_READ_RATE", "10"))
+    RATE_LIMIT_READ_BURST: float = float(os.getenv("RATE_LIMIT_READ_BURST", "40"))
+    RATE_LIMIT_WRITE_RATE: float = float(os.getenv("RATE_LIMIT_WRITE_RATE", "2"))
+    RATE_LIMIT_WRITE_BURST: float = float(os.getenv("RATE_LIMIT_WRITE_BURST", "20"))
+    # Máximo de peticiones admitidas en curso por worker (0 = sin límite); el resto recibe 503
+    RATE_LIMIT_MAX_CONCURRENCY: int = int(os.getenv("RATE_LIMIT_MAX_CONCURRENCY", "64"))
+    # Trazas por petición (Server-Timing, contadores de Firestore/Auth) y endpoint /metrics
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+    # GET /metrics solo existe si se define y exige `Authorization: Bearer <METRICS_TOKEN>`
+    METRICS_TOKEN: str = os.getenv("METRICS_TOKEN", "")
 
 settings = Settings()
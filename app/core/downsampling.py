@@ -0,0 +1,84 @@
+# app/core/downsampling.py
+import numpy as np
+from .series_codec import FLOAT_FIELDS, decode_series_arrays
+
+MIN_POINTS = 3
+
+def lttb_indices(ys: list, max_points: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets sobre varias curvas que comparten el eje x (el índice).
+
+    Se conservan el primer y el último punto, y en cada bucket intermedio se elige el punto
+    que forma el triángulo de mayor área con el punto elegido en el bucket anterior y el
+    promedio del bucket siguiente. El área se suma sobre todas las curvas (normalizadas por
+    su rango), de modo que los picos de cualquiera de ellas, incluido el error, se mantienen.
+    Cada bucket se evalúa de forma vectorizada con NumPy.
+    """
+    n = len(ys[0])
+    if max_points >= n or n <= MIN_POINTS:
+        return np.arange(n)
+    max_points = max(max_points, MIN_POINTS)
+
+    # Curvas normalizadas (n, k); los valores no finitos no aportan área
+    y = np.column_stack([np.nan_to_num(np.asarray(c, dtype=np.float64), nan=0.0, posinf=0.0, neginf=0.0) for c in ys])
+    span = np.ptp(y, axis=0)
+    y = y / np.where(span > 0, span, 1.0)
+    x = np.arange(n, dtype=np.float64)
+
+    # Límites de los buckets intermedios (el primer y el último punto van aparte)
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    prev = 0
+    for b in range(max_points - 2):
+        start, end = edges[b], edges[b + 1]
+        next_start, next_end = end, edges[b + 2] if b + 2 < len(edges) else n
+        if next_end <= next_start:
+            next_end = next_start + 1
+
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean(axis=0)
+
+        bx = x[start:end]
+        by = y[start:end]
+        area = np.abs(
+            (x[prev] - avg_x) * (by - y[prev]) - (x[prev] - bx)[:, None] * (avg_y - y[prev])
+        ).sum(axis=1)
+
+        prev = start + int(np.argmax(area))
+        selected[b + 1] = prev
+
+    return selected
+
+def downsample_series_data(data: dict, max_points: int, as_arrays: bool = False) -> dict:
+    """
+    Reduce un `SeriesData` almacenado (en cualquier formato) a como máximo `max_points`
+    puntos con LTTB, manteniendo alineados labels, generated, ideal y error.
+    Con `as_arrays` los valores se devuelven como `np.ndarray` en lugar de listas.
+    """
+    def output(values: np.ndarray):
+        values = values.astype(np.float64, copy=False)
+        return values if as_arrays else values.tolist()
+
+    arrays = decode_series_arrays(data)
+    n = len(arrays["generated"])
+    if n <= max_points:
+        return {
+            "labels": arrays["labels"],
+            **{field: output(arrays[field]) for field in FLOAT_FIELDS}
+        }
+
+    # Solo se reducen los arrays alineados con `generated` (p. ej. `error` puede venir vacío)
+    aligned = [field for field in FLOAT_FIELDS if len(arrays[field]) == n]
+    idx = lttb_indices([arrays[field] for field in aligned], max_points)
+    labels = arrays["labels"]
+
+    return {
+        "labels": [labels[i] for i in idx] if len(labels) == n else labels,
+        **{
+            field: output(arrays[field][idx] if field in aligned else arrays[field])
+            for field in FLOAT_FIELDS
+        }
+    }
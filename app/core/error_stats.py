@@ -0,0 +1,39 @@
+# app/core/error_stats.py
+from fastapi import HTTPException, status
+import numpy as np
+
+def series_error(generated, ideal, error) -> np.ndarray:
+    """
+    Devuelve el error punto a punto de una serie: `error` si viene informado,
+    o |generated - ideal| en caso contrario. Valida que los arrays tengan el mismo largo.
+    """
+    generated = np.asarray(generated, dtype=np.float64)
+    ideal = np.asarray(ideal, dtype=np.float64)
+    error = np.asarray(error, dtype=np.float64)
+
+    if generated.shape != ideal.shape or (error.size and error.shape != generated.shape):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Los arrays `generated`, `ideal` y `error` deben tener la misma longitud"
+        )
+
+    return np.abs(error) if error.size else np.abs(generated - ideal)
+
+def error_stats(error: np.ndarray) -> dict:
+    """
+    Calcula avgError, maxError, minError y stdError de forma vectorizada, ignorando
+    los valores no finitos (por ejemplo, cerca de las asíntotas de la tangente).
+    """
+    error = np.asarray(error, dtype=np.float64)
+    finite = error[np.isfinite(error)]
+
+    if not finite.size:
+        return {"avgError": 0.0, "maxError": 0.0, "minError": 0.0, "stdError": 0.0}
+
+    mean = finite.mean()
+    return {
+        "avgError": float(mean),
+        "maxError": float(finite.max()),
+        "minError": float(finite.min()),
+        "stdError": float(np.sqrt(np.mean(np.square(finite - mean))))
+    }
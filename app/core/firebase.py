@@ -1,14 +1,106 @@
 # app/core/firebase.py
-import firebase_admin
-from firebase_admin import credentials, auth, firestore
+# Firebase se inicializa de forma diferida: importar este módulo no carga firebase_admin,
+# google-cloud-firestore ni grpc. El cliente se crea en el primer acceso a `db` o
+# `firebase_auth` (o en el lifespan de la aplicación, ver `warmup_firebase`).
+import functools
+import importlib
+import threading
+import time
 from .config import settings
 
+_init_lock = threading.Lock()
+_client = None
+_auth = None
+
 def initialize_firebase():
-    if not firebase_admin._apps:
-        cred = credentials.Certificate(settings.FIREBASE_CREDENTIALS)
-        firebase_admin.initialize_app(cred)
+    """
+    Inicializa la app por defecto de Firebase una sola vez (seguro entre hilos).
+    """
+    import firebase_admin
+    if firebase_admin._apps:
+        return
+    with _init_lock:
+        if not firebase_admin._apps:
+            from firebase_admin import credentials
+            cred = credentials.Certificate(settings.FIREBASE_CREDENTIALS)
+            firebase_admin.initialize_app(cred)
+
+def get_db():
+    """
+    Devuelve el cliente de Firestore, creándolo en la primera llamada.
+    """
+    global _client
+    if _client is None:
+        initialize_firebase()
+        with _init_lock:
+            if _client is None:
+                from firebase_admin import firestore as firebase_firestore
+                client = firebase_firestore.client()
+                if settings.METRICS_ENABLED:
+                    from .tracing import instrument_firestore
+                    client = instrument_firestore(client)
+                _client = client
+    return _client
+
+def get_auth():
+    """
+    Devuelve el módulo `firebase_admin.auth` con la app ya inicializada
+    (instrumentado si las métricas están activas).
+    """
+    global _auth
+    if _auth is None:
+        initialize_firebase()
+        from firebase_admin import auth
+        if settings.METRICS_ENABLED:
+            from .tracing import instrument_auth
+            auth = instrument_auth(auth)
+        _auth = auth
+    return _auth
+
+def warmup_firebase() -> None:
+    """
+    Importa las dependencias pesadas y crea el cliente antes de la primera petición.
+    Los errores se registran sin detener el arranque (se reintentará en el primer uso).
+    """
+    start = time.perf_counter()
+    try:
+        get_db()
+        get_auth()
+    except Exception as e:
+        print(f"⚠️ No se pudo inicializar Firebase en el arranque: {str(e)}")
+        return
+    if settings.STARTUP_PROFILE:
+        print(f"⏱️ Firebase inicializado en {(time.perf_counter() - start) * 1000:.1f} ms")
+
+class _LazyProxy:
+    """
+    Reenvía cada atributo al objeto que devuelve `factory()`, resuelto en el primer uso.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+
+    def __getattr__(self, name):
+        return getattr(self._factory(), name)
+
+def transactional(func):
+    """
+    Equivalente diferido de `firestore.transactional`: el decorador real se aplica en la
+    primera llamada, así que decorar métodos no importa google-cloud-firestore.
+    """
+    wrapped = None
+
+    @functools.wraps(func)
+    def wrapper(transaction, *args, **kwargs):
+        nonlocal wrapped
+        if wrapped is None:
+            wrapped = firestore.transactional(func)
+        return wrapped(transaction, *args, **kwargs)
+
+    return wrapper
 
-initialize_firebase()
+firebase_auth = _LazyProxy(get_auth)
+db = _LazyProxy(get_db)
 
-firebase_auth = auth
-db = firestore.client() 
+# Tipos y transformaciones de Firestore (Increment, Maximum, DELETE_FIELD, ...) sin importarlos al cargar
+firestore = _LazyProxy(functools.partial(importlib.import_module, "google.cloud.firestore"))
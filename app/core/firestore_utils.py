@@ -0,0 +1,89 @@
+# app/core/firestore_utils.py
+from .firebase import db
+
+# Máximo de documentos por llamada a `get_all` (BatchGetDocuments)
+GET_ALL_CHUNK_SIZE = 100
+
+def get_documents(collection: str, ids, field_paths=None, chunk_size: int = GET_ALL_CHUNK_SIZE) -> dict:
+    """
+    Lee varios documentos de una colección con `db.get_all`, en bloques de `chunk_size`.
+    Devuelve un dict {id: snapshot} solo con los documentos que existen.
+    """
+    unique_ids = list(dict.fromkeys(doc_id for doc_id in ids if doc_id))
+    snapshots = {}
+
+    for i in range(0, len(unique_ids), chunk_size):
+        refs = [db.collection(collection).document(doc_id) for doc_id in unique_ids[i:i + chunk_size]]
+        for snapshot in db.get_all(refs, field_paths=field_paths):
+            if snapshot.exists:
+                snapshots[snapshot.id] = snapshot
+
+    return snapshots
+
+def hydrate_references(items: list, ref_field: str, collection: str, field_paths=None) -> list:
+    """
+    Resuelve las referencias `item[ref_field]` contra `collection` con lecturas en bloque.
+    Devuelve pares (item, snapshot) en el orden original, omitiendo referencias vacías o inexistentes.
+    """
+    snapshots = get_documents(collection, [item.get(ref_field) for item in items], field_paths)
+    return [
+        (item, snapshots[item.get(ref_field)])
+        for item in items
+        if item.get(ref_field) in snapshots
+    ]
+
+# Máximo de operaciones por WriteBatch de Firestore
+WRITE_BATCH_LIMIT = 500
+
+def commit_in_chunks(items: list, write_chunk, chunk_size: int = WRITE_BATCH_LIMIT) -> list:
+    """
+    Escribe `items` en WriteBatches sucesivos de `chunk_size` elementos; `write_chunk(batch, chunk)`
+    agrega las operaciones de cada bloque (sin superar WRITE_BATCH_LIMIT).
+    Devuelve [(chunk, error)] con `error` = None si el commit del bloque fue correcto.
+    """
+    outcomes = []
+    for i in range(0, len(items), chunk_size):
+        chunk = items[i:i + chunk_size]
+        batch = db.batch()
+        try:
+            write_chunk(batch, chunk)
+            batch.commit()
+            outcomes.append((chunk, None))
+        except Exception as e:
+            outcomes.append((chunk, e))
+    return outcomes
+
+def delete_owned(collection: str, uid: str, ids: list, labels: tuple) -> list:
+    """
+    Elimina en bloque los documentos `ids` de `collection` que pertenecen a `uid`:
+    una lectura `get_all` para comprobar la propiedad y WriteBatches para borrar.
+    `labels` = (no encontrado, sin permiso, error) son los mensajes por elemento.
+    Devuelve [{id, status, detail}] en el orden de `ids` (sin repetidos).
+    """
+    not_found, forbidden, failed = labels
+    unique_ids = list(dict.fromkeys(doc_id for doc_id in ids if doc_id))
+    snapshots = get_documents(collection, unique_ids, ["uid"])
+
+    outcomes = {}
+    owned = []
+    for doc_id in unique_ids:
+        snapshot = snapshots.get(doc_id)
+        if snapshot is None:
+            outcomes[doc_id] = (404, not_found)
+        elif snapshot.to_dict().get("uid") != uid:
+            outcomes[doc_id] = (403, forbidden)
+        else:
+            owned.append(snapshot.reference)
+
+    def write_chunk(batch, refs):
+        for ref in refs:
+            batch.delete(ref)
+
+    for refs, error in commit_in_chunks(owned, write_chunk):
+        for ref in refs:
+            outcomes[ref.id] = (200, None) if error is None else (500, f"{failed}: {str(error)}")
+
+    return [
+        {"id": doc_id, "status": outcomes[doc_id][0], "detail": outcomes[doc_id][1]}
+        for doc_id in unique_ids
+    ]
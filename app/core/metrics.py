@@ -0,0 +1,175 @@
+# app/core/metrics.py
+# Métricas en proceso con formato de exposición de Prometheus (ver GET /metrics).
+import contextvars
+import threading
+import time
+from bisect import bisect_left
+
+# Límites (segundos) de los buckets del histograma de latencia por ruta
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Ruta usada para las llamadas fuera de una petición (arranque, tareas en segundo plano)
+NO_ROUTE = "-"
+
+class RequestStats:
+    """
+    Contadores de una petición: llamadas a Firestore (RPCs, documentos leídos/escritos,
+    tiempo de ida y vuelta) y a Firebase Auth. Se comparte con los hilos de `run_blocking`
+    a través del contexto, por eso se actualiza con un lock.
+    """
+
+    __slots__ = ("scope", "start", "firestore_calls", "firestore_reads", "firestore_writes",
+                 "firestore_time", "auth_calls", "auth_time", "_lock")
+
+    def __init__(self, scope: dict = None):
+        self.scope = scope
+        self.start = time.perf_counter()
+        self.firestore_calls = 0
+        self.firestore_reads = 0
+        self.firestore_writes = 0
+        self.firestore_time = 0.0
+        self.auth_calls = 0
+        self.auth_time = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def route(self) -> str:
+        """
+        Plantilla de la ruta (p. ej. `/results/history/{series_id}`), disponible una vez que
+        el router ha resuelto la petición; así las etiquetas no crecen con cada id.
+        """
+        route = self.scope.get("route") if self.scope is not None else None
+        return getattr(route, "path_format", None) or getattr(route, "path", None) or NO_ROUTE
+
+    def server_timing(self) -> str:
+        """
+        Valor de la cabecera `Server-Timing` con el tiempo total, de Firestore y de Auth (ms).
+        """
+        total = (time.perf_counter() - self.start) * 1000
+        return (
+            f'app;dur={total:.1f}, '
+            f'firestore;dur={self.firestore_time * 1000:.1f};'
+            f'desc="calls={self.firestore_calls} reads={self.firestore_reads} writes={self.firestore_writes}", '
+            f'auth;dur={self.auth_time * 1000:.1f};desc="calls={self.auth_calls}"'
+        )
+
+_current = contextvars.ContextVar("request_stats", default=None)
+
+class MetricsRegistry:
+    """
+    Registro agregado de métricas: histograma de latencia por (método, ruta, estado) y
+    contadores de Firestore y Firebase Auth por ruta. Cada actualización es O(1) bajo un lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latency = {}    # (method, route, status) -> [bucket counts..., sum, count]
+        self._firestore = {}  # (route, rpc) -> [calls, reads, writes, seconds]
+        self._auth = {}       # (route, call) -> [calls, seconds]
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float) -> None:
+        key = (method, route, str(status))
+        with self._lock:
+            series = self._latency.get(key)
+            if series is None:
+                series = self._latency[key] = [0] * (len(LATENCY_BUCKETS) + 1) + [0.0, 0]
+            series[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            series[-2] += seconds
+            series[-1] += 1
+
+    def observe_firestore(self, rpc: str, seconds: float, reads: int = 0, writes: int = 0, stats: RequestStats = None) -> None:
+        stats = stats or _current.get()
+        if stats is not None:
+            with stats._lock:
+                stats.firestore_calls += 1
+                stats.firestore_reads += reads
+                stats.firestore_writes += writes
+                stats.firestore_time += seconds
+
+        key = (stats.route if stats is not None else NO_ROUTE, rpc)
+        with self._lock:
+            series = self._firestore.get(key)
+            if series is None:
+                series = self._firestore[key] = [0, 0, 0, 0.0]
+            series[0] += 1
+            series[1] += reads
+            series[2] += writes
+            series[3] += seconds
+
+    def observe_auth(self, call: str, seconds: float) -> None:
+        stats = _current.get()
+        if stats is not None:
+            with stats._lock:
+                stats.auth_calls += 1
+                stats.auth_time += seconds
+
+        key = (stats.route if stats is not None else NO_ROUTE, call)
+        with self._lock:
+            series = self._auth.get(key)
+            if series is None:
+                series = self._auth[key] = [0, 0.0]
+            series[0] += 1
+            series[1] += seconds
+
+    def render(self) -> str:
+        """
+        Exporta todas las métricas en el formato de texto de Prometheus (versión 0.0.4).
+        """
+        with self._lock:
+            latency = {k: list(v) for k, v in self._latency.items()}
+            firestore = {k: list(v) for k, v in self._firestore.items()}
+            auth = {k: list(v) for k, v in self._auth.items()}
+
+        lines = [
+            "# HELP http_request_duration_seconds Latencia de las peticiones HTTP por ruta.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (method, route, status), series in sorted(latency.items()):
+            labels = f'method="{method}",route="{_escape(route)}",status="{status}"'
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, series):
+                cumulative += count
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {series[-1]}')
+            lines.append(f"http_request_duration_seconds_sum{{{labels}}} {series[-2]}")
+            lines.append(f"http_request_duration_seconds_count{{{labels}}} {series[-1]}")
+
+        for name, help_text, index in (
+            ("firestore_rpc_total", "Llamadas RPC a Firestore.", 0),
+            ("firestore_documents_read_total", "Documentos leídos de Firestore.", 1),
+            ("firestore_documents_written_total", "Escrituras de documentos enviadas a Firestore.", 2),
+            ("firestore_rpc_seconds_total", "Tiempo de ida y vuelta acumulado de las RPC a Firestore.", 3),
+        ):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for (route, rpc), series in sorted(firestore.items()):
+                lines.append(f'{name}{{route="{_escape(route)}",rpc="{rpc}"}} {series[index]}')
+
+        for name, help_text, index in (
+            ("firebase_auth_calls_total", "Llamadas a Firebase Auth.", 0),
+            ("firebase_auth_seconds_total", "Tiempo acumulado de las llamadas a Firebase Auth.", 1),
+        ):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for (route, call), series in sorted(auth.items()):
+                lines.append(f'{name}{{route="{_escape(route)}",call="{call}"}} {series[index]}')
+
+        return "\n".join(lines) + "\n"
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def start_request(scope: dict = None):
+    """
+    Abre los contadores de una petición ASGI en el contexto actual. Devuelve (stats, token).
+    """
+    stats = RequestStats(scope)
+    return stats, _current.set(stats)
+
+def end_request(token) -> None:
+    _current.reset(token)
+
+def current_request() -> RequestStats:
+    return _current.get()
+
+metrics = MetricsRegistry()
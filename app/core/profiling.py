@@ -0,0 +1,56 @@
+# app/core/profiling.py
+# Perfil de arranque en frío: `python -m app.core.profiling [--module app.main] [--top 25]`
+import argparse
+import subprocess
+import sys
+
+# Dependencias que no deberían cargarse al importar la app (se difieren hasta el primer uso)
+DEFERRED_MODULES = ("grpc", "google.cloud.firestore", "firebase_admin.auth", "firebase_admin.firestore")
+
+def profile_imports(module: str = "app.main") -> list:
+    """
+    Importa `module` en un intérprete nuevo con `-X importtime` y devuelve una entrada
+    {module, self_ms, cumulative_ms} por cada módulo importado.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "error desconocido")
+
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        entries.append({
+            "module": name.strip(),
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000
+        })
+    return entries
+
+def report(module: str = "app.main", top: int = 25) -> None:
+    """
+    Imprime el tiempo total de importación de `module`, los `top` módulos más costosos
+    (tiempo acumulado) y las dependencias diferidas que se cargaron de todos modos.
+    """
+    entries = profile_imports(module)
+    total = next((e["cumulative_ms"] for e in reversed(entries) if e["module"] == module), 0.0)
+    print(f"⏱️ import {module}: {total:.1f} ms ({len(entries)} módulos)")
+    print(f"{'acumulado (ms)':>15} {'propio (ms)':>12}  módulo")
+    for e in sorted(entries, key=lambda e: e["cumulative_ms"], reverse=True)[:top]:
+        print(f"{e['cumulative_ms']:>15.1f} {e['self_ms']:>12.1f}  {e['module']}")
+
+    loaded = {e["module"] for e in entries}
+    eager = [name for name in DEFERRED_MODULES if name in loaded]
+    if eager:
+        print(f"⚠️ Dependencias cargadas en la importación: {', '.join(eager)}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Perfil de tiempos de importación de la aplicación")
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--top", type=int, default=25)
+    args = parser.parse_args()
+    report(args.module, args.top)
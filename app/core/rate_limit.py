@@ -0,0 +1,133 @@
+# app/core/rate_limit.py
+# Control de admisión delante de las rutas que consultan Firestore: un token bucket por
+# usuario y tipo de ruta ("read" / "write") y un máximo de peticiones en curso por worker.
+# Las peticiones que no caben se rechazan al momento (429 / 503 con Retry-After) en lugar
+# de esperar en la cola del pool de hilos hasta agotar el timeout del cliente.
+from contextlib import asynccontextmanager
+from cachetools import LRUCache
+from fastapi import HTTPException, status
+from .cache import SharedCacheBackend
+from .concurrency import run_blocking
+from .config import settings
+import math
+import threading
+import time
+
+class MemoryRateLimitBackend:
+    """
+    Token buckets en proceso: (tokens, instante de la última recarga) por clave, en un LRU
+    acotado. Un bucket expulsado vuelve lleno, que es lo mismo que tras un rato inactivo.
+    """
+
+    def __init__(self, maxsize: int = 10000):
+        self._buckets = LRUCache(maxsize=maxsize)
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str, rate: float, burst: float, cost: float = 1.0) -> float:
+        """
+        Consume `cost` tokens si hay suficientes y devuelve 0; si no, devuelve los segundos
+        que faltan para tenerlos (sin consumir nada).
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            if tokens >= cost:
+                self._buckets[key] = (tokens - cost, now)
+                return 0.0
+            self._buckets[key] = (tokens, now)
+            return (cost - tokens) / rate
+
+class SharedRateLimitBackend(SharedCacheBackend):
+    """
+    Buckets compartidos entre workers, servidos por el mismo proceso que la caché compartida
+    (`python -m app.core.cache`). Si el servidor no responde se admite la petición (fail-open).
+    """
+
+    typeid = "rate_limiter"
+
+    def acquire(self, key: str, rate: float, burst: float, cost: float = 1.0) -> float:
+        return self._call("acquire", key, rate, burst, cost, default=0.0)
+
+class AdmissionController:
+    """
+    Admite o rechaza cada petición autenticada antes de que llegue a Firestore.
+    `budgets` = {"read": (tokens/segundo, ráfaga), "write": (...)}.
+    """
+
+    def __init__(self, backend, budgets: dict, max_concurrency: int = 0):
+        self.backend = backend
+        self.budgets = budgets
+        self.max_concurrency = max_concurrency
+        self._in_flight = 0  # solo se modifica desde el event loop
+
+    async def _acquire(self, key: str, rate: float, burst: float, cost: float) -> float:
+        if isinstance(self.backend, MemoryRateLimitBackend):
+            return self.backend.acquire(key, rate, burst, cost)
+        return await run_blocking(self.backend.acquire, key, rate, burst, cost)
+
+    async def acquire(self, uid: str, kind: str, cost: float = 1) -> None:
+        """
+        Reserva una plaza de concurrencia y `cost` tokens del bucket (uid, kind), o lanza
+        503 / 429 con Retry-After. Cada `acquire` correcto debe ir seguido de `release`.
+        Las rutas de lote pasan como coste el número de elementos (acotado a la ráfaga, para
+        que un lote grande siga siendo posible con el bucket lleno).
+        """
+        if self.backend is None:
+            return
+
+        if self.max_concurrency and self._in_flight >= self.max_concurrency:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Servidor ocupado, vuelve a intentarlo en un momento",
+                headers={"Retry-After": "1"}
+            )
+
+        self._in_flight += 1
+        try:
+            rate, burst = self.budgets[kind]
+            wait = await self._acquire(f"{uid}|{kind}", rate, burst, min(max(cost, 1), burst))
+        except BaseException:
+            self.release()
+            raise
+        if wait > 0:
+            self.release()
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Demasiadas peticiones, vuelve a intentarlo más tarde",
+                headers={"Retry-After": str(math.ceil(wait))}
+            )
+
+    def release(self) -> None:
+        """
+        Libera la plaza reservada por `acquire` (las respuestas en streaming, al terminar).
+        """
+        if self.backend is not None:
+            self._in_flight -= 1
+
+    @asynccontextmanager
+    async def admit(self, uid: str, kind: str, cost: float = 1):
+        """
+        `acquire` / `release` alrededor del bloque.
+        """
+        await self.acquire(uid, kind, cost)
+        try:
+            yield
+        finally:
+            self.release()
+
+def _create_backend():
+    if settings.RATE_LIMIT_BACKEND == "memory":
+        return MemoryRateLimitBackend()
+    if settings.RATE_LIMIT_BACKEND == "shared":
+        return SharedRateLimitBackend(settings.READ_CACHE_ADDRESS, settings.READ_CACHE_AUTHKEY)
+    return None  # "none": sin límites
+
+admission = AdmissionController(
+    _create_backend(),
+    {
+        "read": (settings.RATE_LIMIT_READ_RATE, settings.RATE_LIMIT_READ_BURST),
+        "write": (settings.RATE_LIMIT_WRITE_RATE, settings.RATE_LIMIT_WRITE_BURST),
+    },
+    settings.RATE_LIMIT_MAX_CONCURRENCY
+)
@@ -0,0 +1,85 @@
+# app/core/responses.py
+from datetime import datetime
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel
+import numpy as np
+import orjson
+from .cache import read_cache
+
+def _default(obj):
+    """
+    Tipos que orjson no serializa de forma nativa.
+    """
+    if isinstance(obj, BaseModel):  # campo a campo: los `np.ndarray` de un modelo se serializan sin copia
+        return dict(obj)
+    if isinstance(obj, datetime):  # p. ej. DatetimeWithNanoseconds de Firestore
+        return obj.isoformat()
+    if isinstance(obj, np.ndarray):  # arrays no contiguos o en un orden de bytes no nativo
+        return obj.astype(np.float64).tolist()
+    raise TypeError(f"Tipo no serializable a JSON: {type(obj).__name__}")
+
+def dumps(content) -> bytes:
+    """
+    Serializa a JSON con orjson; los `np.ndarray` se escriben directamente desde su buffer,
+    sin convertirlos antes a listas de floats de Python.
+    """
+    return orjson.dumps(content, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+
+class FastJSONResponse(JSONResponse):
+    """
+    Respuesta JSON serializada con orjson (también los modelos de pydantic, campo a campo).
+    Las rutas la devuelven directamente, así FastAPI no vuelve a validar ni a codificar el
+    contenido con `response_model` / `jsonable_encoder`.
+    """
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+class ClosingStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse que llama a `on_close()` cuando termina de enviarse, también si falla
+    o el cliente se desconecta antes de que empiece el cuerpo (entonces el generador nunca
+    arranca y su `finally` no se ejecuta).
+    """
+
+    def __init__(self, content, on_close, **kwargs):
+        super().__init__(content, **kwargs)
+        self.on_close = on_close
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.on_close()
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    Comparación débil de `If-None-Match` (lista de ETag o "*") con el ETag actual.
+    """
+    if not if_none_match or not etag:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    current = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == current for tag in if_none_match.split(","))
+
+async def conditional_json(if_none_match: str, uid: str, endpoint: str, params: dict, func, *args) -> Response:
+    """
+    Lectura cacheable con ETag: si `If-None-Match` coincide con la versión actual del endpoint
+    responde 304 sin ejecutar `func` (ni la consulta a Firestore); si no, devuelve el JSON de
+    `read_cache.read_through` con su ETag.
+
+    El ETag y la entrada de caché usan la misma versión, leída antes de consultar: el
+    resultado de una lectura que coincide con una escritura lleva el ETag anterior, así que
+    el cliente lo vuelve a pedir en lugar de recibir 304 sobre datos obsoletos.
+    """
+    version = await read_cache.current_version(uid, endpoint)
+    etag = read_cache.etag(uid, endpoint, params, version)
+    # Cada visita revalida con el servidor; el ETag evita volver a descargar el contenido
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Authorization"} if etag else None
+
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    content = await read_cache.read_through(uid, endpoint, params, func, *args, version=version)
+    return FastJSONResponse(content, headers=headers)
@@ -0,0 +1,213 @@
+# app/core/series_body.py
+# Cuerpos binarios de `POST /series/save`, elegidos por Content-Type:
+#   - application/json (por defecto): `SeriesRequest` en JSON
+#   - application/msgpack: el mismo objeto en MessagePack; los arrays numéricos pueden ser
+#     listas o `bin` con float64 little-endian contiguos
+#   - application/x-series-float64: "TSF1" + longitud (uint32 LE) + cabecera JSON, relleno
+#     hasta múltiplo de 8 bytes y después generated, ideal y error en float64 little-endian
+# Los arrays binarios se leen con `np.frombuffer` (sin copia) y la serie se construye sin
+# validación de pydantic elemento a elemento: el resto del flujo trabaja con `np.ndarray`.
+import json
+import struct
+from fastapi import HTTPException, status
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
+import numpy as np
+from app.core.series_codec import FLOAT_FIELDS, expand_labels
+from app.schemas.series_schema import SeriesData, SeriesRequest
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+PACKED_MEDIA_TYPE = "application/x-series-float64"
+
+# Mismo límite de puntos que `/series/compute` y tamaño máximo del cuerpo (413 si se supera)
+MAX_POINTS = 100_000
+MAX_BODY_SIZE = 16 * 1024 * 1024
+
+PACKED_MAGIC = b"TSF1"
+_PACKED_PREFIX = struct.Struct("<4sI")
+
+def _bad_request(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+def _float_array(value, field: str) -> np.ndarray:
+    """
+    `bin` con float64 little-endian (vista sin copia) o lista de números.
+    """
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        if len(value) % 8:
+            raise _bad_request(f"`{field}` debe contener float64 little-endian (múltiplo de 8 bytes)")
+        return np.frombuffer(value, dtype="<f8")
+    try:
+        return np.asarray(value, dtype=np.float64).reshape(-1)
+    except (TypeError, ValueError):
+        raise _bad_request(f"`{field}` debe ser una lista de números o bytes float64")
+
+def _labels(value, points: int, length: int) -> list:
+    """
+    Lista de etiquetas o rango compacto {start, step, count, decimals}. El rango solo se
+    expande si `count` coincide con `points` y con la longitud de `generated` (`length`) y
+    no supera MAX_POINTS: un cuerpo de pocos bytes no puede pedir millones de etiquetas.
+    """
+    if isinstance(value, dict):
+        try:
+            labels = {
+                "start": float(value["start"]),
+                "step": float(value["step"]),
+                "count": int(value["count"]),
+                "decimals": int(value.get("decimals", 0))
+            }
+        except (KeyError, TypeError, ValueError, OverflowError):
+            raise _bad_request("`labels` compacto requiere start, step, count y decimals numéricos")
+        if not labels["count"] == points == length or labels["count"] > MAX_POINTS:
+            raise _bad_request(
+                f"`labels.count` debe coincidir con `points` y con la longitud de `generated` (máximo {MAX_POINTS})"
+            )
+        if not 0 <= labels["decimals"] <= 20:
+            raise _bad_request("`labels.decimals` debe estar entre 0 y 20")
+        return expand_labels(labels)
+    if not isinstance(value, list) or not all(isinstance(label, str) for label in value):
+        raise _bad_request("`labels` debe ser una lista de strings")
+    return value
+
+def _optional_float(value, field: str):
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise _bad_request(f"`{field}` debe ser numérico")
+    return float(value)
+
+def _build_series(header: dict, arrays: dict) -> SeriesRequest:
+    """
+    Construye un `SeriesRequest` cuyos arrays son `np.ndarray` float64, validando a mano
+    solo los campos escalares (la longitud de los arrays la valida `series_error`).
+    """
+    if not isinstance(header.get("type"), str):
+        raise _bad_request("`type` debe ser un string")
+    points = header.get("points")
+    if isinstance(points, bool) or not isinstance(points, int):
+        raise _bad_request("`points` debe ser un entero")
+
+    return SeriesRequest.model_construct(
+        type=header["type"],
+        points=points,
+        avgError=_optional_float(header.get("avgError"), "avgError"),
+        maxError=_optional_float(header.get("maxError"), "maxError"),
+        data=SeriesData.model_construct(labels=_labels(header.get("labels", []), points, len(arrays["generated"])), **arrays)
+    )
+
+def parse_msgpack(body: bytes) -> SeriesRequest:
+    import msgpack
+
+    try:
+        content = msgpack.unpackb(body, raw=False)
+    except (ValueError, msgpack.UnpackException) as e:
+        raise _bad_request(f"Cuerpo MessagePack inválido: {str(e)}")
+    if not isinstance(content, dict) or not isinstance(content.get("data"), dict):
+        raise _bad_request("El cuerpo MessagePack debe ser un mapa con `data`")
+
+    data = content["data"]
+    arrays = {field: _float_array(data.get(field, []), field) for field in FLOAT_FIELDS}
+    return _build_series({**content, "labels": data.get("labels", [])}, arrays)
+
+def parse_packed(body: bytes) -> SeriesRequest:
+    if len(body) < _PACKED_PREFIX.size:
+        raise _bad_request("Cuerpo binario demasiado corto")
+    magic, header_size = _PACKED_PREFIX.unpack_from(body)
+    if magic != PACKED_MAGIC:
+        raise _bad_request("Cuerpo binario sin la firma TSF1")
+
+    header_end = _PACKED_PREFIX.size + header_size
+    try:
+        header = json.loads(body[_PACKED_PREFIX.size:header_end])
+        lengths = [int(length) for length in header["lengths"]]
+    except (ValueError, KeyError, TypeError):
+        raise _bad_request("Cabecera JSON inválida: requiere type, points, labels y lengths")
+    if not isinstance(header, dict) or len(lengths) != len(FLOAT_FIELDS) or min(lengths) < 0:
+        raise _bad_request("`lengths` debe indicar la longitud de generated, ideal y error")
+
+    offset = -(-header_end // 8) * 8  # los arrays empiezan alineados a 8 bytes
+    if len(body) != offset + 8 * sum(lengths):
+        raise _bad_request("El tamaño del cuerpo no coincide con `lengths`")
+
+    arrays = {}
+    for field, length in zip(FLOAT_FIELDS, lengths):
+        arrays[field] = np.frombuffer(body, dtype="<f8", count=length, offset=offset)
+        offset += 8 * length
+    return _build_series(header, arrays)
+
+def pack_series(series: dict) -> bytes:
+    """
+    Codifica una serie ({type, points, data: {labels, generated, ideal, error}}) en el
+    formato application/x-series-float64 (`labels` puede ser una lista o un rango compacto).
+    La usan los clientes en Python y los benchmarks.
+    """
+    data = series["data"]
+    arrays = [np.asarray(data.get(field, []), dtype="<f8") for field in FLOAT_FIELDS]
+    labels = data.get("labels", [])
+    header = json.dumps({
+        **{key: value for key, value in series.items() if key != "data"},
+        "labels": labels if isinstance(labels, dict) else list(labels),
+        "lengths": [len(values) for values in arrays]
+    }, separators=(",", ":")).encode("utf-8")
+    prefix = _PACKED_PREFIX.pack(PACKED_MAGIC, len(header)) + header
+    padding = b"\0" * (-len(prefix) % 8)
+    return b"".join([prefix, padding, *(values.tobytes() for values in arrays)])
+
+def _too_large() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"El cuerpo supera el máximo de {MAX_BODY_SIZE} bytes"
+    )
+
+async def read_series_body(request) -> bytes:
+    """
+    Lee el cuerpo de la petición sin pasar de MAX_BODY_SIZE (413 según Content-Length o
+    en cuanto se supera, sin acumular el resto).
+    """
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > MAX_BODY_SIZE:
+        raise _too_large()
+
+    chunks = []
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > MAX_BODY_SIZE:
+            raise _too_large()
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+def parse_series_body(content_type: str, body: bytes) -> SeriesRequest:
+    """
+    Decodifica el cuerpo de `POST /series/save` según su Content-Type.
+    JSON se valida con pydantic directamente desde los bytes (mismos errores 422 que FastAPI).
+    """
+    media_type = (content_type or JSON_MEDIA_TYPE).split(";", 1)[0].strip().lower()
+
+    if media_type in MSGPACK_MEDIA_TYPES:
+        return parse_msgpack(body)
+    if media_type == PACKED_MEDIA_TYPE:
+        return parse_packed(body)
+    if media_type != JSON_MEDIA_TYPE and not media_type.endswith("+json"):
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Content-Type no soportado: {media_type}"
+        )
+
+    try:
+        return SeriesRequest.model_validate_json(body)
+    except ValidationError as e:
+        errors = [{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)]
+        raise RequestValidationError(errors, body=body)
+
+# Cuerpo de la ruta en OpenAPI (la ruta lee el cuerpo a mano; `SeriesRequest` ya figura en
+# los esquemas por `SeriesBatchRequest`)
+OPENAPI_REQUEST_BODY = {
+    "required": True,
+    "content": {
+        JSON_MEDIA_TYPE: {"schema": {"$ref": "#/components/schemas/SeriesRequest"}},
+        MSGPACK_MEDIA_TYPES[0]: {"schema": {"$ref": "#/components/schemas/SeriesRequest"}},
+        PACKED_MEDIA_TYPE: {"schema": {"type": "string", "format": "binary"}},
+    }
+}
@@ -0,0 +1,146 @@
+# app/core/series_codec.py
+import hashlib
+import json
+import numpy as np
+from .config import settings
+
+# Formatos de almacenamiento de `SeriesData`:
+#   - "array": listas de Firestore (formato original, un valor protobuf por elemento)
+#   - "float64" / "float32": bytes contiguos little-endian por cada array numérico
+PACKED_DTYPES = {"float64": "<f8", "float32": "<f4"}
+FLOAT_FIELDS = ("generated", "ideal", "error")
+
+def _compact_labels(labels: list):
+    """
+    Si las etiquetas son un rango numérico uniforme que se puede regenerar exactamente,
+    devuelve {start, step, count, decimals}; si no, devuelve la lista original.
+    """
+    if len(labels) < 2:
+        return list(labels)
+    try:
+        values = np.array(labels, dtype=np.float64)
+    except ValueError:
+        return list(labels)
+
+    first = labels[0]
+    decimals = len(first.split(".", 1)[1]) if "." in first else 0
+    compact = {
+        "start": float(values[0]),
+        "step": float((values[-1] - values[0]) / (len(values) - 1)),
+        "count": len(labels),
+        "decimals": decimals
+    }
+    return compact if expand_labels(compact) == list(labels) else list(labels)
+
+def expand_labels(labels) -> list:
+    """
+    Regenera las etiquetas a partir de {start, step, count, decimals} (o devuelve la lista).
+    """
+    if isinstance(labels, list):
+        return labels
+    x = labels["start"] + labels["step"] * np.arange(labels["count"])
+    return np.char.mod(f"%.{labels['decimals']}f", x).tolist()
+
+def _unpack(buffer, dtype: np.dtype, field: str) -> np.ndarray:
+    """
+    Vista sin copia de un array empaquetado; `ValueError` si falta o está truncado.
+    """
+    if not isinstance(buffer, (bytes, bytearray, memoryview)):
+        raise ValueError(f"`{field}` empaquetado debe ser bytes")
+    if len(buffer) % dtype.itemsize:
+        raise ValueError(f"`{field}` truncado: {len(buffer)} bytes no es múltiplo de {dtype.itemsize}")
+    return np.frombuffer(buffer, dtype=dtype)
+
+def is_packed(data: dict) -> bool:
+    """
+    Indica si un `SeriesData` almacenado está en formato empaquetado.
+    """
+    return isinstance(data, dict) and data.get("encoding") in PACKED_DTYPES
+
+def encode_series_data(data: dict, encoding: str = None) -> dict:
+    """
+    Codifica `SeriesData` para Firestore según `SERIES_STORAGE_FORMAT` (o `encoding`).
+    En formato empaquetado cada array numérico se guarda como bytes y las etiquetas
+    se reducen a su rango cuando es posible.
+    """
+    encoding = encoding or settings.SERIES_STORAGE_FORMAT
+    if encoding not in PACKED_DTYPES:
+        # Firestore no admite `np.ndarray`: en formato "array" se guardan como listas
+        return {key: value.tolist() if isinstance(value, np.ndarray) else value for key, value in data.items()}
+
+    dtype = PACKED_DTYPES[encoding]
+    encoded = {
+        "encoding": encoding,
+        # Solo se reduce a un rango si hay una etiqueta por punto (ver `decode_series_arrays`)
+        "labels": _compact_labels(data["labels"]) if len(data["labels"]) == len(data["generated"]) else list(data["labels"])
+    }
+    for field in FLOAT_FIELDS:
+        encoded[field] = np.asarray(data[field], dtype=dtype).tobytes()
+    return encoded
+
+def decode_series_arrays(data: dict) -> dict:
+    """
+    Devuelve los arrays numéricos como `np.ndarray` (vista sin copia sobre los bytes
+    almacenados) y las etiquetas expandidas. Acepta también documentos en formato "array".
+    Lanza `ValueError` si un documento empaquetado está truncado o mal formado.
+    """
+    if not is_packed(data):
+        return {
+            "labels": data.get("labels", []),
+            **{field: np.asarray(data.get(field, []), dtype=np.float64) for field in FLOAT_FIELDS}
+        }
+
+    dtype = np.dtype(PACKED_DTYPES[data["encoding"]])
+    arrays = {field: _unpack(data.get(field), dtype, field) for field in FLOAT_FIELDS}
+
+    # `ideal` (y `error`, si se guardó) tienen la longitud de `generated`, igual que un rango
+    # de etiquetas: se comprueba antes de expandirlo para no generar `count` etiquetas de un
+    # documento corrupto
+    count = len(arrays["generated"])
+    if len(arrays["ideal"]) != count or len(arrays["error"]) not in (0, count):
+        raise ValueError("Serie truncada: los arrays tienen longitudes distintas")
+    labels = data.get("labels")
+    if isinstance(labels, dict):
+        if not {"start", "step", "count", "decimals"} <= labels.keys():
+            raise ValueError("Rango de etiquetas incompleto: requiere start, step, count y decimals")
+        if labels["count"] != count:
+            raise ValueError("El rango de etiquetas no coincide con la longitud de los arrays")
+    elif not isinstance(labels, list):
+        raise ValueError("`labels` debe ser una lista o un rango")
+
+    return {"labels": expand_labels(labels), **arrays}
+
+def decode_series_data(data: dict, as_arrays: bool = False) -> dict:
+    """
+    Decodifica un `SeriesData` almacenado al formato JSON original (listas de floats).
+    Con `as_arrays` los arrays numéricos se devuelven como `np.ndarray` float64 (sin copia
+    para "float64"), para serializarlos directamente con `FastJSONResponse`.
+    Los documentos antiguos en formato "array" se devuelven sin cambios.
+    """
+    if not is_packed(data):
+        return data
+
+    arrays = decode_series_arrays(data)
+    return {
+        "labels": arrays["labels"],
+        **{
+            field: arrays[field].astype(np.float64, copy=False) if as_arrays else arrays[field].astype(np.float64).tolist()
+            for field in FLOAT_FIELDS
+        }
+    }
+
+def payload_hash(data: dict, encoding: str = None) -> str:
+    """
+    Hash SHA-256 del contenido de un `SeriesData` (etiquetas y arrays en float64) y del
+    formato de almacenamiento. Dos series con los mismos datos producen el mismo hash y
+    se guardan una sola vez en `series_payloads`.
+    """
+    encoding = encoding or settings.SERIES_STORAGE_FORMAT
+    digest = hashlib.sha256(encoding.encode("utf-8"))
+    digest.update(json.dumps(list(data.get("labels", [])), separators=(",", ":")).encode("utf-8"))
+    for field in FLOAT_FIELDS:
+        values = np.asarray(data.get(field, []), dtype="<f8")
+        digest.update(field.encode("utf-8"))
+        digest.update(len(values).to_bytes(8, "little"))
+        digest.update(values.tobytes())
+    return digest.hexdigest()
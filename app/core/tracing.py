@@ -0,0 +1,137 @@
+# app/core/tracing.py
+# Trazas por petición: middleware ASGI (latencia por ruta + cabecera Server-Timing) e
+# instrumentación de las llamadas a Firestore y Firebase Auth.
+import functools
+import time
+from .metrics import current_request, end_request, metrics, start_request
+
+# RPCs del cliente GAPIC de Firestore que se contabilizan (una llamada = un viaje de ida y vuelta)
+FIRESTORE_RPCS = (
+    "batch_get_documents", "run_query", "run_aggregation_query", "commit",
+    "begin_transaction", "rollback", "list_documents", "list_collection_ids", "partition_query",
+)
+
+class TracingMiddleware:
+    """
+    Middleware ASGI: abre los contadores de la petición, añade `Server-Timing` a la respuesta
+    y registra la latencia en el histograma de la ruta (plantilla, no la URL concreta).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats, token = start_request(scope)
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message = {
+                    **message,
+                    "headers": [
+                        *message.get("headers", []),
+                        (b"server-timing", stats.server_timing().encode("latin-1"))
+                    ]
+                }
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            metrics.observe_request(scope["method"], stats.route, status, time.perf_counter() - stats.start)
+            end_request(token)
+
+def _response_reads(rpc: str, response) -> int:
+    """
+    Documentos leídos en un mensaje de un stream de Firestore.
+    """
+    pb = getattr(response, "_pb", response)
+    if rpc == "run_query":
+        return int(pb.HasField("document"))
+    return int(pb.WhichOneof("result") is not None)  # batch_get_documents: found o missing
+
+def _traced_stream(rpc: str, stream, start: float, stats):
+    reads = 0
+    try:
+        for response in stream:
+            reads += _response_reads(rpc, response)
+            yield response
+    finally:
+        metrics.observe_firestore(rpc, time.perf_counter() - start, reads=reads, stats=stats)
+
+def _call_firestore(rpc: str, method, *args, **kwargs):
+    start = time.perf_counter()
+    try:
+        result = method(*args, **kwargs)
+    except Exception:
+        metrics.observe_firestore(rpc, time.perf_counter() - start)
+        raise
+
+    if rpc in ("batch_get_documents", "run_query"):
+        # El tiempo y las lecturas se registran cuando se consume el stream
+        return _traced_stream(rpc, result, start, current_request())
+
+    writes = 0
+    if rpc == "commit":
+        request = kwargs.get("request", args[0] if args else None)
+        writes = len(request.get("writes", []) if isinstance(request, dict) else getattr(request, "writes", []))
+    reads = 1 if rpc == "run_aggregation_query" else 0
+    metrics.observe_firestore(rpc, time.perf_counter() - start, reads=reads, writes=writes)
+    return result
+
+class _TracedFirestoreApi:
+    """
+    Envuelve el cliente GAPIC de Firestore: cada RPC de FIRESTORE_RPCS se cuenta y se mide.
+    Contar en esta capa da viajes de ida y vuelta reales (un `stream()` de 50 documentos es
+    una RPC y 50 lecturas) sin envolver referencias ni transacciones.
+    """
+
+    def __init__(self, api):
+        self._api = api
+
+    def __getattr__(self, name):
+        attr = getattr(self._api, name)
+        if name in FIRESTORE_RPCS:
+            return functools.partial(_call_firestore, name, attr)
+        return attr
+
+def instrument_firestore(client):
+    """
+    Instrumenta un cliente de Firestore (`google.cloud.firestore.Client`). Los clientes que
+    no tienen la capa GAPIC (por ejemplo, dobles de prueba) se devuelven sin cambios.
+    """
+    if not hasattr(client, "_firestore_api_internal"):
+        return client
+    client._firestore_api_internal = _TracedFirestoreApi(client._firestore_api)
+    return client
+
+def _call_auth(call: str, func, *args, **kwargs):
+    start = time.perf_counter()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        metrics.observe_auth(call, time.perf_counter() - start)
+
+class _TracedAuth:
+    """
+    Envuelve el módulo `firebase_admin.auth`: cada función pública se mide; las clases
+    (excepciones, UserRecord, ...) y constantes se devuelven tal cual.
+    """
+
+    def __init__(self, module):
+        self._module = module
+
+    def __getattr__(self, name):
+        attr = getattr(self._module, name)
+        if name.startswith("_") or isinstance(attr, type) or not callable(attr):
+            return attr
+        return functools.partial(_call_auth, name, attr)
+
+def instrument_auth(module):
+    return _TracedAuth(module)
@@ -0,0 +1,122 @@
+# app/core/write_behind.py
+import atexit
+import queue
+import threading
+import time
+
+_STOP = object()
+
+class WriteBehindQueue:
+    """
+    Cola acotada con un hilo que agrupa los elementos recibidos durante `window` segundos
+    (o hasta `max_events`) y los entrega juntos a `flush(items)`, fuera de la petición.
+
+    Si la cola está llena `submit` devuelve los elementos que no caben y el llamador los
+    aplica en línea: la presión se traslada a quien escribe en lugar de crecer sin límite.
+    `flush` es responsable de sus reintentos: lo que no pueda aplicar lo devuelve con
+    `requeue` para el siguiente grupo (si lanza una excepción el grupo se descarta).
+    `stop` vacía la cola antes de terminar (lifespan / salida del proceso).
+
+    Requiere un proceso de larga duración: en plataformas serverless la instancia puede
+    congelarse o terminar tras la respuesta sin que se ejecute `stop`.
+    """
+
+    def __init__(self, flush, window: float = 1.0, max_events: int = 500, maxsize: int = 10000, name: str = "write-behind"):
+        self._flush = flush
+        self.window = window
+        self.max_events = max_events
+        self.name = name
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._thread = None
+        self._lock = threading.Lock()
+        atexit.register(self.stop)
+
+    def start(self) -> None:
+        """
+        Arranca el hilo si no está en marcha (también se arranca con el primer `submit`).
+        """
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    def submit(self, items: list) -> list:
+        """
+        Encola `items` sin bloquear. Devuelve los que no cupieron (lista vacía si todos).
+        """
+        self.start()
+        return self.requeue(items)
+
+    def requeue(self, items: list) -> list:
+        """
+        Devuelve a la cola elementos que `flush` no pudo aplicar, sin arrancar el hilo
+        (se puede llamar desde el propio `flush`). Devuelve los que no cupieron.
+        """
+        for position, item in enumerate(items):
+            try:
+                self._queue.put_nowait(item)
+            except queue.Full:
+                return items[position:]
+        return []
+
+    def stop(self, timeout: float = 30.0) -> None:
+        """
+        Aplica todo lo pendiente y detiene el hilo (vuelve a arrancar con el próximo `submit`).
+        """
+        with self._lock:
+            thread = self._thread
+            if thread is None or not thread.is_alive():
+                return
+            self._queue.put(_STOP)  # el hilo sigue vaciando la cola, así que acaba cabiendo
+            thread.join(timeout)
+            self._thread = None
+
+    def _drain(self) -> list:
+        items = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return items
+            if item is not _STOP:
+                items.append(item)
+
+    def _apply(self, items: list) -> None:
+        try:
+            self._flush(items)
+        except Exception as e:
+            print(f"⚠️ {self.name}: no se pudieron aplicar {len(items)} actualizaciones: {str(e)}")
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            stopping = item is _STOP
+            pending = [] if stopping else [item]
+
+            deadline = time.monotonic() + self.window
+            while not stopping and len(pending) < self.max_events:
+                try:
+                    item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                else:
+                    pending.append(item)
+
+            if not stopping:
+                self._apply(pending)
+                continue
+
+            # Parada: lo que quede detrás de la señal también se aplica, con un último
+            # intento para lo que `flush` haya devuelto a la cola
+            pending += self._drain()
+            if pending:
+                self._apply(pending)
+            retried = self._drain()
+            if retried:
+                self._apply(retried)
+            lost = self._drain()
+            if lost:
+                print(f"⚠️ {self.name}: {len(lost)} actualizaciones sin aplicar al detenerse")
+            return
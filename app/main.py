@@ -1,15 +1,51 @@
-from app.core.firebase import initialize_firebase
+import time
+_import_started = time.perf_counter()
+
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from app.core.config import settings
+from app.core.concurrency import run_blocking
+from app.core.compression import CompressionMiddleware
+from app.core.firebase import warmup_firebase
+from app.core.tracing import TracingMiddleware
 from app.api.auth import router as auth_router
 from app.api.series import router as series_router
 from app.api.results import router as results_router
 from app.api.custom_function import router as customF_router
+from app.api.dashboard import router as dashboard_router
+from app.api.metrics import router as metrics_router
+from app.services.series_service import aggregates
+import asyncio
+
+_import_elapsed = time.perf_counter() - _import_started
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Inicializa Firebase según `FIREBASE_WARMUP`. Por defecto se hace en segundo plano para
+    que el arranque en frío no espere a firebase_admin / google-cloud-firestore / grpc.
+    Arranca el write-behind de los agregados y, al apagar, aplica lo que quede pendiente.
+    """
+    if settings.STARTUP_PROFILE:
+        print(f"⏱️ app.main importado en {_import_elapsed * 1000:.1f} ms (detalle: python -m app.core.profiling)")
+
+    warmup = None
+    if settings.FIREBASE_WARMUP == "startup":
+        await run_blocking(warmup_firebase)
+    elif settings.FIREBASE_WARMUP == "background":
+        warmup = asyncio.create_task(run_blocking(warmup_firebase))
+
+    if settings.AGGREGATION_WINDOW > 0:
+        aggregates.start()
 
-app = FastAPI()
+    yield
 
-# Inicializar Firebase inmediatamente
-initialize_firebase()
+    if warmup is not None and not warmup.done():
+        await warmup
+    await run_blocking(aggregates.stop)
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -17,13 +53,28 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Permitir todos los métodos (GET, POST, etc.)
     allow_headers=["*"],  # Permitir todos los headers
+    expose_headers=["Server-Timing", "ETag"],
 )
 
+# Compresión de las respuestas grandes (historial, resultados y funciones guardadas)
+encodings = [name.strip() for name in settings.COMPRESSION.split(",") if name.strip() not in ("", "none")]
+if encodings:
+    app.add_middleware(CompressionMiddleware, encodings=encodings, minimum_size=settings.COMPRESSION_MIN_SIZE)
+
+# Trazas por petición (latencia por ruta, Server-Timing, contadores de Firestore y Auth)
+if settings.METRICS_ENABLED:
+    app.add_middleware(TracingMiddleware)
+
 # Incluir los routers de autenticación y series trigonométricas
 app.include_router(auth_router)
 app.include_router(series_router)
 app.include_router(results_router)
 app.include_router(customF_router)
+app.include_router(dashboard_router)
+
+# GET /metrics solo con token: sin él se exponen el tráfico y la latencia por ruta
+if settings.METRICS_ENABLED and settings.METRICS_TOKEN:
+    app.include_router(metrics_router)
 
 @app.get("/")
 def read_root():
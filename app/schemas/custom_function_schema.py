@@ -1,4 +1,5 @@
 from pydantic import BaseModel
+from typing import List
 
 class CustomFunctionRequest(BaseModel):
     name: str
@@ -8,3 +9,6 @@ class CustomFunctionResponse(CustomFunctionRequest):
     id: str
     uid: str
     date: str
+
+class FunctionsBatchDeleteRequest(BaseModel):
+    ids: List[str]
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Dict
+from typing import List, Dict, Optional
 from datetime import datetime
 
 class SeriesData(BaseModel):
@@ -11,14 +11,16 @@ class SeriesData(BaseModel):
 class SeriesRequest(BaseModel):
     type: str  # "sine", "cosine", "tangent", "custom"
     points: int
-    avgError: float
-    maxError: float
+    avgError: Optional[float] = None  # 🔹 El servidor recalcula las estadísticas a partir de `data`
+    maxError: Optional[float] = None
     data: SeriesData
 
 class SeriesResponseh(SeriesRequest):
     id: str
     uid: str
     date: datetime
+    minError: Optional[float] = None
+    stdError: Optional[float] = None
     
 class SeriesResponse(BaseModel):
     type: str
@@ -31,4 +33,17 @@ class SeriesResponse(BaseModel):
     
 class SaveResultsRequest(BaseModel):
     uid: str  # 🔹 Ahora `uid` se espera en el body
-    seriesId: str
\ No newline at end of file
+    seriesId: str
+
+class SeriesComputeRequest(BaseModel):
+    type: str  # "sine", "cosine", "tangent"
+    start: float
+    end: float
+    points: int
+    terms: int
+
+class SeriesBatchRequest(BaseModel):
+    series: List[SeriesRequest]
+
+class BatchDeleteRequest(BaseModel):
+    ids: List[str]
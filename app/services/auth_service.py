@@ -1,63 +1,177 @@
-from firebase_admin import auth as firebase_auth, firestore
-from firebase_admin.auth import UserRecord
 from fastapi import HTTPException, status
 from app.models.user import User, UserRole
-from app.core.firebase import db  # 🔥 Importa Firestore
+from app.core.firebase import db, firebase_auth  # 🔥 Firestore y Auth (inicialización diferida)
+from app.core.config import settings
+from app.core.concurrency import run_blocking
+from app.services.dashboard_service import DashboardService
+from cachetools import TLRUCache
+import asyncio
+import threading
 import traceback
 import time
-import firebase_admin
-from google.cloud.firestore import Increment, ArrayUnion
 from datetime import datetime, timedelta
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from firebase_admin.auth import UserRecord
+
+# 🔹 Caché de tokens verificados: token -> (User, exp, strict). Cada entrada vive hasta el `exp`
+# del token y, si se llena, se descartan primero las menos usadas recientemente (LRU).
+# `strict` indica si el User se construyó consultando Firebase Auth y Firestore.
+_token_cache = TLRUCache(
+    maxsize=settings.TOKEN_CACHE_MAXSIZE,
+    ttu=lambda _token, value, _now: value[1],
+    timer=time.time
+)
+_token_cache_lock = threading.Lock()
 
 class AuthService:
 
     @staticmethod
-    def verify_token(token: str) -> User:
+    def invalidate_token(token: str) -> None:
+        """
+        Elimina un token concreto de la caché (por ejemplo, al cerrar sesión).
+        """
+        with _token_cache_lock:
+            _token_cache.pop(token, None)
+
+    @staticmethod
+    def invalidate_user(uid: str) -> None:
+        """
+        Elimina de la caché todos los tokens de un usuario. Debe llamarse cuando cambia su rol
+        o cuando el usuario se elimina, para que la próxima petición vuelva a consultar Firebase.
+        """
+        with _token_cache_lock:
+            for token in [t for t, (user, _, _) in _token_cache.items() if user.id == uid]:
+                _token_cache.pop(token, None)
+
+    @staticmethod
+    def revoke_sessions(uid: str) -> None:
+        """
+        Cierra todas las sesiones del usuario: revoca sus refresh tokens en Firebase y vacía
+        sus tokens de la caché. En modo strict los ID tokens emitidos antes se rechazan desde
+        la siguiente petición; en modo claims siguen siendo válidos hasta su `exp` (≤ 1 h).
+        """
+        firebase_auth.revoke_refresh_tokens(uid)
+        AuthService.invalidate_user(uid)
+
+    @staticmethod
+    def _ensure_active(decoded_token: dict, user_record: "UserRecord") -> None:
+        """
+        Rechaza los tokens de usuarios deshabilitados o emitidos antes de la última
+        revocación (la misma comprobación que `verify_id_token(check_revoked=True)`,
+        reutilizando el `get_user` que el modo strict ya hace).
+        """
+        if user_record.disabled:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="El usuario está deshabilitado"
+            )
+        valid_after = user_record.tokens_valid_after_timestamp
+        if valid_after and decoded_token["iat"] * 1000 < valid_after:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="El token ha sido revocado"
+            )
+
+    @staticmethod
+    def _user_from_claims(decoded_token: dict) -> User:
+        """
+        Construye el User solo con los claims del token (uid, name, email y el claim
+        personalizado `role` asignado en `create_user`), sin llamadas remotas.
+        """
+        return User(
+            id=decoded_token["uid"],
+            name=decoded_token.get("name") or "Unknown",
+            email=decoded_token.get("email", ""),
+            role=UserRole(decoded_token.get("role", "user"))
+        )
+
+    @staticmethod
+    def _load_user(token: str, strict: bool, clock_skew_seconds: int) -> User:
+        """
+        Parte bloqueante de la verificación (SDK de Firebase Admin y Firestore).
+        Se ejecuta en el pool de hilos y guarda el resultado en la caché de tokens.
+        """
+        # 🔹 Ajustar la tolerancia de tiempo al verificar el token
+        decoded_token = firebase_auth.verify_id_token(token, clock_skew_seconds=clock_skew_seconds)
+        uid = decoded_token["uid"]
+
+        # 🔹 Modo claims: sin consultas a Firebase Auth ni Firestore
+        if not strict:
+            user = AuthService._user_from_claims(decoded_token)
+            with _token_cache_lock:
+                _token_cache[token] = (user, decoded_token["exp"], False)
+            return user
+
+        # Obtiene información básica del usuario desde Firebase Authentication
+        user_record: UserRecord = firebase_auth.get_user(uid)
+        AuthService._ensure_active(decoded_token, user_record)
+
+        # 🔥 Obtiene el documento del usuario en Firestore
+        doc_ref = db.collection("users").document(uid).get()
+
+        if not doc_ref.exists:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"No se encontró información de usuario en Firestore. UID: {uid}"
+            )
+
+        # Convertimos el documento a dict para extraer la info
+        user_data = doc_ref.to_dict()
+        role = user_data.get("role", "user")
+
+        # Retornamos un objeto de tipo User
+        user = User(
+            id=user_record.uid,
+            name=user_record.display_name or "Unknown",
+            email=user_record.email,
+            role=UserRole(role)
+        )
+
+        # 🔹 Guardar en caché hasta que expire el token
+        with _token_cache_lock:
+            _token_cache[token] = (user, decoded_token["exp"], True)
+
+        return user
+
+    @staticmethod
+    async def verify_token(token: str, strict: bool = None) -> User:
         """
         Verifica el token JWT de Firebase y maneja el error "Token used too early" con tolerancia de tiempo.
+        Los tokens ya verificados se sirven desde caché hasta su expiración, sin llamadas a Firebase.
+
+        Con `strict=False` (o `AUTH_MODE=claims`) el usuario se construye solo a partir de los claims
+        del token: la verificación es local (las claves públicas de Google quedan en caché dentro del
+        SDK) y no se consulta Firebase Auth ni Firestore. `strict=True` fuerza los datos actualizados.
+
+        Un token en caché se sigue aceptando hasta su `exp` aunque el usuario se deshabilite o sus
+        sesiones se revoquen fuera de la API (consola de Firebase); `POST /auth/logout` sí lo vacía.
         """
+        if strict is None:
+            strict = settings.AUTH_MODE != "claims"
+
+        with _token_cache_lock:
+            cached = _token_cache.get(token)
+        if cached is not None and (cached[2] or not strict):
+            return cached[0]
+
         max_retries = 2  # Número de intentos en caso de fallo
         retry_delay = 1   # Segundos de espera antes de reintentar
         clock_skew_seconds = 10  # Ajuste de tolerancia de tiempo
 
         for attempt in range(max_retries):
             try:
-                # 🔹 Ajustar la tolerancia de tiempo al verificar el token
-                decoded_token = firebase_auth.verify_id_token(token, clock_skew_seconds=clock_skew_seconds)
-                uid = decoded_token["uid"]
-
-                # Obtiene información básica del usuario desde Firebase Authentication
-                user_record: UserRecord = firebase_auth.get_user(uid)
-
-                # 🔥 Obtiene el documento del usuario en Firestore
-                doc_ref = db.collection("users").document(uid).get()
-                
-                if not doc_ref.exists:
-                    raise HTTPException(
-                        status_code=status.HTTP_404_NOT_FOUND,
-                        detail=f"No se encontró información de usuario en Firestore. UID: {uid}"
-                    )
-
-                # Convertimos el documento a dict para extraer la info
-                user_data = doc_ref.to_dict()
-                role = user_data.get("role", "user")
-
-                # Retornamos un objeto de tipo User
-                return User(
-                    id=user_record.uid,
-                    name=user_record.display_name or "Unknown",
-                    email=user_record.email,
-                    role=UserRole(role)
-                )
+                return await run_blocking(AuthService._load_user, token, strict, clock_skew_seconds)
 
-            except firebase_admin._auth_utils.InvalidIdTokenError as e:
+            except firebase_auth.InvalidIdTokenError as e:
                 error_message = str(e)
                 if "Token used too early" in error_message:
                     print(f"⚠️ Token usado demasiado temprano, intento {attempt + 1}/{max_retries}")
                     traceback.print_exc()
 
                     if attempt < max_retries - 1:
-                        time.sleep(retry_delay)  # Espera antes de reintentar
+                        await asyncio.sleep(retry_delay)  # Espera antes de reintentar sin bloquear el loop
                         continue
 
                 raise HTTPException(
@@ -77,7 +191,7 @@ class AuthService:
     def create_user(email: str, password: str, name: str, role: str = "user") -> User:
         """
         Crea un usuario en Firebase Authentication y lo guarda en Firestore.
-        Además, actualiza el contador total de usuarios y agrega el usuario al array "users" en `dashboard/stats`.
+        Además, suma el usuario a los contadores distribuidos del dashboard.
         """
         try:
             # 🔥 Crear usuario en Firebase Authentication
@@ -103,35 +217,15 @@ class AuthService:
                 "avg_error": 0.0,
                 "last_activity": datetime.utcnow()
             }
-            db.collection("users").document(user_record.uid).set(user_data)
-            
-            # 🔥 Referencia al documento `dashboard/stats`
-            dashboard_ref = db.collection("dashboard").document("stats")
-            dashboard_snapshot = dashboard_ref.get()
-
-            if dashboard_snapshot.exists:
-                dashboard_data = dashboard_snapshot.to_dict()
-                
-                # Obtener el total de usuarios anterior (si existe)
-                last_users_count = dashboard_data.get("total_users", 0)
-                previous_users_count = dashboard_data.get("users_yesterday", last_users_count)
-                daily_growth = last_users_count + 1 - previous_users_count  # Diferencia con el día anterior
-
-                # 🔥 Actualizar `dashboard/stats`
-                dashboard_ref.update({
-                    "total_users": Increment(1),
-                    "users": ArrayUnion([user_data]),
-                    "users_yesterday": last_users_count,  # Guardar total de ayer
-                    "total_users_growth": daily_growth  # Agregar campo de crecimiento diario
-                })
-            else:
-                # Si no existe, crearlo con valores iniciales
-                dashboard_ref.set({
-                    "total_users": 1,
-                    "users": [user_data],
-                    "users_yesterday": 0,  # Inicializar el total de ayer
-                    "total_users_growth": 1
-                })
+            # 🔥 Guardar el usuario y sumarlo a los contadores distribuidos en un solo commit
+            #    (sus datos viven solo en `users/{uid}`)
+            batch = db.batch()
+            batch.set(db.collection("users").document(user_record.uid), user_data)
+            DashboardService.record_user(writer=batch)
+            batch.commit()
+
+            # 🔥 Materializar los agregados en `dashboard/stats` (como máximo una vez por intervalo)
+            DashboardService.maybe_publish()
 
             return User(
                 id=user_record.uid,
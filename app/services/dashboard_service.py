@@ -0,0 +1,275 @@
+from fastapi import HTTPException
+from app.core.firebase import db, firestore
+from app.core.config import settings
+from datetime import datetime, timedelta
+import heapq
+import random
+import threading
+import time
+
+# 🔹 Control de publicación de `dashboard/stats` (como máximo una escritura por intervalo y proceso)
+_publish_lock = threading.Lock()
+_last_publish = 0.0
+
+class DashboardService:
+    """
+    Agregados globales del dashboard mediante contadores distribuidos (sharded counters).
+
+    Cada guardado incrementa atómicamente un shard aleatorio de `dashboard/stats/shards/{n}`
+    (sin leer nada), por lo que las escrituras no compiten por un único documento.
+    `read_stats` combina los shards y `publish_stats` materializa periódicamente esas cifras
+    en `dashboard/stats` con los mismos campos que el dashboard espera hoy, incluidos los
+    rankings (top-k) de usuarios y tipos de serie.
+    """
+
+    @staticmethod
+    def _shards():
+        return db.collection("dashboard").document("stats").collection("shards")
+
+    @staticmethod
+    def _random_shard():
+        return DashboardService._shards().document(str(random.randrange(settings.DASHBOARD_SHARDS)))
+
+    @staticmethod
+    def _write_shard(data: dict, writer=None) -> None:
+        """
+        Aplica `data` (con transformaciones atómicas) a un shard aleatorio. Si se pasa un
+        `writer` (WriteBatch o Transaction) la escritura se agrega a ese commit.
+        """
+        shard_ref = DashboardService._random_shard()
+        if writer is not None:
+            writer.set(shard_ref, data, merge=True)
+        else:
+            shard_ref.set(data, merge=True)
+
+    @staticmethod
+    def record_series(series_type: str, avg_error: float, max_error: float, writer=None) -> None:
+        """
+        Suma una serie a los contadores globales y a los del tipo de serie.
+        """
+        DashboardService._write_shard({
+            "total_series_generated": firestore.Increment(1),
+            "sum_avg_error": firestore.Increment(avg_error),
+            "series_stats": {
+                series_type: {
+                    "count": firestore.Increment(1),
+                    "sum_avg_error": firestore.Increment(avg_error),
+                    "max_error": firestore.Maximum(max_error)
+                }
+            }
+        }, writer)
+
+    @staticmethod
+    def record_series_many(entries: list, writer=None) -> None:
+        """
+        Suma varias series (tuplas `(type, avg_error, max_error)`) con una sola escritura
+        sobre un shard, agregando los incrementos por tipo.
+        """
+        if not entries:
+            return
+        series_stats = {}
+        for series_type, avg_error, max_error in entries:
+            st = series_stats.setdefault(series_type, {"count": 0, "sum_avg_error": 0.0, "max_error": max_error})
+            st["count"] += 1
+            st["sum_avg_error"] += avg_error
+            st["max_error"] = max(st["max_error"], max_error)
+
+        DashboardService._write_shard({
+            "total_series_generated": firestore.Increment(len(entries)),
+            "sum_avg_error": firestore.Increment(sum(avg_error for _, avg_error, _ in entries)),
+            "series_stats": {
+                series_type: {
+                    "count": firestore.Increment(st["count"]),
+                    "sum_avg_error": firestore.Increment(st["sum_avg_error"]),
+                    "max_error": firestore.Maximum(st["max_error"])
+                }
+                for series_type, st in series_stats.items()
+            }
+        }, writer)
+
+    @staticmethod
+    def record_user(writer=None) -> None:
+        """
+        Suma un usuario al contador global de usuarios.
+        """
+        DashboardService._write_shard({"total_users": firestore.Increment(1)}, writer)
+
+    @staticmethod
+    def _seed_from_legacy(dashboard_data: dict) -> None:
+        """
+        Migra una sola vez los totales del documento `dashboard/stats` anterior a los shards,
+        en el shard `base` (la creación falla si ya existe, así que es idempotente).
+        """
+        total_series = dashboard_data.get("total_series_generated", 0)
+        legacy_stats = dashboard_data.get("series_stats", {})
+        from google.api_core.exceptions import AlreadyExists
+
+        try:
+            DashboardService._shards().document("base").create({
+                "total_series_generated": total_series,
+                "sum_avg_error": dashboard_data.get("global_avg_error", 0.0) * total_series,
+                "total_users": dashboard_data.get("total_users", 0),
+                "series_stats": {
+                    series_type: {
+                        "count": st.get("count", 0),
+                        "sum_avg_error": st.get("avg_error", 0.0) * st.get("count", 0),
+                        "max_error": st.get("max_error", 0.0)
+                    }
+                    for series_type, st in legacy_stats.items()
+                }
+            })
+        except AlreadyExists:
+            pass
+
+    @staticmethod
+    def read_stats() -> dict:
+        """
+        Combina todos los shards en las cifras globales: total_series_generated, global_avg_error,
+        total_users y series_stats ({tipo: {count, avg_error, max_error}}).
+        """
+        total_series = 0
+        sum_avg_error = 0.0
+        total_users = 0
+        type_totals = {}
+
+        for shard in DashboardService._shards().stream():
+            data = shard.to_dict()
+            total_series += data.get("total_series_generated", 0)
+            sum_avg_error += data.get("sum_avg_error", 0.0)
+            total_users += data.get("total_users", 0)
+
+            for series_type, st in data.get("series_stats", {}).items():
+                totals = type_totals.setdefault(series_type, {"count": 0, "sum_avg_error": 0.0, "max_error": 0.0})
+                totals["count"] += st.get("count", 0)
+                totals["sum_avg_error"] += st.get("sum_avg_error", 0.0)
+                totals["max_error"] = max(totals["max_error"], st.get("max_error", 0.0))
+
+        series_stats = {
+            series_type: {
+                "count": totals["count"],
+                "avg_error": totals["sum_avg_error"] / totals["count"] if totals["count"] else 0.0,
+                "max_error": totals["max_error"]
+            }
+            for series_type, totals in type_totals.items()
+        }
+
+        return {
+            "total_series_generated": total_series,
+            "global_avg_error": sum_avg_error / total_series if total_series else 0.0,
+            "total_users": total_users,
+            "series_stats": series_stats
+        }
+
+    @staticmethod
+    def top_performing_users(limit: int = 3) -> list:
+        """
+        Usuarios con mejor desempeño (menor avg_error > 0), obtenidos de la colección `users`
+        con una consulta ordenada por el índice de `avg_error` y limitada a `limit` documentos.
+        """
+        users_ref = (
+            db.collection("users")
+            .where("avg_error", ">", 0.0)
+            .order_by("avg_error")
+            .limit(limit)
+            .stream()
+        )
+        return [
+            {
+                "name": data.get("name", ""),
+                "email": data.get("email", ""),
+                "avg_error": data.get("avg_error", 0.0)
+            }
+            for data in (doc.to_dict() for doc in users_ref)
+        ]
+
+    @staticmethod
+    def _build_stats(dashboard_data: dict, combined: dict, current_time: datetime) -> dict:
+        """
+        Calcula los campos derivados (valores de ayer, crecimiento diario y top de tipos con
+        mayor error) a partir de las cifras combinadas y del último `dashboard/stats` publicado.
+        """
+        total_series = dashboard_data.get("total_series_generated", 0)
+        current_avg_error = dashboard_data.get("global_avg_error", 0.0)
+        total_users = dashboard_data.get("total_users", 0)
+        series_yesterday = dashboard_data.get("series_yesterday", total_series)
+        error_yesterday = dashboard_data.get("error_yesterday", current_avg_error)
+        users_yesterday = dashboard_data.get("users_yesterday", total_users)
+        last_updated = dashboard_data.get("last_update", current_time - timedelta(days=1))
+
+        # Verificar si cambió el día para actualizar los valores de "ayer"
+        if isinstance(last_updated, datetime) and last_updated.date() < current_time.date():
+            series_yesterday = total_series
+            error_yesterday = current_avg_error
+            users_yesterday = total_users
+            last_updated = current_time
+
+        # Series con mayor tasa de error (top 3 por mayor avg_error, sin ordenar todos los tipos)
+        sorted_series = heapq.nlargest(
+            3,
+            combined["series_stats"].items(),
+            key=lambda s: s[1]["avg_error"]
+        )
+        high_error_series = [
+            {
+                "type": s[0],
+                "count": s[1]["count"],
+                "avg_error": s[1]["avg_error"]
+            } for s in sorted_series
+        ]
+
+        return {
+            **combined,
+            "series_yesterday": series_yesterday,
+            "error_yesterday": error_yesterday,
+            "series_growth": combined["total_series_generated"] - series_yesterday,
+            "error_change": combined["global_avg_error"] - error_yesterday,
+            "users_yesterday": users_yesterday,
+            "total_users_growth": combined["total_users"] - users_yesterday,
+            "last_update": last_updated,
+            "high_error_series": high_error_series
+        }
+
+    @staticmethod
+    def publish_stats(write: bool = True) -> dict:
+        """
+        Combina los shards y (si `write`) materializa el resultado en `dashboard/stats`.
+        """
+        try:
+            current_time = datetime.utcnow()
+            dashboard_ref = db.collection("dashboard").document("stats")
+            dashboard_snapshot = dashboard_ref.get()
+            dashboard_data = dashboard_snapshot.to_dict() if dashboard_snapshot.exists else {}
+
+            # La migración es una escritura: solo al publicar, no en las lecturas de GET /dashboard/stats
+            if write and dashboard_data and not dashboard_data.get("sharded"):
+                DashboardService._seed_from_legacy(dashboard_data)
+
+            stats = DashboardService._build_stats(dashboard_data, DashboardService.read_stats(), current_time)
+            stats["top_performing_users"] = DashboardService.top_performing_users()
+
+            if write:
+                # El antiguo array `users` se elimina: los datos por usuario viven en `users/{uid}`
+                dashboard_ref.set({**stats, "sharded": True, "users": firestore.DELETE_FIELD}, merge=True)
+
+            return stats
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error al obtener estadísticas del dashboard: {str(e)}")
+
+    @staticmethod
+    def maybe_publish() -> None:
+        """
+        Publica `dashboard/stats` si pasó `DASHBOARD_PUBLISH_INTERVAL` desde la última publicación
+        de este proceso, manteniendo las escrituras al documento caliente acotadas.
+        """
+        global _last_publish
+        with _publish_lock:
+            now = time.monotonic()
+            if now - _last_publish < settings.DASHBOARD_PUBLISH_INTERVAL:
+                return
+            _last_publish = now
+
+        try:
+            DashboardService.publish_stats()
+        except HTTPException as e:
+            # Los shards ya tienen los datos; la próxima publicación los recogerá
+            print(f"⚠️ No se pudo publicar dashboard/stats: {e.detail}")
@@ -0,0 +1,189 @@
+from fastapi import HTTPException, status
+from cachetools import LRUCache
+import ast
+import hashlib
+import io
+import operator
+import threading
+import tokenize
+import numpy as np
+
+# 🔹 Caché LRU de expresiones compiladas, indexada por el hash de la expresión
+_compiled_cache = LRUCache(maxsize=512)
+_compiled_cache_lock = threading.Lock()
+
+class ExpressionService:
+    """
+    Compilador seguro de expresiones matemáticas de funciones personalizadas.
+
+    La expresión se analiza con `ast` y solo se aceptan números, la variable `x`, las
+    constantes y funciones de la lista blanca y los operadores aritméticos. El árbol se
+    convierte en funciones de NumPy anidadas (nunca se usa `eval`), por lo que el resultado
+    se evalúa sobre todos los puntos de un array en una sola llamada.
+    """
+
+    MAX_EXPRESSION_LENGTH = 500
+    MAX_POINTS = 100_000
+
+    VARIABLE = "x"
+
+    CONSTANTS = {
+        "pi": np.pi,
+        "e": np.e,
+    }
+
+    FUNCTIONS = {
+        "sin": np.sin, "cos": np.cos, "tan": np.tan,
+        "asin": np.arcsin, "acos": np.arccos, "atan": np.arctan,
+        "sinh": np.sinh, "cosh": np.cosh, "tanh": np.tanh,
+        "exp": np.exp, "log": np.log, "ln": np.log, "log10": np.log10, "log2": np.log2,
+        "sqrt": np.sqrt, "abs": np.abs, "floor": np.floor, "ceil": np.ceil,
+    }
+
+    BINARY_OPERATORS = {
+        ast.Add: operator.add,
+        ast.Sub: operator.sub,
+        ast.Mult: operator.mul,
+        ast.Div: operator.truediv,
+        ast.Mod: operator.mod,
+        ast.Pow: operator.pow,
+    }
+
+    UNARY_OPERATORS = {
+        ast.USub: operator.neg,
+        ast.UAdd: operator.pos,
+    }
+
+    @staticmethod
+    def _invalid(detail: str) -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Expresión inválida: {detail}"
+        )
+
+    @staticmethod
+    def _normalize(expression: str) -> str:
+        """
+        Reescribe `^` como `**` a nivel de tokens antes de `ast.parse`, para que `x^2` sea una
+        potencia con su precedencia y asociatividad (`-x^2` = -(x**2), `x^2^3` = x**(2**3)).
+        """
+        try:
+            tokens = [
+                (tokenize.OP, "**") if token.type == tokenize.OP and token.string == "^" else (token.type, token.string)
+                for token in tokenize.generate_tokens(io.StringIO(expression.strip()).readline)
+            ]
+        except (tokenize.TokenError, SyntaxError) as e:
+            raise ExpressionService._invalid(str(e.args[0]) if e.args else "no se pudo analizar")
+        return tokenize.untokenize(tokens).strip()
+
+    @staticmethod
+    def _build(node):
+        """
+        Convierte un nodo del AST en una función f(x) -> ndarray, validando cada nodo.
+        """
+        if isinstance(node, ast.Expression):
+            return ExpressionService._build(node.body)
+
+        if isinstance(node, ast.Constant):
+            if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+                raise ExpressionService._invalid(f"constante no permitida {node.value!r}")
+            try:
+                value = float(node.value)
+            except (OverflowError, ValueError):
+                raise ExpressionService._invalid(f"constante fuera de rango ({len(str(node.value))} dígitos)")
+            return lambda x: np.full_like(x, value)
+
+        if isinstance(node, ast.Name):
+            if node.id == ExpressionService.VARIABLE:
+                return lambda x: x
+            if node.id in ExpressionService.CONSTANTS:
+                value = ExpressionService.CONSTANTS[node.id]
+                return lambda x: np.full_like(x, value)
+            raise ExpressionService._invalid(f"nombre desconocido `{node.id}`")
+
+        if isinstance(node, ast.BinOp) and type(node.op) in ExpressionService.BINARY_OPERATORS:
+            op = ExpressionService.BINARY_OPERATORS[type(node.op)]
+            left = ExpressionService._build(node.left)
+            right = ExpressionService._build(node.right)
+            return lambda x: op(left(x), right(x))
+
+        if isinstance(node, ast.UnaryOp) and type(node.op) in ExpressionService.UNARY_OPERATORS:
+            op = ExpressionService.UNARY_OPERATORS[type(node.op)]
+            operand = ExpressionService._build(node.operand)
+            return lambda x: op(operand(x))
+
+        if isinstance(node, ast.Call):
+            if (
+                not isinstance(node.func, ast.Name)
+                or node.func.id not in ExpressionService.FUNCTIONS
+                or len(node.args) != 1
+                or node.keywords
+            ):
+                raise ExpressionService._invalid("solo se permiten funciones matemáticas de un argumento")
+            func = ExpressionService.FUNCTIONS[node.func.id]
+            arg = ExpressionService._build(node.args[0])
+            return lambda x: func(arg(x))
+
+        raise ExpressionService._invalid(f"construcción no permitida `{type(node).__name__}`")
+
+    @staticmethod
+    def compile(expression: str):
+        """
+        Devuelve la función vectorizada f(x) de la expresión, usando la caché LRU para no
+        volver a analizar expresiones ya compiladas.
+        """
+        if not expression or len(expression) > ExpressionService.MAX_EXPRESSION_LENGTH:
+            raise ExpressionService._invalid(
+                f"debe tener entre 1 y {ExpressionService.MAX_EXPRESSION_LENGTH} caracteres"
+            )
+
+        key = hashlib.sha256(expression.encode("utf-8")).hexdigest()
+        with _compiled_cache_lock:
+            compiled = _compiled_cache.get(key)
+        if compiled is not None:
+            return compiled
+
+        try:
+            tree = ast.parse(ExpressionService._normalize(expression), mode="eval")
+        except SyntaxError as e:
+            raise ExpressionService._invalid(e.msg)
+        compiled = ExpressionService._build(tree)
+
+        with _compiled_cache_lock:
+            _compiled_cache[key] = compiled
+        return compiled
+
+    @staticmethod
+    def evaluate(expression: str, x: np.ndarray) -> np.ndarray:
+        """
+        Evalúa la expresión sobre todos los puntos `x` en una sola llamada vectorizada.
+        """
+        func = ExpressionService.compile(expression)
+        with np.errstate(all="ignore"):
+            return np.asarray(func(np.asarray(x, dtype=np.float64)), dtype=np.float64)
+
+    @staticmethod
+    def sample(expression: str, start: float, end: float, points: int) -> dict:
+        """
+        Muestrea la expresión en `points` puntos equiespaciados de [start, end].
+        Los valores no finitos (fuera del dominio) se devuelven como None.
+        """
+        if not 2 <= points <= ExpressionService.MAX_POINTS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"`points` debe estar entre 2 y {ExpressionService.MAX_POINTS}"
+            )
+        if not start < end:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="`start` debe ser menor que `end`"
+            )
+
+        x = np.linspace(start, end, points)
+        values = ExpressionService.evaluate(expression, x)
+        finite = np.isfinite(values)
+
+        return {
+            "labels": np.char.mod("%.4f", x).tolist(),
+            "values": np.where(finite, values, None).tolist() if not finite.all() else values.tolist()
+        }
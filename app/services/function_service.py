@@ -1,14 +1,21 @@
 from fastapi import HTTPException
 from app.core.firebase import db
+from app.core.cache import read_cache
+from app.core.firestore_utils import delete_owned
+from app.services.expression_service import ExpressionService
 from datetime import datetime
 
 class FunctionsService:
 
+    MAX_BATCH_SIZE = 500
+
     @staticmethod
     def save_function(uid: str, name: str, expression: str):
         """
-        Guarda una función personalizada en Firestore.
+        Guarda una función personalizada en Firestore. La expresión se compila antes de
+        guardarla: las que no se pueden evaluar se rechazan con 400.
         """
+        ExpressionService.compile(expression)
         try:
             function_data = {
                 "uid": uid,
@@ -17,16 +24,109 @@ class FunctionsService:
                 "date": datetime.utcnow().isoformat(),  # 🔹 Convertir datetime a string
             }
 
-            # 🔥 Agregar el documento sin ID manual, Firestore generará el ID automáticamente
-            doc_ref = db.collection("custom_functions").add(function_data)
-
-            # Obtener el ID generado por Firestore
-            function_id = doc_ref[1].id
-            function_data["id"] = function_id
-
-            # Actualizar el documento con el ID generado
-            db.collection("custom_functions").document(function_id).update({"id": function_id})
+            # 🔥 Generar el ID en el cliente y guardar el documento completo en una sola escritura
+            doc_ref = db.collection("custom_functions").document()
+            function_data["id"] = doc_ref.id
+            doc_ref.set(function_data)
+            read_cache.invalidate(uid, "functions")
 
             return function_data  # 🔹 Ahora `date` está en formato string
         except Exception as e:
             raise HTTPException(status_code=400, detail=f"Error al guardar la función: {str(e)}")
+
+    @staticmethod
+    def get_functions(uid: str) -> list:
+        """
+        Obtiene las funciones personalizadas guardadas por el usuario.
+        """
+        try:
+            functions_ref = db.collection("custom_functions").where("uid", "==", uid).stream()
+            functions = []
+            for doc in functions_ref:
+                data = doc.to_dict()
+                date = data.get("date", "")
+                functions.append({
+                    "id": doc.id,
+                    "name": data.get("name", ""),
+                    "expression": data.get("expression", ""),
+                    "createdAt": date.isoformat() if isinstance(date, datetime) else date,
+                })
+            return functions
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error al obtener funciones personalizadas: {str(e)}")
+
+    @staticmethod
+    def delete_function(uid: str, function_id: str):
+        """
+        Elimina una función personalizada, verificando que pertenezca al usuario.
+        """
+        try:
+            function_ref = db.collection("custom_functions").document(function_id)
+            function = function_ref.get()
+
+            if not function.exists:
+                raise HTTPException(status_code=404, detail="Función no encontrada")
+
+            function_data = function.to_dict()
+            if function_data["uid"] != uid:
+                raise HTTPException(status_code=403, detail="No tienes permiso para eliminar esta función")
+
+            function_ref.delete()
+            read_cache.invalidate(uid, "functions")
+            return {"message": "Función eliminada correctamente"}
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error al eliminar función: {str(e)}")
+
+    @staticmethod
+    def delete_functions(uid: str, function_ids: list) -> dict:
+        """
+        Elimina varias funciones personalizadas del usuario con una sola lectura de
+        propiedad y WriteBatches. Devuelve el resultado de cada elemento.
+        """
+        if len(function_ids) > FunctionsService.MAX_BATCH_SIZE:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Se pueden eliminar como máximo {FunctionsService.MAX_BATCH_SIZE} funciones por petición"
+            )
+        try:
+            results = delete_owned("custom_functions", uid, function_ids, (
+                "Función no encontrada",
+                "No tienes permiso para eliminar esta función",
+                "Error al eliminar función"
+            ))
+            deleted = sum(1 for item in results if item["status"] == 200)
+            if deleted:
+                read_cache.invalidate(uid, "functions")
+            return {"deleted": deleted, "results": results}
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error al eliminar funciones: {str(e)}")
+
+    @staticmethod
+    def evaluate_function(uid: str, function_id: str, start: float, end: float, points: int) -> dict:
+        """
+        Evalúa una función personalizada del usuario sobre una malla de `points` puntos
+        en [start, end] con el compilador seguro de expresiones.
+        """
+        try:
+            function = db.collection("custom_functions").document(function_id).get()
+
+            if not function.exists:
+                raise HTTPException(status_code=404, detail="Función no encontrada")
+
+            function_data = function.to_dict()
+            if function_data["uid"] != uid:
+                raise HTTPException(status_code=403, detail="No tienes permiso para evaluar esta función")
+
+            expression = function_data.get("expression", "")
+            return {
+                "id": function_id,
+                "name": function_data.get("name", ""),
+                "expression": expression,
+                **ExpressionService.sample(expression, start, end, points)
+            }
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error al evaluar función: {str(e)}")
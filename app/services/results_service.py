@@ -1,10 +1,32 @@
-from firebase_admin import firestore
 from fastapi import HTTPException
 from app.core.firebase import db
+from app.core.cache import read_cache
+from app.core.firestore_utils import delete_owned, get_documents, hydrate_references
+from app.core.series_codec import decode_series_data
+from app.core.downsampling import downsample_series_data
 from datetime import datetime
+from itertools import islice
 
 class ResultsService:
 
+    MAX_PAGE_SIZE = 100
+    MAX_BATCH_SIZE = 500
+    STREAM_CHUNK_SIZE = 50
+    # Campos que necesita la barra lateral del historial (sin los arrays de `data`)
+    SUMMARY_FIELDS = ["id", "type", "points", "avgError", "maxError", "minError", "stdError", "date"]
+
+    @staticmethod
+    def _projection(fields: str = None):
+        """
+        Traduce el parámetro `fields` a una proyección de Firestore:
+        None/"full" -> documento completo, "summary" -> solo SUMMARY_FIELDS.
+        """
+        if fields in (None, "full"):
+            return None
+        if fields == "summary":
+            return ResultsService.SUMMARY_FIELDS
+        raise HTTPException(status_code=400, detail=f"Valor de `fields` no soportado: {fields}")
+
     @staticmethod
     def save_results(uid: str, series_id: str):
         """
@@ -18,16 +40,226 @@ class ResultsService:
                 "date": datetime.utcnow(),
             }
 
-            # 🔥 Agregar el documento sin ID manual, Firestore generará el ID automáticamente
-            doc_ref = db.collection("series_results").add(results_data)
-
-            # Obtener el ID generado por Firestore
-            result_id = doc_ref[1].id
-            results_data["id"] = result_id
-
-            # Actualizar el documento con el ID generado
-            db.collection("series_results").document(result_id).update({"id": result_id})
+            # 🔥 Generar el ID en el cliente y guardar el documento completo en una sola escritura
+            doc_ref = db.collection("series_results").document()
+            results_data["id"] = doc_ref.id
+            doc_ref.set(results_data)
+            read_cache.invalidate(uid, "saved")
 
             return results_data
         except Exception as e:
             raise HTTPException(status_code=400, detail=f"Error al guardar los resultados: {str(e)}")
+
+    @staticmethod
+    def get_saved_results(uid: str, fields: str = None, max_points: int = None) -> list:
+        """
+        Obtiene los resultados guardados del usuario, incluyendo la información de la serie asociada.
+        Con `fields="summary"` las series se leen proyectadas, sin los arrays de `data`.
+        """
+        projection = ResultsService._projection(fields)
+        try:
+            # 🔹 Obtener los resultados guardados del usuario
+            results_ref = db.collection("series_results").where("uid", "==", uid).stream()
+            results = [doc.to_dict() for doc in results_ref]
+
+            if not results:
+                return []
+
+            saved_series = []
+
+            # 🔹 Obtener información completa de todas las series desde `series_history` en lecturas
+            # por bloques (las series sin ID válido o inexistentes se omiten)
+            pairs = hydrate_references(results, "seriesId", "series_history", projection)
+            series_items = ResultsService._history_items([series_doc for _, series_doc in pairs], max_points)
+
+            for (result, _), series_data in zip(pairs, series_items):
+                series_id = result["seriesId"]
+
+                # 🔹 Construir la respuesta combinando resultado guardado y la serie
+                saved_series.append({
+                    "resultId": result.get("id"),
+                    "seriesId": series_id,
+                    "dateSaved": result.get("date"),
+                    "userId": result.get("uid"),
+                    "series": series_data
+                })
+
+            return saved_series
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error al obtener resultados guardados: {str(e)}")
+
+    @staticmethod
+    def delete_result(uid: str, result_id: str):
+        """
+        Elimina un resultado guardado, verificando que pertenezca al usuario.
+        """
+        try:
+            result_ref = db.collection("series_results").document(result_id)
+            result = result_ref.get()
+
+            if not result.exists:
+                raise HTTPException(status_code=404, detail="Resultado no encontrado")
+
+            result_data = result.to_dict()
+            if result_data["uid"] != uid:
+                raise HTTPException(status_code=403, detail="No tienes permiso para eliminar este resultado")
+
+            result_ref.delete()
+            read_cache.invalidate(uid, "saved")
+            return {"message": "Resultado eliminado correctamente"}
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error al eliminar resultado: {str(e)}")
+
+    @staticmethod
+    def delete_results(uid: str, result_ids: list) -> dict:
+        """
+        Elimina varios resultados guardados del usuario con una sola lectura de propiedad
+        y WriteBatches. Devuelve el resultado de cada elemento.
+        """
+        if len(result_ids) > ResultsService.MAX_BATCH_SIZE:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Se pueden eliminar como máximo {ResultsService.MAX_BATCH_SIZE} resultados por petición"
+            )
+        try:
+            results = delete_owned("series_results", uid, result_ids, (
+                "Resultado no encontrado",
+                "No tienes permiso para eliminar este resultado",
+                "Error al eliminar resultado"
+            ))
+            deleted = sum(1 for item in results if item["status"] == 200)
+            if deleted:
+                read_cache.invalidate(uid, "saved")
+            return {"deleted": deleted, "results": results}
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error al eliminar resultados: {str(e)}")
+
+    @staticmethod
+    def _history_items(docs, max_points: int = None) -> list:
+        """
+        Convierte documentos de `series_history` en elementos del historial.
+        Los arrays de las series deduplicadas (`payloadRef`) se leen de `series_payloads`
+        en bloque. Con `max_points` los arrays se reducen con LTTB antes de serializarlos.
+        Los valores numéricos se devuelven como `np.ndarray` (ver `FastJSONResponse`).
+        """
+        records = [(doc.id, doc.to_dict()) for doc in docs]
+        payload_ids = [
+            series_data["payloadRef"] for _, series_data in records
+            if "data" not in series_data and series_data.get("payloadRef")
+        ]
+        payloads = get_documents("series_payloads", payload_ids, ["data"]) if payload_ids else {}
+
+        items = []
+        for doc_id, series_data in records:
+            payload = payloads.get(series_data.pop("payloadRef", None))
+            if "data" not in series_data and payload is not None:
+                series_data["data"] = payload.to_dict()["data"]
+
+            if "data" in series_data:
+                series_data["data"] = (
+                    downsample_series_data(series_data["data"], max_points, as_arrays=True)
+                    if max_points else decode_series_data(series_data["data"], as_arrays=True)
+                )
+            items.append({
+                "id": doc_id,
+                **series_data
+            })
+        return items
+
+    @staticmethod
+    def _history_query(uid: str, cursor: str = None, fields: str = None):
+        """
+        Consulta del historial ordenada por fecha (índice compuesto uid + date). Si se indica
+        `cursor` (ID de la última serie recibida) continúa justo después de ese documento.
+        Con `fields="summary"` Firestore solo devuelve los campos del resumen.
+        """
+        query = db.collection("series_history").where("uid", "==", uid).order_by("date")
+
+        projection = ResultsService._projection(fields)
+        if projection:
+            query = query.select(projection)
+
+        if cursor:
+            # Solo los campos que necesita el cursor (uid para validarlo, date por el order_by)
+            cursor_doc = db.collection("series_history").document(cursor).get(["uid", "date"])
+            if not cursor_doc.exists or cursor_doc.to_dict().get("uid") != uid:
+                raise HTTPException(status_code=400, detail="Cursor de paginación inválido")
+            query = query.start_after(cursor_doc)
+
+        return query
+
+    @staticmethod
+    def get_history(uid: str, fields: str = None, max_points: int = None) -> list:
+        """
+        Obtiene el historial de series trigonométricas del usuario.
+        """
+        projection = ResultsService._projection(fields)
+        try:
+            query = db.collection("series_history").where("uid", "==", uid)
+            if projection:
+                query = query.select(projection)
+            return ResultsService._history_items(query.stream(), max_points)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error al obtener historial: {str(e)}")
+
+    @staticmethod
+    def get_history_page(uid: str, limit: int, cursor: str = None, fields: str = None, max_points: int = None) -> dict:
+        """
+        Obtiene una página del historial ordenada por fecha. `nextCursor` es el ID a enviar
+        como `cursor` para pedir la página siguiente (None si no hay más).
+        """
+        limit = max(1, min(limit, ResultsService.MAX_PAGE_SIZE))
+        try:
+            history_ref = ResultsService._history_query(uid, cursor, fields).limit(limit).stream()
+            items = ResultsService._history_items(history_ref, max_points)
+            return {
+                "items": items,
+                "nextCursor": items[-1]["id"] if len(items) == limit else None
+            }
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error al obtener historial: {str(e)}")
+
+    @staticmethod
+    def stream_history(uid: str, cursor: str = None, fields: str = None, max_points: int = None, limit: int = None):
+        """
+        Devuelve un generador con los elementos del historial, producidos uno a uno a medida
+        que llegan del stream de Firestore, sin construir la respuesta completa en memoria.
+        Con `limit` se envían como máximo esos elementos. El cursor se valida antes de
+        devolver el generador.
+        """
+        query = ResultsService._history_query(uid, cursor, fields)
+        if limit is not None:
+            query = query.limit(limit)
+
+        def items():
+            docs = query.stream()
+            # Se procesan en bloques pequeños para resolver los `payloadRef` con una lectura por bloque
+            while chunk := list(islice(docs, ResultsService.STREAM_CHUNK_SIZE)):
+                yield from ResultsService._history_items(chunk, max_points)
+
+        return items()
+
+    @staticmethod
+    def get_series(uid: str, series_id: str, max_points: int = None) -> dict:
+        """
+        Obtiene una serie completa del historial (incluidos los arrays de `data`),
+        verificando que pertenezca al usuario.
+        """
+        try:
+            series_doc = db.collection("series_history").document(series_id).get()
+
+            if not series_doc.exists:
+                raise HTTPException(status_code=404, detail="Serie no encontrada")
+
+            if series_doc.to_dict().get("uid") != uid:
+                raise HTTPException(status_code=403, detail="No tienes permiso para ver esta serie")
+
+            return ResultsService._history_items([series_doc], max_points)[0]
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error al obtener la serie: {str(e)}")
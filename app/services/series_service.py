@@ -1,244 +1,441 @@
-from firebase_admin import firestore
 from fastapi import HTTPException
-from app.core.firebase import db
+from app.core.firebase import db, firestore, transactional
+from app.core.cache import read_cache
+from app.core.error_stats import error_stats, series_error
+from app.core.config import settings
+from app.core.firestore_utils import WRITE_BATCH_LIMIT, commit_in_chunks, get_documents
+from app.core.series_codec import encode_series_data, payload_hash
+from app.core.write_behind import WriteBehindQueue
 from app.schemas.series_schema import SeriesRequest, SeriesResponseh
-from datetime import datetime, timedelta
-from google.cloud.firestore import Increment
+from app.services.dashboard_service import DashboardService
+from datetime import datetime
 import math
+import time
 
 class SeriesService:
 
+    MAX_BATCH_SIZE = 500
+    # Reintentos de la escritura agregada del dashboard (espera de 0.5, 1, ... segundos)
+    AGGREGATION_ATTEMPTS = 3
+    AGGREGATION_BACKOFF = 0.5
+
     @staticmethod
-    def save_series(uid: str, series: SeriesRequest) -> SeriesResponseh:
+    def _write_user_stats(transaction, uid: str, user_ref, user_snapshot, count: int, sum_avg_error: float, current_time):
         """
-        Guarda una serie trigonométrica generada por un usuario en `series_history`,
-        actualiza toda la información necesaria en `users` y `dashboard/stats`:
-          - avg_error, total_series_generated, last_activity del usuario
-          - total_series_generated, global_avg_error, series_yesterday, error_yesterday, 
-            series_growth, error_change en el dashboard
-          - series_stats (estadísticas por tipo de serie)
-          - top_performing_users (3 usuarios con menor avg_error)
-          - high_error_series (3 tipos de series con mayor avg_error)
-          - array de users en dashboard con la info actualizada del usuario
+        Suma `count` series (con `sum_avg_error` como suma de sus errores promedio) a las
+        estadísticas del usuario leído en la transacción.
+        """
+        if user_snapshot.exists:
+            user_data = user_snapshot.to_dict()
+            user_total_series = user_data.get("total_series_generated", 0)
+            user_avg_error = user_data.get("avg_error", 0.0)
+
+            new_user_total_series = user_total_series + count
+            new_user_avg_error = (
+                (user_avg_error * user_total_series) + sum_avg_error
+            ) / new_user_total_series
+
+            # Actualizar el documento del usuario
+            transaction.update(user_ref, {
+                "total_series_generated": firestore.Increment(count),
+                "avg_error": new_user_avg_error,
+                "last_activity": current_time
+            })
+        else:
+            # Si no existía, se crea el documento del usuario (caso muy raro)
+            transaction.set(user_ref, {
+                "id": uid,
+                "total_series_generated": count,
+                "avg_error": sum_avg_error / count,
+                "last_activity": current_time
+            })
+
+    @staticmethod
+    @transactional
+    def _commit_user_stats(transaction, uid: str, count: int, sum_avg_error: float, current_time):
+        """
+        Actualiza las estadísticas del usuario tras guardar un bloque de series.
+        """
+        user_ref = db.collection("users").document(uid)
+        user_snapshot = user_ref.get(transaction=transaction)
+        SeriesService._write_user_stats(
+            transaction, uid, user_ref, user_snapshot, count, sum_avg_error, current_time
+        )
+
+    @staticmethod
+    def _apply_aggregates(deltas: list) -> None:
+        """
+        Aplica los agregados de varias series guardadas, tuplas
+        `(uid, type, avg_error, max_error, date)`: una transacción por usuario afectado,
+        una sola escritura sobre los contadores del dashboard y, si toca, la publicación de
+        `dashboard/stats` (con `top_performing_users` y `high_error_series`).
+
+        Un `uid` None indica que las estadísticas del usuario ya se aplicaron (solo falta el
+        dashboard) y un `type` None lo contrario. La escritura del dashboard se reintenta con
+        espera exponencial; lo que siga sin aplicarse vuelve a la cola, sin repetir las
+        transacciones de usuario que ya se confirmaron.
+        """
+        users = {}
+        for uid, _, avg_error, _, current_time in deltas:
+            if uid is None:
+                continue
+            totals = users.setdefault(uid, [0, 0.0, current_time, []])
+            totals[0] += 1
+            totals[1] += avg_error
+            totals[2] = max(totals[2], current_time)
+            totals[3].append((uid, None, avg_error, None, current_time))
+
+        retry = []
+        for uid, (count, sum_avg_error, current_time, user_deltas) in users.items():
+            try:
+                SeriesService._commit_user_stats(db.transaction(), uid, count, sum_avg_error, current_time)
+            except Exception as e:
+                print(f"⚠️ No se pudieron actualizar las estadísticas de {uid}: {str(e)}")
+                retry.extend(user_deltas)  # la transacción no se confirmó: se puede repetir
+
+        entries = [
+            (series_type, avg_error, max_error)
+            for _, series_type, avg_error, max_error, _ in deltas if series_type is not None
+        ]
+        for attempt in range(SeriesService.AGGREGATION_ATTEMPTS):
+            try:
+                DashboardService.record_series_many(entries)
+                entries = []
+                break
+            except Exception as e:
+                print(f"⚠️ No se pudieron sumar {len(entries)} series al dashboard (intento {attempt + 1}): {str(e)}")
+                if attempt + 1 < SeriesService.AGGREGATION_ATTEMPTS:
+                    time.sleep(SeriesService.AGGREGATION_BACKOFF * 2 ** attempt)
+        if entries:
+            retry.extend((None, *entry, None) for entry in entries)
+
+        if retry:
+            lost = aggregates.requeue(retry)
+            if lost:
+                print(f"⚠️ Cola de agregados llena: se pierden {len(lost)} actualizaciones")
+
+        DashboardService.maybe_publish()
+
+    @staticmethod
+    def _record_aggregates(deltas: list) -> None:
+        """
+        Encola los agregados para `aggregates` (write-behind). Los que no caben en la cola se
+        aplican en línea, a costa de la latencia de esta petición.
+        """
+        rejected = aggregates.submit(deltas)
+        if rejected:
+            try:
+                SeriesService._apply_aggregates(rejected)
+            except Exception as e:
+                # La serie ya está guardada: no se convierte en un error de la petición
+                print(f"⚠️ No se pudieron aplicar {len(rejected)} agregados en línea: {str(e)}")
+
+    @staticmethod
+    def _finish_save(uid: str, deltas: list, write_behind: bool) -> None:
+        """
+        Pasos posteriores al commit de las series: invalida la caché del historial, aplica
+        los agregados pendientes (`deltas`, como en `_apply_aggregates`) y publica el
+        dashboard si toca. Las series ya están guardadas, así que un fallo aquí no se
+        convierte en un error de la petición: se registra y las estadísticas del usuario
+        pasan a la cola de agregados.
         """
+        read_cache.invalidate(uid, "history")
+
+        if write_behind:
+            SeriesService._record_aggregates(deltas)
+            return
+
+        user_deltas = [delta for delta in deltas if delta[0] is not None]
+        if user_deltas:
+            try:
+                SeriesService._commit_user_stats(
+                    db.transaction(), uid, len(user_deltas), sum(delta[2] for delta in user_deltas), user_deltas[0][4]
+                )
+            except Exception as e:
+                print(f"⚠️ Estadísticas de {uid} pendientes, se aplicarán en segundo plano: {str(e)}")
+                SeriesService._record_aggregates([(uid, None, avg_error, None, date) for _, _, avg_error, _, date in user_deltas])
+
         try:
-            current_time = datetime.utcnow()  # Obtener la fecha/hora actual
-
-            # 1) Guardar la nueva serie en `series_history`
-            series_data = {
-                "uid": uid,
-                "date": current_time,
-                "type": series.type,
-                "points": series.points,
-                "avgError": series.avgError,
-                "maxError": series.maxError,
-                "data": series.data.dict()
-            }
-            doc_ref = db.collection("series_history").add(series_data)
+            DashboardService.maybe_publish()
+        except Exception as e:
+            print(f"⚠️ No se pudo publicar `dashboard/stats`: {str(e)}")
 
-            # Obtener el ID generado por Firestore
-            series_id = doc_ref[1].id
-            db.collection("series_history").document(series_id).update({"id": series_id})
+    @staticmethod
+    @transactional
+    def _commit_series(transaction, uid: str, series: SeriesRequest, series_ref, series_data: dict, payload: tuple = None, with_stats: bool = True):
+        """
+        Escribe en un solo commit la serie en `series_history` y, con `with_stats`, lee el
+        usuario dentro de la transacción y actualiza sus estadísticas en `users` y los
+        contadores distribuidos del dashboard (sin `with_stats` se aplican en segundo plano).
 
-            # 2) Actualizar info del usuario en la colección `users`
+        Con `payload` = (hash, data codificada) los arrays se guardan en `series_payloads/{hash}`:
+        si ya existe solo se incrementa su `refCount`, y la serie guarda `payloadRef`.
+        """
+        current_time = series_data["date"]
+        if with_stats:
             user_ref = db.collection("users").document(uid)
-            user_snapshot = user_ref.get()
-
-            new_user_total_series = 0
-            new_user_avg_error = series.avgError  # valor por defecto si no existía user
-
-            if user_snapshot.exists:
-                user_data = user_snapshot.to_dict()
-                user_total_series = user_data.get("total_series_generated", 0)
-                user_avg_error = user_data.get("avg_error", 0.0)
-
-                new_user_total_series = user_total_series + 1
-                new_user_avg_error = (
-                    (user_avg_error * user_total_series) + series.avgError
-                ) / new_user_total_series
-
-                # Actualizar el documento del usuario
-                user_ref.update({
-                    "total_series_generated": Increment(1),
-                    "avg_error": new_user_avg_error,
-                    "last_activity": current_time
-                })
-            else:
-                # Si no existía, se crea el documento del usuario (caso muy raro)
-                new_user_total_series = 1
-                user_data = {
-                    "id": uid,
-                    "total_series_generated": 1,
-                    "avg_error": series.avgError,
-                    "last_activity": current_time
-                }
-                user_ref.set(user_data)
-
-            # 3) Actualizar `dashboard/stats`
-            dashboard_ref = db.collection("dashboard").document("stats")
-            dashboard_snapshot = dashboard_ref.get()
-
-            if dashboard_snapshot.exists:
-                dashboard_data = dashboard_snapshot.to_dict()
-
-                # --- A) Actualizar métricas globales de series ---
-                total_series = dashboard_data.get("total_series_generated", 0)
-                current_avg_error = dashboard_data.get("global_avg_error", 0.0)
-                series_yesterday = dashboard_data.get("series_yesterday", total_series)
-                error_yesterday = dashboard_data.get("error_yesterday", current_avg_error)
-                last_updated = dashboard_data.get("last_update", current_time - timedelta(days=1))
-
-                # Verificar si cambió el día para actualizar 'series_yesterday' y 'error_yesterday'
-                if isinstance(last_updated, datetime) and last_updated.date() < current_time.date():
-                    series_yesterday = total_series
-                    error_yesterday = current_avg_error
-                    last_updated = current_time
-
-                new_total_series = total_series + 1
-                new_avg_error = (
-                    (current_avg_error * total_series) + series.avgError
-                ) / new_total_series
-
-                # Crecimiento diario
-                series_growth = new_total_series - series_yesterday
-                error_change = new_avg_error - error_yesterday
-
-                # --- B) Actualizar estadística por tipo de serie ---
-                series_stats = dashboard_data.get("series_stats", {})
-                if series.type not in series_stats:
-                    # Inicializar stats si no existen para este tipo
-                    series_stats[series.type] = {
-                        "count": 0,
-                        "avg_error": 0.0,
-                        "max_error": 0.0
-                    }
-
-                st = series_stats[series.type]
-                count_before = st["count"]
-                avg_err_before = st["avg_error"]
-                max_err_before = st["max_error"]
-
-                new_count = count_before + 1
-                new_avg_series_error = (
-                    (avg_err_before * count_before) + series.avgError
-                ) / new_count
-                new_max_error = max(max_err_before, series.maxError)
-
-                series_stats[series.type] = {
-                    "count": new_count,
-                    "avg_error": new_avg_series_error,
-                    "max_error": new_max_error
-                }
-
-                # --- C) Actualizar el usuario en el array `users` ---
-                users_list = dashboard_data.get("users", [])
-                for i, usr in enumerate(users_list):
-                    if usr["id"] == uid:
-                        users_list[i]["total_series_generated"] = new_user_total_series
-                        users_list[i]["avg_error"] = new_user_avg_error
-                        users_list[i]["last_activity"] = current_time
-                        break
-
-                # --- D) Calcular "Usuarios con Mejor Desempeño" (top 3 por menor avg_error) ---
-                # 1. Filtra para ignorar usuarios con avg_error <= 0
-                valid_users = [u for u in users_list if u.get("avg_error", 0.0) > 0.0]
-
-                # 2. Ordena la lista resultante por avg_error ascendente
-                sorted_users = sorted(
-                    valid_users,
-                    key=lambda u: u.get("avg_error", float("inf"))
-                )[:3]
-
-                # 3. Construye la lista final
-                top_performing_users = [
-                    {
-                        "name": u.get("name", ""),
-                        "email": u.get("email", ""),
-                        "avg_error": u.get("avg_error", 0.0)
-                    }
-                    for u in sorted_users
-                ]
-
-                # --- E) Calcular "Series con Mayor Tasa de Error" (top 3 por mayor avg_error) ---
-                sorted_series = sorted(
-                    series_stats.items(), 
-                    key=lambda s: s[1]["avg_error"],
-                    reverse=True
-                )[:3]
-                high_error_series = [
-                    {
-                        "type": s[0],
-                        "count": s[1]["count"],
-                        "avg_error": s[1]["avg_error"]
-                    } for s in sorted_series
-                ]
-
-                # --- F) Finalmente, actualizar Firestore de una sola vez ---
-                dashboard_ref.update({
-                    "total_series_generated": Increment(1),
-                    "global_avg_error": new_avg_error,
-                    "series_yesterday": series_yesterday,
-                    "error_yesterday": error_yesterday,
-                    "series_growth": series_growth,
-                    "error_change": error_change,
-                    "last_update": last_updated,
-
-                    "series_stats": series_stats,
-                    "users": users_list,  # array de usuarios actualizado
-                    "top_performing_users": top_performing_users,
-                    "high_error_series": high_error_series
-                })
+            user_snapshot = user_ref.get(transaction=transaction)
+
+        if payload is not None:
+            payload_id, encoded_data = payload
+            payload_ref = db.collection("series_payloads").document(payload_id)
+            payload_snapshot = payload_ref.get(transaction=transaction)
 
+            if payload_snapshot.exists:
+                transaction.update(payload_ref, {"refCount": firestore.Increment(1)})
             else:
-                # El documento no existe, crearlo con valores iniciales
-                dashboard_ref.set({
-                    "total_series_generated": 1,
-                    "global_avg_error": series.avgError,
-                    "series_yesterday": 0,
-                    "error_yesterday": series.avgError,
-                    "series_growth": 1,
-                    "error_change": 0.0,
-                    "last_update": current_time,
-                    "series_stats": {
-                        series.type: {
-                            "count": 1,
-                            "avg_error": series.avgError,
-                            "max_error": series.maxError
-                        }
-                    },
-                    # Creamos un 'users' mínimo por si no existía
-                    "users": [{
-                        "id": uid,
-                        "total_series_generated": 1,
-                        "avg_error": series.avgError,
-                        "last_activity": current_time
-                    }],
-                    "top_performing_users": [{
-                        "name": "",  # Reemplaza con el nombre si lo tienes
-                        "email": "", # Reemplaza con el email si lo tienes
-                        "avg_error": series.avgError
-                    }],
-                    "high_error_series": [{
-                        "type": series.type,
-                        "count": 1,
-                        "avg_error": series.avgError
-                    }]
+                transaction.set(payload_ref, {
+                    "data": encoded_data,
+                    "refCount": 1,
+                    "createdAt": current_time
                 })
 
-            # 4) Retornar la respuesta
-            return SeriesResponseh(
-                id=series_id,
-                uid=uid,
-                date=series_data["date"],
-                type=series_data["type"],
-                points=series_data["points"],
-                avgError=series_data["avgError"],
-                maxError=series_data["maxError"],
-                data=series_data["data"]
-            )
+        transaction.set(series_ref, series_data)
+        if not with_stats:
+            return
+
+        SeriesService._write_user_stats(
+            transaction, uid, user_ref, user_snapshot, 1, series_data["avgError"], current_time
+        )
+
+        # Sumar la serie a los contadores distribuidos del dashboard (incremento atómico)
+        DashboardService.record_series(
+            series.type, series_data["avgError"], series_data["maxError"], writer=transaction
+        )
+
+    @staticmethod
+    def _prepare_series(uid: str, series: SeriesRequest, current_time) -> tuple:
+        """
+        Valida los arrays de la serie, calcula sus estadísticas de error y prepara el
+        documento de `series_history` con un ID generado en el cliente.
+        Devuelve (series_ref, series_data, payload), con payload = (hash, data codificada)
+        o None si la deduplicación está desactivada.
+        """
+        error = series_error(series.data.generated, series.data.ideal, series.data.error)
+        if error.size:
+            stats = error_stats(error)
+        else:
+            stats = {
+                "avgError": series.avgError or 0.0,
+                "maxError": series.maxError or 0.0,
+                "minError": 0.0,
+                "stdError": 0.0
+            }
+
+        series_ref = db.collection("series_history").document()
+        series_data = {
+            "id": series_ref.id,
+            "uid": uid,
+            "date": current_time,
+            "type": series.type,
+            "points": series.points,
+            **stats
+        }
+
+        # Los arrays se guardan una sola vez por contenido (o completos si se desactiva)
+        data = dict(series.data)  # valores tal cual: listas o `np.ndarray` de los cuerpos binarios
+        payload = None
+        if settings.SERIES_DEDUP:
+            payload = (payload_hash(data), encode_series_data(data))
+            series_data["payloadRef"] = payload[0]
+        else:
+            series_data["data"] = encode_series_data(data)
+
+        return series_ref, series_data, payload
+
+    @staticmethod
+    def save_series(uid: str, series: SeriesRequest) -> SeriesResponseh:
+        """
+        Guarda una serie trigonométrica generada por un usuario en `series_history`,
+        actualiza toda la información necesaria en `users` y en el dashboard:
+          - avg_error, total_series_generated, last_activity del usuario
+          - contadores distribuidos del dashboard (totales globales y series_stats por tipo),
+            publicados periódicamente en `dashboard/stats` por DashboardService junto con
+            top_performing_users y high_error_series
+
+        Las estadísticas de error (avg/max/min/std) se calculan en el servidor a partir de
+        `data` y son las que se guardan y alimentan los agregados; los valores enviados por
+        el cliente solo se usan si la serie no trae datos.
+
+        Con AGGREGATION_WINDOW > 0 la respuesta solo espera la escritura de la serie: los
+        agregados del usuario y del dashboard se aplican en segundo plano (`aggregates`).
+        """
+        # Validar los arrays y derivar las estadísticas antes de escribir nada
+        current_time = datetime.utcnow()  # Obtener la fecha/hora actual
+        series_ref, series_data, payload = SeriesService._prepare_series(uid, series, current_time)
+        write_behind = settings.AGGREGATION_WINDOW > 0
 
+        try:
+            # 1) Guardar la serie y su payload en una transacción (un solo commit). Sin
+            #    write-behind, en el mismo commit se actualizan el usuario y el dashboard
+            SeriesService._commit_series(
+                db.transaction(), uid, series, series_ref, series_data, payload, with_stats=not write_behind
+            )
         except Exception as e:
             raise HTTPException(
                 status_code=400,
                 detail=f"Error al guardar la serie: {str(e)}"
             )
+
+        # 2) Estadísticas del usuario y agregados del dashboard: en segundo plano, agrupados
+        #    con los de otros guardados, o en línea publicando `dashboard/stats` si toca
+        SeriesService._finish_save(uid, [
+            (uid, series.type, series_data["avgError"], series_data["maxError"], current_time)
+        ] if write_behind else [], write_behind)
+
+        # 3) Retornar la respuesta
+        return SeriesResponseh(
+            id=series_data["id"],
+            uid=uid,
+            date=series_data["date"],
+            type=series_data["type"],
+            points=series_data["points"],
+            avgError=series_data["avgError"],
+            maxError=series_data["maxError"],
+            minError=series_data["minError"],
+            stdError=series_data["stdError"],
+            data=series.data
+        )
+
+    @staticmethod
+    def save_series_batch(uid: str, series_list: list) -> dict:
+        """
+        Guarda varias series del usuario en WriteBatches de hasta 500 operaciones.
+        Cada bloque escribe las series, sus payloads (un `refCount` agregado por hash) y
+        una sola escritura sobre los contadores del dashboard; al final las estadísticas
+        del usuario se actualizan una vez con todas las series guardadas.
+        Devuelve el resultado de cada serie en el orden recibido.
+        """
+        if len(series_list) > SeriesService.MAX_BATCH_SIZE:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Se pueden guardar como máximo {SeriesService.MAX_BATCH_SIZE} series por petición"
+            )
+
+        current_time = datetime.utcnow()
+        results = [None] * len(series_list)
+        entries = []
+        for index, series in enumerate(series_list):
+            try:
+                entries.append((index, series, *SeriesService._prepare_series(uid, series, current_time)))
+            except HTTPException as e:
+                results[index] = {"index": index, "id": None, "status": e.status_code, "detail": e.detail}
+
+        write_behind = settings.AGGREGATION_WINDOW > 0
+        try:
+            # Los payloads que ya existen conservan su `createdAt`
+            existing_payloads = get_documents(
+                "series_payloads", [payload[0] for *_, payload in entries if payload], ["refCount"]
+            )
+            created_payloads = set()
+
+            def write_chunk(batch, chunk):
+                payloads = {}
+                for _, _, series_ref, series_data, payload in chunk:
+                    batch.set(series_ref, series_data)
+                    if payload:
+                        payloads.setdefault(payload[0], [payload[1], 0])[1] += 1
+
+                for payload_id, (encoded_data, count) in payloads.items():
+                    payload_data = {"data": encoded_data, "refCount": firestore.Increment(count)}
+                    if payload_id not in existing_payloads and payload_id not in created_payloads:
+                        payload_data["createdAt"] = current_time
+                        created_payloads.add(payload_id)
+                    batch.set(db.collection("series_payloads").document(payload_id), payload_data, merge=True)
+
+                if not write_behind:
+                    DashboardService.record_series_many([
+                        (series.type, series_data["avgError"], series_data["maxError"])
+                        for _, series, _, series_data, _ in chunk
+                    ], writer=batch)
+
+            # Hasta 2 operaciones por serie (serie y payload) más la del dashboard
+            ops_per_series = 2 if settings.SERIES_DEDUP else 1
+            chunk_size = (WRITE_BATCH_LIMIT - 1) // ops_per_series
+
+            saved = []
+            for chunk, error in commit_in_chunks(entries, write_chunk, chunk_size):
+                for index, _, _, series_data, _ in chunk:
+                    if error is None:
+                        saved.append(series_data)
+                        results[index] = {"index": index, "id": series_data["id"], "status": 200, "detail": None}
+                    else:
+                        results[index] = {
+                            "index": index, "id": None, "status": 500,
+                            "detail": f"Error al guardar la serie: {str(error)}"
+                        }
+
+        except Exception as e:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Error al guardar las series: {str(e)}"
+            )
+
+        # Las series guardadas ya no se deshacen: a partir de aquí siempre se devuelve el
+        # resultado de cada una (sin write-behind el dashboard ya se sumó en cada bloque)
+        if saved:
+            SeriesService._finish_save(uid, [
+                (uid, d["type"] if write_behind else None, d["avgError"], d["maxError"], current_time)
+                for d in saved
+            ], write_behind)
+
+        return {"saved": len(saved), "results": results}
+
+    @staticmethod
+    @transactional
+    def _delete_series(transaction, uid: str, series_ref):
+        """
+        Lee la serie dentro de la transacción, la elimina y libera su referencia en
+        `series_payloads`: decrementa `refCount` o borra el payload si era la última serie
+        que lo usaba. Dos borrados simultáneos de la misma serie no decrementan dos veces:
+        el que pierde se reintenta, ya no la encuentra y responde 404 sin escribir nada.
+        """
+        series_doc = series_ref.get(["uid", "payloadRef"], transaction=transaction)
+        if not series_doc.exists:
+            raise HTTPException(status_code=404, detail="Serie no encontrada")
+
+        series_info = series_doc.to_dict()
+        if series_info.get("uid") != uid:
+            raise HTTPException(status_code=403, detail="No tienes permiso para eliminar esta serie")
+
+        payload_id = series_info.get("payloadRef")
+        if payload_id:
+            payload_ref = db.collection("series_payloads").document(payload_id)
+            payload_snapshot = payload_ref.get(transaction=transaction)
+
+            if payload_snapshot.exists:
+                if payload_snapshot.to_dict().get("refCount", 1) <= 1:
+                    transaction.delete(payload_ref)
+                else:
+                    transaction.update(payload_ref, {"refCount": firestore.Increment(-1)})
+
+        transaction.delete(series_ref)
+
+    @staticmethod
+    def delete_series(uid: str, series_id: str) -> dict:
+        """
+        Elimina una serie del historial del usuario (y su payload si ya no se referencia).
+        """
+        try:
+            series_ref = db.collection("series_history").document(series_id)
+            SeriesService._delete_series(db.transaction(), uid, series_ref)
+            read_cache.invalidate(uid, "history", "saved")
+            return {"message": "Serie eliminada correctamente"}
+
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Error al eliminar la serie: {str(e)}"
+            )
+
+# Agregados de los guardados (usuario y dashboard) aplicados en segundo plano, agrupados por
+# ventana de AGGREGATION_WINDOW segundos o AGGREGATION_MAX_EVENTS series
+aggregates = WriteBehindQueue(
+    SeriesService._apply_aggregates,
+    window=settings.AGGREGATION_WINDOW,
+    max_events=settings.AGGREGATION_MAX_EVENTS,
+    maxsize=settings.AGGREGATION_QUEUE_SIZE,
+    name="series-aggregates"
+)
@@ -0,0 +1,138 @@
+from fastapi import HTTPException, status
+from app.core.error_stats import error_stats
+from app.schemas.series_schema import SeriesComputeRequest
+from cachetools import LRUCache
+from fractions import Fraction
+from functools import lru_cache
+from math import comb, factorial
+import numpy as np
+import threading
+
+# 🔹 Caché LRU de series ya calculadas, indexada por (type, start, end, points, terms)
+_computed_cache = LRUCache(maxsize=32)
+_computed_cache_lock = threading.Lock()
+
+class TaylorService:
+
+    SUPPORTED_TYPES = ("sine", "cosine", "tangent")
+    MAX_POINTS = 100_000
+    MAX_TERMS = 50
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _bernoulli(n: int) -> Fraction:
+        """
+        Número de Bernoulli B_n (convención B_1 = -1/2), calculado de forma exacta.
+        """
+        if n == 0:
+            return Fraction(1)
+        return -sum(
+            comb(n + 1, k) * TaylorService._bernoulli(k) for k in range(n)
+        ) / (n + 1)
+
+    @staticmethod
+    @lru_cache(maxsize=64)
+    def _coefficients(series_type: str, terms: int) -> np.ndarray:
+        """
+        Coeficientes de Maclaurin en potencias de x² (los primeros `terms` términos no nulos):
+          - sine:    sin(x) = x · Σ c_n (x²)^n
+          - cosine:  cos(x) =     Σ c_n (x²)^n
+          - tangent: tan(x) = x · Σ c_n (x²)^n
+        """
+        if series_type == "sine":
+            coeffs = [(-1) ** n / factorial(2 * n + 1) for n in range(terms)]
+        elif series_type == "cosine":
+            coeffs = [(-1) ** n / factorial(2 * n) for n in range(terms)]
+        else:
+            # tan(x) = Σ (-1)^(n-1) 2^(2n) (2^(2n) - 1) B_2n / (2n)! · x^(2n-1), n >= 1
+            coeffs = [
+                float(
+                    (-1) ** (n - 1) * 2 ** (2 * n) * (2 ** (2 * n) - 1)
+                    * TaylorService._bernoulli(2 * n) / factorial(2 * n)
+                )
+                for n in range(1, terms + 1)
+            ]
+        return np.array(coeffs, dtype=np.float64)
+
+    @staticmethod
+    def evaluate(series_type: str, x: np.ndarray, terms: int) -> np.ndarray:
+        """
+        Evalúa la aproximación de Taylor sobre todos los puntos `x` en una sola pasada
+        vectorizada (Horner en x²), sin bucles por punto.
+        """
+        coeffs = TaylorService._coefficients(series_type, terms)
+        x2 = x * x
+        acc = np.full_like(x, coeffs[-1])
+        for c in coeffs[-2::-1]:
+            acc *= x2
+            acc += c
+        if series_type in ("sine", "tangent"):
+            acc *= x
+        return acc
+
+    @staticmethod
+    def ideal(series_type: str, x: np.ndarray) -> np.ndarray:
+        """
+        Valor exacto de la función trigonométrica para cada punto.
+        """
+        if series_type == "sine":
+            return np.sin(x)
+        if series_type == "cosine":
+            return np.cos(x)
+        return np.tan(x)
+
+    @staticmethod
+    def compute_series(request: SeriesComputeRequest) -> dict:
+        """
+        Genera una serie de Taylor completa (labels, generated, ideal, error) y sus
+        estadísticas de error para el rango y número de puntos solicitados, con la forma de
+        `SeriesResponse`. Los arrays se devuelven como `np.ndarray` (ver `FastJSONResponse`).
+        Las peticiones repetidas se responden desde la caché sin recalcular.
+        """
+        if request.type not in TaylorService.SUPPORTED_TYPES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Tipo de serie no soportado: {request.type}"
+            )
+        if not 2 <= request.points <= TaylorService.MAX_POINTS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"`points` debe estar entre 2 y {TaylorService.MAX_POINTS}"
+            )
+        if not 1 <= request.terms <= TaylorService.MAX_TERMS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"`terms` debe estar entre 1 y {TaylorService.MAX_TERMS}"
+            )
+        if not request.start < request.end:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="`start` debe ser menor que `end`"
+            )
+
+        key = (request.type, request.start, request.end, request.points, request.terms)
+        with _computed_cache_lock:
+            cached = _computed_cache.get(key)
+        if cached is not None:
+            return cached
+
+        x = np.linspace(request.start, request.end, request.points)
+        generated = TaylorService.evaluate(request.type, x, request.terms)
+        ideal = TaylorService.ideal(request.type, x)
+        error = np.abs(generated - ideal)
+
+        response = {
+            "type": request.type,
+            "points": request.points,
+            **error_stats(error),
+            "data": {
+                "labels": np.char.mod("%.4f", x).tolist(),
+                "generated": generated,
+                "ideal": ideal,
+                "error": error,
+            }
+        }
+
+        with _computed_cache_lock:
+            _computed_cache[key] = response
+        return response
@@ -0,0 +1,353 @@
+# benchmarks/fakes.py
+# Dobles en memoria de Firestore y Firebase Auth para los benchmarks, con latencia configurable
+# por viaje de ida y vuelta. Implementan solo la parte del SDK que usa la aplicación.
+import copy
+import threading
+import time
+import uuid
+from google.api_core.exceptions import AlreadyExists, NotFound
+from google.cloud.firestore import DELETE_FIELD, Increment, Maximum, Minimum
+
+class Latency:
+    """
+    Latencia simulada (segundos) de cada tipo de viaje de ida y vuelta.
+    """
+
+    def __init__(self, read: float = 0.0, write: float = 0.0, auth: float = 0.0):
+        self.read = read
+        self.write = write
+        self.auth = auth
+
+def _apply(target: dict, key: str, value) -> None:
+    if isinstance(value, Increment):
+        target[key] = target.get(key, 0) + value.value
+    elif isinstance(value, Maximum):
+        target[key] = max(target.get(key, value.value), value.value)
+    elif isinstance(value, Minimum):
+        target[key] = min(target.get(key, value.value), value.value)
+    elif value is DELETE_FIELD:
+        target.pop(key, None)
+    else:
+        target[key] = copy.deepcopy(value)
+
+def _merge(target: dict, data: dict) -> None:
+    for key, value in data.items():
+        if isinstance(value, dict):
+            if not isinstance(target.get(key), dict):
+                target[key] = {}
+            _merge(target[key], value)
+        else:
+            _apply(target, key, value)
+
+class FakeSnapshot:
+    def __init__(self, reference, data, field_paths=None):
+        self.reference = reference
+        self.id = reference.id
+        self.exists = data is not None
+        if data is not None and field_paths is not None:
+            data = {key: value for key, value in data.items() if key in field_paths}
+        self._data = copy.deepcopy(data)
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+    def get(self, field: str):
+        return self._data.get(field)
+
+class FakeDocumentReference:
+    def __init__(self, db, path: str):
+        self._db = db
+        self.path = path
+        self.id = path.rsplit("/", 1)[-1]
+
+    def collection(self, name: str):
+        return FakeCollectionReference(self._db, f"{self.path}/{name}")
+
+    def get(self, field_paths=None, transaction=None):
+        self._db._round_trip("read", reads=1)
+        return self._db._snapshot(self, field_paths)
+
+    def set(self, data: dict, merge: bool = False):
+        self._db._round_trip("write", writes=1)
+        self._db._apply_writes([("set", self, data, merge)])
+
+    def create(self, data: dict):
+        self._db._round_trip("write", writes=1)
+        self._db._apply_writes([("create", self, data, False)])
+
+    def update(self, data: dict):
+        self._db._round_trip("write", writes=1)
+        self._db._apply_writes([("update", self, data, False)])
+
+    def delete(self):
+        self._db._round_trip("write", writes=1)
+        self._db._apply_writes([("delete", self, None, False)])
+
+class FakeQuery:
+    OPERATORS = {
+        "==": lambda a, b: a == b,
+        "<": lambda a, b: a is not None and a < b,
+        "<=": lambda a, b: a is not None and a <= b,
+        ">": lambda a, b: a is not None and a > b,
+        ">=": lambda a, b: a is not None and a >= b,
+        "in": lambda a, b: a in b,
+    }
+
+    def __init__(self, db, path: str, filters=(), orders=(), limit=None, after=None, field_paths=None):
+        self._db = db
+        self._path = path
+        self._filters = tuple(filters)
+        self._orders = tuple(orders)
+        self._limit = limit
+        self._after = after
+        self._field_paths = field_paths
+
+    def _copy(self, **changes):
+        query = FakeQuery(self._db, self._path, self._filters, self._orders, self._limit, self._after, self._field_paths)
+        query.__dict__.update(changes)
+        return query
+
+    def where(self, field_path=None, op_string=None, value=None, filter=None):
+        if filter is not None:
+            field_path, op_string, value = filter.field_path, filter.op_string, filter.value
+        return self._copy(_filters=self._filters + ((field_path, op_string, value),))
+
+    def order_by(self, field_path: str, direction: str = "ASCENDING"):
+        return self._copy(_orders=self._orders + ((field_path, direction),))
+
+    def limit(self, count: int):
+        return self._copy(_limit=count)
+
+    def start_after(self, snapshot):
+        return self._copy(_after=snapshot)
+
+    def select(self, field_paths):
+        return self._copy(_field_paths=list(field_paths))
+
+    def stream(self, transaction=None):
+        prefix = self._path + "/"
+        with self._db._lock:
+            docs = [
+                (path, data) for path, data in self._db.docs.items()
+                if path.startswith(prefix) and "/" not in path[len(prefix):]
+            ]
+        for field_path, op_string, value in self._filters:
+            docs = [(path, data) for path, data in docs if self.OPERATORS[op_string](data.get(field_path), value)]
+        for field_path, direction in reversed(self._orders):
+            docs = [(path, data) for path, data in docs if field_path in data]
+            docs.sort(key=lambda item: item[1][field_path], reverse=direction == "DESCENDING")
+        if self._after is not None:
+            paths = [path for path, _ in docs]
+            after_path = self._after.reference.path
+            docs = docs[paths.index(after_path) + 1:] if after_path in paths else []
+        if self._limit is not None:
+            docs = docs[:self._limit]
+
+        self._db._round_trip("read", reads=len(docs))
+        for path, data in docs:
+            yield FakeSnapshot(FakeDocumentReference(self._db, path), data, self._field_paths)
+
+    def get(self, transaction=None):
+        return list(self.stream())
+
+class FakeCollectionReference(FakeQuery):
+    def __init__(self, db, path: str):
+        super().__init__(db, path)
+        self.id = path.rsplit("/", 1)[-1]
+
+    def document(self, document_id: str = None):
+        return FakeDocumentReference(self._db, f"{self._path}/{document_id or uuid.uuid4().hex[:20]}")
+
+class FakeWriteBatch:
+    MAX_WRITES = 500
+
+    def __init__(self, db):
+        self._db = db
+        self._writes = []
+
+    def set(self, reference, data: dict, merge: bool = False):
+        self._writes.append(("set", reference, data, merge))
+
+    def create(self, reference, data: dict):
+        self._writes.append(("create", reference, data, False))
+
+    def update(self, reference, data: dict):
+        self._writes.append(("update", reference, data, False))
+
+    def delete(self, reference):
+        self._writes.append(("delete", reference, None, False))
+
+    def commit(self):
+        if len(self._writes) > self.MAX_WRITES:
+            raise ValueError(f"Un commit admite como máximo {self.MAX_WRITES} escrituras")
+        self._db._round_trip("write", writes=len(self._writes), commits=1)
+        self._db._apply_writes(self._writes)
+        return []
+
+class FakeTransaction(FakeWriteBatch):
+    """
+    Transacción compatible con `firestore.transactional` (un intento, sin contención).
+    """
+
+    _max_attempts = 1
+    _read_only = False
+    _id = b"fake-transaction"
+
+    def _clean_up(self):
+        self._writes = []
+
+    def _begin(self, retry_id=None):
+        pass
+
+    def _commit(self):
+        return self.commit()
+
+    def _rollback(self):
+        self._writes = []
+
+class FakeFirestore:
+    """
+    Cliente de Firestore en memoria. Cada viaje de ida y vuelta (get, stream, get_all,
+    commit, escritura directa) espera la latencia configurada fuera del lock y se cuenta
+    en `counters` (round_trips, reads, writes, commits).
+    """
+
+    def __init__(self, latency: Latency = None):
+        self.latency = latency or Latency()
+        self.docs = {}
+        self._lock = threading.Lock()
+        self.counters = {"round_trips": 0, "reads": 0, "writes": 0, "commits": 0}
+
+    def _round_trip(self, kind: str, reads: int = 0, writes: int = 0, commits: int = 0) -> None:
+        delay = self.latency.read if kind == "read" else self.latency.write
+        if delay:
+            time.sleep(delay)
+        with self._lock:
+            self.counters["round_trips"] += 1
+            self.counters["reads"] += reads
+            self.counters["writes"] += writes
+            self.counters["commits"] += commits
+
+    def _snapshot(self, reference, field_paths=None):
+        with self._lock:
+            return FakeSnapshot(reference, self.docs.get(reference.path), field_paths)
+
+    def _apply_writes(self, writes: list) -> None:
+        with self._lock:
+            for op, reference, data, merge in writes:
+                if op == "create" and reference.path in self.docs:
+                    raise AlreadyExists(reference.path)
+                if op == "update" and reference.path not in self.docs:
+                    raise NotFound(reference.path)
+            for op, reference, data, merge in writes:
+                if op == "delete":
+                    self.docs.pop(reference.path, None)
+                elif op == "update":
+                    doc = self.docs[reference.path]
+                    for key, value in data.items():
+                        *parents, field = key.split(".")
+                        target = doc
+                        for parent in parents:
+                            target = target.setdefault(parent, {})
+                        _apply(target, field, value)
+                elif merge:
+                    _merge(self.docs.setdefault(reference.path, {}), data)
+                else:
+                    doc = {}
+                    _merge(doc, data)
+                    self.docs[reference.path] = doc
+
+    def reset_counters(self) -> None:
+        with self._lock:
+            for key in self.counters:
+                self.counters[key] = 0
+
+    def collection(self, name: str):
+        return FakeCollectionReference(self, name)
+
+    def get_all(self, references, field_paths=None, transaction=None):
+        references = list(references)
+        self._round_trip("read", reads=len(references))
+        for reference in references:
+            yield self._snapshot(reference, field_paths)
+
+    def batch(self):
+        return FakeWriteBatch(self)
+
+    def transaction(self, **kwargs):
+        return FakeTransaction(self)
+
+class _FakeUserRecord:
+    def __init__(self, uid: str, email: str = None, display_name: str = None):
+        self.uid = uid
+        self.email = email or f"{uid}@benchmark.local"
+        self.display_name = display_name or uid
+        self.disabled = False
+        self.tokens_valid_after_timestamp = None
+
+class FakeAuth:
+    """
+    Sustituto de `firebase_admin.auth`: el token es `<uid>` o `<uid>:<sufijo>` (tokens
+    distintos del mismo usuario). Las clases de excepción se toman del módulo real.
+    """
+
+    def __init__(self, latency: Latency = None, role: str = "user"):
+        self.latency = latency or Latency()
+        self.role = role
+        self.calls = 0
+        self._lock = threading.Lock()
+        self._issued = {}  # token -> iat
+        self._valid_after = {}  # uid -> milisegundos (revoke_refresh_tokens)
+
+    def _round_trip(self) -> None:
+        if self.latency.auth:
+            time.sleep(self.latency.auth)
+        with self._lock:
+            self.calls += 1
+
+    def __getattr__(self, name):
+        from firebase_admin import auth
+        return getattr(auth, name)
+
+    def verify_id_token(self, token: str, clock_skew_seconds: int = 0, **kwargs) -> dict:
+        # La verificación de la firma es local (claves públicas en caché): sin latencia de red
+        uid = token.split(":", 1)[0]
+        return {
+            "uid": uid,
+            "iat": self._issued.setdefault(token, max(time.time(), self._valid_after.get(uid, 0) / 1000)),
+            "exp": time.time() + 3600,
+            "role": self.role,
+            "email": f"{uid}@benchmark.local",
+            "name": uid,
+        }
+
+    def get_user(self, uid: str):
+        self._round_trip()
+        record = _FakeUserRecord(uid)
+        record.tokens_valid_after_timestamp = self._valid_after.get(uid)
+        return record
+
+    def revoke_refresh_tokens(self, uid: str) -> None:
+        self._round_trip()
+        # Los tokens emitidos hasta ahora quedan antes del límite y los siguientes, después
+        self._valid_after[uid] = int(time.time() * 1000) + 1
+
+    def create_user(self, email: str, password: str = None, display_name: str = None, **kwargs):
+        self._round_trip()
+        return _FakeUserRecord(email.split("@", 1)[0], email, display_name)
+
+    def set_custom_user_claims(self, uid: str, claims: dict) -> None:
+        self._round_trip()
+
+def install(latency: Latency = None):
+    """
+    Sustituye el cliente de Firestore y Firebase Auth de la aplicación por los dobles en
+    memoria (antes del primer uso, gracias a la inicialización diferida). Devuelve (db, auth).
+    """
+    from app.core import firebase
+
+    fake_db = FakeFirestore(latency)
+    fake_auth = FakeAuth(latency)
+    firebase._client = fake_db
+    firebase._auth = fake_auth
+    return fake_db, fake_auth
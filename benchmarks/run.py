@@ -0,0 +1,280 @@
+# benchmarks/run.py
+# Benchmarks de los servicios sobre Firestore/Auth en memoria con latencia simulada.
+#
+#   python -m benchmarks.run --output benchmark-results.json
+#   python -m benchmarks.run --quick --baseline benchmark-results.json
+import argparse
+import asyncio
+import itertools
+import json
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+import numpy as np
+
+from benchmarks.fakes import Latency, install
+
+SCENARIOS = ("save_series", "verify_token", "get_history", "get_saved_results")
+
+# Matriz de tamaños por escenario: completa y reducida (--quick)
+GRID = {
+    "save_series": {"points": [100, 1000, 10000], "users": [10, 1000]},
+    "verify_token": {"cache": ["warm", "cold"]},
+    "get_history": {"history": [10, 100, 500], "points": [100, 1000]},
+    "get_saved_results": {"saved": [10, 100], "points": [100, 1000]},
+}
+QUICK_GRID = {
+    "save_series": {"points": [100, 1000], "users": [10]},
+    "verify_token": {"cache": ["warm", "cold"]},
+    "get_history": {"history": [10, 50], "points": [100]},
+    "get_saved_results": {"saved": [10], "points": [100]},
+}
+
+UID = "bench-user"
+
+def _series_request(points: int, seed: int):
+    """
+    Serie de Taylor calculada en el servidor (distinta por `seed`, para no deduplicarse).
+    """
+    from app.schemas.series_schema import SeriesComputeRequest, SeriesRequest
+    from app.services.taylor_service import TaylorService
+
+    computed = TaylorService.compute_series(SeriesComputeRequest(
+        type="sine", start=0.0, end=3.0 + seed * 1e-3, points=points, terms=7
+    ))
+    data = {key: list(values) if key == "labels" else values.tolist() for key, values in computed["data"].items()}
+    return SeriesRequest(type=computed["type"], points=computed["points"], data=data)
+
+class Fixture:
+    """
+    Datos iniciales de un escenario, escritos sin latencia sobre un Firestore limpio.
+    """
+
+    def __init__(self, db):
+        self.db = db
+
+    def seed(self, users: int = 0, history: int = 0, saved: int = 0, points: int = 100) -> list:
+        from app.services.results_service import ResultsService
+        from app.services.series_service import SeriesService
+
+        latency, self.db.latency = self.db.latency, Latency()
+        try:
+            self.db.docs.clear()
+            self.db.collection("users").document(UID).set({"id": UID, "role": "user", "avg_error": 0.0})
+            for i in range(users):
+                self.db.collection("users").document(f"user-{i}").set({
+                    "id": f"user-{i}",
+                    "avg_error": 1e-3 * (i + 1),
+                    "total_series_generated": 1
+                })
+            series_ids = [
+                SeriesService.save_series(UID, _series_request(points, i)).id
+                for i in range(max(history, saved))
+            ]
+            for series_id in series_ids[:saved]:
+                ResultsService.save_results(UID, series_id)
+            return series_ids
+        finally:
+            self.db.latency = latency
+
+def _operations(scenario: str, params: dict, fixture: Fixture):
+    """
+    Prepara los datos del escenario y devuelve la operación async `op(i)` a medir.
+    """
+    from app.core.concurrency import run_blocking
+    from app.services.auth_service import AuthService
+    from app.services.results_service import ResultsService
+    from app.services.series_service import SeriesService
+
+    if scenario == "save_series":
+        fixture.seed(users=params["users"])
+        requests = [_series_request(params["points"], i) for i in range(8)]
+        return lambda i: run_blocking(SeriesService.save_series, UID, requests[i % len(requests)])
+
+    if scenario == "verify_token":
+        fixture.seed()
+        if params["cache"] == "warm":
+            return lambda i: AuthService.verify_token(UID)
+        # Un token nuevo en cada llamada: siempre se verifica contra Auth y Firestore
+        tokens = itertools.count()
+        run_id = time.monotonic_ns()
+        return lambda i: AuthService.verify_token(f"{UID}:{run_id}:{next(tokens)}")
+
+    if scenario == "get_history":
+        fixture.seed(history=params["history"], points=params["points"])
+        return lambda i: run_blocking(ResultsService.get_history, UID)
+
+    if scenario == "get_saved_results":
+        fixture.seed(saved=params["saved"], points=params["points"])
+        return lambda i: run_blocking(ResultsService.get_saved_results, UID)
+
+    raise ValueError(f"Escenario desconocido: {scenario}")
+
+async def _measure(op, ops: int, concurrency: int):
+    """
+    Ejecuta `ops` operaciones con `concurrency` clientes simultáneos.
+    Devuelve (latencias en segundos, tiempo total).
+    """
+    latencies = []
+    counter = itertools.count()
+
+    async def client():
+        while (i := next(counter)) < ops:
+            start = time.perf_counter()
+            await op(i)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies, time.perf_counter() - start
+
+def _summary(latencies: list, wall: float) -> dict:
+    ms = np.array(latencies) * 1000
+    return {
+        "throughput_ops_s": round(len(latencies) / wall, 2),
+        "latency_ms": {
+            "p50": round(float(np.percentile(ms, 50)), 3),
+            "p90": round(float(np.percentile(ms, 90)), 3),
+            "p99": round(float(np.percentile(ms, 99)), 3),
+            "mean": round(float(ms.mean()), 3),
+            "max": round(float(ms.max()), 3),
+        },
+    }
+
+async def run(scenarios, grid: dict, concurrency_levels: list, ops: int, db, auth) -> list:
+    fixture = Fixture(db)
+    results = []
+    for scenario in scenarios:
+        keys = list(grid[scenario])
+        for values in itertools.product(*(grid[scenario][key] for key in keys)):
+            params = dict(zip(keys, values))
+            op = _operations(scenario, params, fixture)
+            await op(0)  # calentamiento (cachés de módulo, compilación de NumPy, etc.)
+
+            for concurrency in concurrency_levels:
+                db.reset_counters()
+                auth.calls = 0
+                latencies, wall = await _measure(op, ops, concurrency)
+                result = {
+                    "benchmark": scenario,
+                    "params": params,
+                    "concurrency": concurrency,
+                    "ops": ops,
+                    **_summary(latencies, wall),
+                    "per_op": {
+                        **{key: round(value / ops, 2) for key, value in db.counters.items()},
+                        "auth_calls": round(auth.calls / ops, 2),
+                    },
+                }
+                results.append(result)
+                print(
+                    f"{scenario:<18} {json.dumps(params):<32} c={concurrency:<3} "
+                    f"{result['throughput_ops_s']:>9.1f} ops/s  "
+                    f"p50={result['latency_ms']['p50']:>8.2f} ms  p99={result['latency_ms']['p99']:>8.2f} ms"
+                )
+    return results
+
+def _result_key(result: dict) -> str:
+    return json.dumps([result["benchmark"], result["params"], result["concurrency"]], sort_keys=True)
+
+def compare(results: list, baseline: dict, max_regression: float) -> list:
+    """
+    Compara con un JSON anterior: devuelve las mediciones cuyo p50 o p99 empeora (o cuyo
+    throughput cae) más que el factor `max_regression`.
+    """
+    previous = {_result_key(r): r for r in baseline.get("results", [])}
+    regressions = []
+    for result in results:
+        before = previous.get(_result_key(result))
+        if before is None:
+            continue
+        checks = {
+            "p50": (result["latency_ms"]["p50"], before["latency_ms"]["p50"]),
+            "p99": (result["latency_ms"]["p99"], before["latency_ms"]["p99"]),
+            "throughput": (before["throughput_ops_s"], result["throughput_ops_s"]),
+        }
+        for metric, (current, reference) in checks.items():
+            if reference > 0 and current / reference > max_regression:
+                regressions.append({
+                    "benchmark": result["benchmark"],
+                    "params": result["params"],
+                    "concurrency": result["concurrency"],
+                    "metric": metric,
+                    "ratio": round(current / reference, 2),
+                })
+    return regressions
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks de los servicios con Firestore/Auth en memoria")
+    parser.add_argument("--output", default="benchmark-results.json", help="archivo JSON de resultados")
+    parser.add_argument("--only", default=",".join(SCENARIOS), help="escenarios separados por comas")
+    parser.add_argument("--concurrency", default="1,8,32", help="niveles de concurrencia separados por comas")
+    parser.add_argument("--ops", type=int, default=50, help="operaciones por medición")
+    parser.add_argument("--quick", action="store_true", help="matriz de tamaños reducida")
+    parser.add_argument("--read-latency-ms", type=float, default=5.0)
+    parser.add_argument("--write-latency-ms", type=float, default=10.0)
+    parser.add_argument("--auth-latency-ms", type=float, default=20.0)
+    parser.add_argument("--publish-interval", type=float, default=0.0,
+                        help="DASHBOARD_PUBLISH_INTERVAL durante la medición (0 = publicar en cada guardado)")
+    parser.add_argument("--baseline", help="JSON anterior con el que comparar")
+    parser.add_argument("--max-regression", type=float, default=1.25,
+                        help="factor máximo de empeoramiento permitido frente a --baseline")
+    args = parser.parse_args()
+
+    latency = Latency(args.read_latency_ms / 1000, args.write_latency_ms / 1000, args.auth_latency_ms / 1000)
+    db, auth = install(latency)
+
+    from app.core.config import settings
+    settings.DASHBOARD_PUBLISH_INTERVAL = args.publish_interval
+
+    scenarios = [name.strip() for name in args.only.split(",") if name.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"escenarios desconocidos: {', '.join(sorted(unknown))}")
+    concurrency_levels = [int(level) for level in args.concurrency.split(",")]
+    grid = QUICK_GRID if args.quick else GRID
+
+    results = asyncio.run(run(scenarios, grid, concurrency_levels, args.ops, db, auth))
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "latency_ms": {
+                "read": args.read_latency_ms,
+                "write": args.write_latency_ms,
+                "auth": args.auth_latency_ms,
+            },
+            "publish_interval": args.publish_interval,
+            "quick": args.quick,
+        },
+        "results": results,
+    }
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            report["regressions"] = compare(results, json.load(f), args.max_regression)
+        for regression in report["regressions"]:
+            print(f"⚠️ Regresión: {json.dumps(regression)}")
+        status = 1 if report["regressions"] else 0
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"🔹 Resultados guardados en {args.output}")
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
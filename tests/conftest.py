@@ -0,0 +1,85 @@
+# tests/conftest.py
+import threading
+import pytest
+
+@pytest.fixture
+def firebase_fakes():
+    """
+    Firestore y Firebase Auth en memoria (`benchmarks.fakes`) durante la prueba; al terminar
+    se restauran los clientes que hubiera antes.
+    """
+    from app.core import firebase
+    from benchmarks.fakes import install
+
+    previous = firebase._client, firebase._auth
+    yield install()
+    firebase._client, firebase._auth = previous
+
+class SlowRead:
+    """
+    Lectura que devuelve el valor actual de `store`; la primera llamada se queda esperando
+    (después de leer) hasta `release`, para intercalar una escritura mientras está en curso.
+    """
+
+    def __init__(self, store: dict):
+        self.store = store
+        self.calls = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self):
+        self.calls += 1
+        value = self.store["value"]
+        if self.calls == 1:
+            self.started.set()
+            self.release.wait(5)
+        return value
+
+@pytest.fixture
+def slow_read():
+    """
+    (store, read): `read` devuelve `store["value"]` ("old" al empezar) y su primera llamada
+    espera a `read.release` tras leer.
+    """
+    store = {"value": "old"}
+    read = SlowRead(store)
+    yield store, read
+    read.release.set()
+
+@pytest.fixture
+def memory_cache():
+    from app.core.cache import MemoryCacheBackend, ReadCache
+    return ReadCache(MemoryCacheBackend(max_bytes=1024 * 1024, ttl=60))
+
+@pytest.fixture(scope="session")
+def shared_cache_server():
+    """
+    Servidor de `python -m app.core.cache` en un proceso local. Devuelve (address, authkey).
+    """
+    import multiprocessing
+    import socket
+    import time
+    from app.core.cache import SharedCacheBackend, serve_shared_cache
+
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        address = f"127.0.0.1:{probe.getsockname()[1]}"
+    authkey = "test-" + str(time.time())
+
+    process = multiprocessing.get_context("spawn").Process(target=serve_shared_cache, args=(address, authkey), daemon=True)
+    process.start()
+    try:
+        backend = SharedCacheBackend(address, authkey)
+        deadline = time.monotonic() + 20
+        while True:
+            try:
+                backend._remote()
+                break
+            except OSError:
+                if time.monotonic() > deadline or not process.is_alive():
+                    raise
+                time.sleep(0.05)
+        yield address, authkey
+    finally:
+        process.terminate()
+        process.join(5)
@@ -0,0 +1,44 @@
+# tests/test_auth_service.py
+import asyncio
+import pytest
+from cachetools import TLRUCache
+from fastapi import HTTPException
+from app.services import auth_service
+from app.services.auth_service import AuthService
+
+@pytest.fixture
+def fake_auth(firebase_fakes, monkeypatch):
+    db, auth = firebase_fakes
+    monkeypatch.setattr(auth_service, "_token_cache", TLRUCache(maxsize=16, ttu=lambda _t, value, _n: value[1]))
+    for uid in ("u1", "u2"):
+        db.collection("users").document(uid).set({"id": uid, "role": "user"})
+    return auth
+
+def verify(token: str, strict: bool = True):
+    return asyncio.run(AuthService.verify_token(token, strict=strict))
+
+def test_verified_tokens_are_cached(fake_auth):
+    verify("u1")
+    calls = fake_auth.calls
+    assert verify("u1").id == "u1"
+    assert fake_auth.calls == calls
+
+def test_invalidate_token_forces_verification(fake_auth):
+    verify("u1")
+    calls = fake_auth.calls
+    AuthService.invalidate_token("u1")
+    verify("u1")
+    assert fake_auth.calls > calls
+
+def test_revoked_sessions_are_rejected(fake_auth):
+    verify("u1:a")
+    verify("u1:b")
+    verify("u2")
+    AuthService.revoke_sessions("u1")
+
+    for token in ("u1:a", "u1:b"):
+        with pytest.raises(HTTPException) as error:
+            verify(token)
+        assert error.value.status_code == 401
+    assert verify("u2").id == "u2"
+    assert verify("u1:new").id == "u1"   # token emitido después de la revocación
@@ -0,0 +1,138 @@
+# tests/test_cache.py
+import asyncio
+import time
+import numpy as np
+import pytest
+from app.core.cache import MemoryCacheBackend, ReadCache, SharedCacheBackend, payload_size
+
+async def interleave(cache: ReadCache, store: dict, read):
+    """
+    Lectura en curso -> escritura + invalidación -> fin de la lectura. Devuelve lo que
+    obtuvo la lectura que empezó antes de la escritura.
+    """
+    pending = asyncio.create_task(cache.read_through("u1", "history", {}, read))
+    await asyncio.to_thread(read.started.wait, 5)
+    store["value"] = "new"
+    cache.invalidate("u1", "history")
+    read.release.set()
+    return await pending
+
+def test_read_started_before_write_is_not_served_afterwards(memory_cache, slow_read):
+    store, read = slow_read
+
+    async def scenario():
+        in_flight = await interleave(memory_cache, store, read)
+        after = [await memory_cache.read_through("u1", "history", {}, read) for _ in range(2)]
+        return in_flight, after
+
+    in_flight, after = asyncio.run(scenario())
+    assert in_flight == "old"
+    assert after == ["new", "new"]
+    assert read.calls == 2  # la segunda lectura posterior ya sale de la caché
+
+def counter():
+    calls = []
+
+    def read():
+        calls.append(1)
+        return len(calls)
+
+    return read
+
+def test_invalidate_changes_version_and_drops_entries(memory_cache):
+    read = counter()
+
+    async def scenario():
+        first = await memory_cache.read_through("u1", "saved", {"fields": None}, read)
+        cached = await memory_cache.read_through("u1", "saved", {"fields": None}, read)
+        version = memory_cache.version("u1", "saved")
+        memory_cache.invalidate("u1", "saved")
+        assert memory_cache.version("u1", "saved") != version
+        return first, cached, await memory_cache.read_through("u1", "saved", {"fields": None}, read)
+
+    assert asyncio.run(scenario()) == (1, 1, 2)
+
+def test_invalidate_only_touches_the_given_endpoints(memory_cache):
+    history, saved = counter(), counter()
+
+    async def scenario():
+        await memory_cache.read_through("u1", "history", {}, history)
+        await memory_cache.read_through("u1", "saved", {}, saved)
+        await memory_cache.read_through("u2", "history", {}, history)
+        versions = memory_cache.version("u1", "saved"), memory_cache.version("u2", "history")
+        etag = memory_cache.etag("u1", "saved", {})
+
+        memory_cache.invalidate("u1", "history")
+
+        assert (memory_cache.version("u1", "saved"), memory_cache.version("u2", "history")) == versions
+        assert memory_cache.etag("u1", "saved", {}) == etag
+        await memory_cache.read_through("u1", "saved", {}, saved)
+        await memory_cache.read_through("u2", "history", {}, history)
+        await memory_cache.read_through("u1", "history", {}, history)
+
+    asyncio.run(scenario())
+    assert saved() == 2      # "saved" de u1 se sirvió desde la caché
+    assert history() == 4    # solo "history" de u1 se volvió a leer
+
+def test_invalidate_drops_the_old_entries(memory_cache):
+    asyncio.run(memory_cache.read_through("u1", "history", {}, counter()))
+    memory_cache.invalidate("u1", "history")
+    assert memory_cache.backend.delete_prefix("u1|history|") == 0
+
+def test_disabled_cache_always_reads():
+    cache = ReadCache(None)
+    assert asyncio.run(cache.read_through("u1", "history", {}, lambda: "value")) == "value"
+    assert cache.etag("u1", "history", {}) is None
+
+def test_payload_size_counts_array_bytes():
+    values = np.zeros(100_000)
+    assert payload_size({"data": {"generated": values}}) >= values.nbytes
+    assert payload_size([{"generated": list(range(1000))}]) >= 8 * 1000
+
+def test_memory_backend_is_bounded_by_bytes():
+    backend = MemoryCacheBackend(max_bytes=1024 * 1024, ttl=60)
+    for i in range(10):
+        backend.set(f"k{i}", np.zeros(20_000))   # 160 KB cada una
+    stored = [i for i in range(10) if backend.get(f"k{i}") is not None]
+    assert stored == [4, 5, 6, 7, 8, 9]          # se descartan primero las menos usadas
+
+    backend.set("big", np.zeros(200_000))         # mayor que el límite: no se guarda
+    assert backend.get("big") is None
+    assert backend.get("k9") is not None
+
+def test_shared_backend_requires_authkey():
+    with pytest.raises(RuntimeError):
+        SharedCacheBackend("127.0.0.1:50000", "")
+
+def test_shared_backend_against_local_server(shared_cache_server):
+    address, authkey = shared_cache_server
+    cache = ReadCache(SharedCacheBackend(address, authkey))
+    other_worker = ReadCache(SharedCacheBackend(address, authkey))
+    read = counter()
+
+    async def scenario():
+        first = await cache.read_through("u1", "history", {}, read)
+        cached = await other_worker.read_through("u1", "history", {}, read)
+        assert cache.etag("u1", "history", {}) == other_worker.etag("u1", "history", {})
+        other_worker.invalidate("u1", "history")
+        return first, cached, await cache.read_through("u1", "history", {}, read)
+
+    first, cached, after = asyncio.run(scenario())
+    assert (first, cached, after) == (1, 1, 2)
+
+def test_shared_backend_fails_open_without_server():
+    cache = ReadCache(SharedCacheBackend("127.0.0.1:9", "secret"))
+    assert asyncio.run(cache.read_through("u1", "history", {}, lambda: "value")) == "value"
+
+def test_versions_survive_ttl_and_eviction():
+    cache = ReadCache(MemoryCacheBackend(max_bytes=64 * 1024, ttl=0.05))
+    version, etag = cache.version("u1", "history"), cache.etag("u1", "history", {})
+
+    for i in range(100):   # expulsa todas las entradas por tamaño
+        cache.backend.set(f"u{i}|history|x|{{}}", np.zeros(1000))
+    time.sleep(0.1)        # y las que quedaran caducan
+
+    assert cache.version("u1", "history") == version
+    assert cache.etag("u1", "history", {}) == etag
+    cache.invalidate("u1", "history")
+    assert cache.etag("u1", "history", {}) != etag
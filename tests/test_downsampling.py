@@ -0,0 +1,55 @@
+# tests/test_downsampling.py
+import numpy as np
+import pytest
+from app.core.downsampling import MIN_POINTS, downsample_series_data, lttb_indices
+from app.core.series_codec import encode_series_data
+
+def curve(n: int) -> np.ndarray:
+    return np.sin(np.linspace(0.0, 6.0, n))
+
+@pytest.mark.parametrize("n, max_points", [(10, 4), (100, 10), (1000, 37), (1001, 1000), (5000, 500)])
+def test_indices_keep_endpoints_are_unique_sorted_and_sized(n, max_points):
+    rng = np.random.default_rng(n)
+    idx = lttb_indices([rng.normal(size=n), curve(n)], max_points)
+    assert len(idx) == max_points
+    assert idx[0] == 0 and idx[-1] == n - 1
+    assert np.all(np.diff(idx) > 0)
+
+def test_spike_survives():
+    y = curve(1000)
+    y[537] = 50.0
+    assert 537 in lttb_indices([y], 20)
+
+def test_spike_in_any_curve_survives():
+    n = 1000
+    error = np.zeros(n)
+    error[123] = 1e-3
+    assert 123 in lttb_indices([curve(n), curve(n), error], 20)
+
+def test_short_series_are_returned_unchanged():
+    np.testing.assert_array_equal(lttb_indices([curve(50)], 50), np.arange(50))
+    np.testing.assert_array_equal(lttb_indices([curve(50)], 80), np.arange(50))
+    assert len(lttb_indices([curve(50)], 1)) == MIN_POINTS
+
+def test_non_finite_values_do_not_break_selection():
+    y = np.tan(np.linspace(-3.0, 3.0, 500))
+    y[100] = np.nan
+    y[200] = np.inf
+    idx = lttb_indices([y], 50)
+    assert len(idx) == 50 and np.all(np.diff(idx) > 0)
+
+@pytest.mark.parametrize("encoding", ["array", "float64", "float32"])
+def test_downsample_series_data_keeps_fields_aligned(encoding):
+    n = 2000
+    x = np.linspace(0.0, 1.0, n)
+    data = {"labels": [f"{value:.4f}" for value in x], "generated": np.sin(x), "ideal": np.sin(x), "error": np.zeros(n)}
+    reduced = downsample_series_data(encode_series_data(data, encoding), 100)
+
+    assert all(len(reduced[field]) == 100 for field in ("labels", "generated", "ideal", "error"))
+    positions = [data["labels"].index(label) for label in reduced["labels"]]
+    np.testing.assert_allclose(reduced["generated"], np.sin(x)[positions], rtol=1e-6)
+
+def test_downsample_series_data_leaves_short_series_unchanged():
+    data = {"labels": ["a", "b", "c", "d"], "generated": [1.0, 2.0, 3.0, 4.0], "ideal": [1.0, 2.0, 3.0, 4.0], "error": []}
+    reduced = downsample_series_data(data, 10)
+    assert reduced == {"labels": ["a", "b", "c", "d"], "generated": [1.0, 2.0, 3.0, 4.0], "ideal": [1.0, 2.0, 3.0, 4.0], "error": []}
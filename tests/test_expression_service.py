@@ -0,0 +1,74 @@
+# tests/test_expression_service.py
+import numpy as np
+import pytest
+from fastapi import HTTPException
+from app.services.expression_service import ExpressionService
+
+def evaluate_at(expression: str, x: float) -> float:
+    return float(ExpressionService.evaluate(expression, np.array([x]))[0])
+
+@pytest.mark.parametrize("expression, expected", [
+    ("x^2+1", 5.0),        # ^ liga más que +
+    ("2*x^2", 8.0),        # ^ liga más que *
+    ("-x^2", -4.0),        # el menos unario se aplica después de la potencia
+    ("x^2^3", 256.0),      # asociatividad por la derecha: x^(2^3)
+    ("(x+1)^2", 9.0),
+    ("x ^ 2", 4.0),
+    ("x**2 + x^2", 8.0),
+    ("2^-1", 0.5),
+])
+def test_caret_is_power_with_python_precedence(expression, expected):
+    assert evaluate_at(expression, 2.0) == pytest.approx(expected)
+
+def test_functions_and_constants():
+    assert evaluate_at("sin(pi/2) + log(e)", 0.0) == pytest.approx(2.0)
+    assert evaluate_at("sqrt(x)^2", 3.0) == pytest.approx(3.0)
+
+def test_evaluates_whole_array_at_once():
+    x = np.linspace(-1.0, 1.0, 5)
+    np.testing.assert_allclose(ExpressionService.evaluate("x^3 - x", x), x ** 3 - x)
+
+@pytest.mark.parametrize("expression", [
+    "x & 1",                       # BinOp no permitido
+    "x | 1",
+    "x << 1",
+    "x // 2",
+    "~x",                          # UnaryOp no permitido
+    "not x",
+    "x > 1",                       # Compare
+    "x if x else 1",               # IfExp
+    "x.real",                      # Attribute
+    "[x]",                         # List
+    "x[0]",                        # Subscript
+    "lambda: x",                   # Lambda
+    "'a'",                         # constante no numérica
+    "True",
+    "y",                           # nombre desconocido
+    "__import__('os')",
+    "sin(x, 1)",                   # funciones de un solo argumento
+    "sin(x=1)",
+    "(lambda: 1)()",
+    "x ^",                         # errores de sintaxis
+    "(x+1",
+    "",
+    "x" * (ExpressionService.MAX_EXPRESSION_LENGTH + 1),
+    "9" * 400,                     # entero que no cabe en un float
+    "x + " + "1" * 450,
+])
+def test_rejects_disallowed_constructs(expression):
+    with pytest.raises(HTTPException) as error:
+        ExpressionService.compile(expression)
+    assert error.value.status_code == 400
+
+def test_save_function_rejects_invalid_expressions(firebase_fakes):
+    from app.services.function_service import FunctionsService
+    db, _ = firebase_fakes
+
+    with pytest.raises(HTTPException) as error:
+        FunctionsService.save_function("u1", "mala", "x & 1")
+    assert error.value.status_code == 400
+    assert error.value.detail.startswith("Expresión inválida")
+    assert list(db.collection("custom_functions").stream()) == []
+
+    saved = FunctionsService.save_function("u1", "buena", "x^2")
+    assert db.collection("custom_functions").document(saved["id"]).get().exists
@@ -0,0 +1,101 @@
+# tests/test_rate_limit.py
+import asyncio
+import pytest
+from fastapi import HTTPException
+from app.core.rate_limit import AdmissionController, MemoryRateLimitBackend
+
+def controller(rate: float = 1.0, burst: float = 3.0, max_concurrency: int = 0) -> AdmissionController:
+    return AdmissionController(MemoryRateLimitBackend(), {"read": (rate, burst), "write": (rate, burst)}, max_concurrency)
+
+def admit(admission: AdmissionController, uid: str = "u1", kind: str = "read", cost: float = 1):
+    async def scenario():
+        async with admission.admit(uid, kind, cost):
+            pass
+    asyncio.run(scenario())
+
+def test_empty_bucket_returns_429_with_retry_after():
+    admission = controller(rate=0.5, burst=2)
+    admit(admission)
+    admit(admission)
+    with pytest.raises(HTTPException) as error:
+        admit(admission)
+    assert error.value.status_code == 429
+    assert error.value.headers["Retry-After"] == "2"   # 1 token a 0.5 tokens/s
+    assert admission._in_flight == 0
+
+def test_buckets_are_per_user_and_kind():
+    admission = controller(burst=1)
+    admit(admission, "u1", "read")
+    admit(admission, "u2", "read")
+    admit(admission, "u1", "write")
+    with pytest.raises(HTTPException):
+        admit(admission, "u1", "read")
+
+def test_bucket_refills_over_time(monkeypatch):
+    from app.core import rate_limit
+    now = [1000.0]
+    monkeypatch.setattr(rate_limit.time, "monotonic", lambda: now[0])
+    admission = controller(rate=2, burst=1)
+    admit(admission)
+    with pytest.raises(HTTPException):
+        admit(admission)
+    now[0] += 0.5
+    admit(admission)
+
+def test_concurrency_cap_returns_503():
+    admission = controller(burst=10, max_concurrency=2)
+
+    async def scenario():
+        await admission.acquire("u1", "read")
+        await admission.acquire("u2", "read")
+        with pytest.raises(HTTPException) as error:
+            await admission.acquire("u3", "read")
+        assert error.value.status_code == 503 and error.value.headers["Retry-After"] == "1"
+        admission.release()
+        await admission.acquire("u3", "read")   # queda una plaza libre
+
+    asyncio.run(scenario())
+    assert admission._in_flight == 2
+
+def test_batch_cost_is_capped_at_burst():
+    admission = controller(rate=1, burst=5)
+    admit(admission, cost=500)               # un lote grande cabe con el bucket lleno...
+    with pytest.raises(HTTPException) as error:
+        admit(admission, cost=1)             # ...pero lo vacía
+    assert error.value.status_code == 429
+
+def test_disabled_backend_admits_everything():
+    admission = AdmissionController(None, {}, max_concurrency=1)
+    for _ in range(5):
+        admit(admission, cost=1000)
+    assert admission._in_flight == 0
+
+@pytest.mark.parametrize("spec_version", ["2.0", "2.4"])
+def test_streaming_slot_is_released_when_client_leaves_before_the_body(spec_version):
+    from starlette.requests import ClientDisconnect
+    from app.core.responses import ClosingStreamingResponse
+
+    admission = controller()
+    started = []
+
+    async def lines():
+        started.append(True)
+        yield b"{}\n"
+
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        raise OSError("conexión cerrada por el cliente")
+
+    async def scenario():
+        await admission.acquire("u1", "read")
+        response = ClosingStreamingResponse(lines(), admission.release, media_type="application/x-ndjson")
+        try:
+            await response({"type": "http", "asgi": {"spec_version": spec_version}}, receive, send)
+        except (OSError, ClientDisconnect):
+            pass
+
+    asyncio.run(scenario())
+    assert not started                # el generador no llegó a arrancar...
+    assert admission._in_flight == 0  # ...y aun así se liberó la plaza
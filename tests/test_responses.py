@@ -0,0 +1,123 @@
+# tests/test_responses.py
+import asyncio
+import threading
+import orjson
+import pytest
+from app.core import responses
+from app.core.cache import MemoryCacheBackend, ReadCache, SharedCacheBackend
+from app.core.responses import conditional_json, etag_matches
+
+@pytest.fixture
+def cache(memory_cache, monkeypatch):
+    monkeypatch.setattr(responses, "read_cache", memory_cache)
+    return memory_cache
+
+def test_etag_matches_weak_lists_and_wildcard():
+    assert etag_matches('W/"v1-a"', 'W/"v1-a"')
+    assert etag_matches('"v0-a", W/"v1-a"', 'W/"v1-a"')
+    assert etag_matches("*", 'W/"v1-a"')
+    assert not etag_matches('W/"v0-a"', 'W/"v1-a"')
+    assert not etag_matches(None, 'W/"v1-a"')
+
+def test_not_modified_skips_the_query(cache):
+    calls = []
+
+    def read():
+        calls.append(1)
+        return {"items": [1, 2, 3]}
+
+    async def scenario():
+        first = await conditional_json(None, "u1", "history", {}, read)
+        second = await conditional_json(first.headers["etag"], "u1", "history", {}, read)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first.status_code == 200 and orjson.loads(first.body) == {"items": [1, 2, 3]}
+    assert second.status_code == 304 and second.headers["etag"] == first.headers["etag"]
+    assert len(calls) == 1
+
+def test_read_interleaved_with_write_never_gets_304_on_stale_data(cache, slow_read):
+    store, read = slow_read
+
+    async def scenario():
+        # Lectura en curso (ya leyó "old") -> escritura e invalidación -> fin de la lectura
+        pending = asyncio.create_task(conditional_json(None, "u1", "history", {}, read))
+        await asyncio.to_thread(read.started.wait, 5)
+        store["value"] = "new"
+        cache.invalidate("u1", "history")
+        read.release.set()
+        in_flight = await pending
+
+        # El cliente revalida con el ETag que recibió junto a los datos antiguos
+        revalidated = await conditional_json(in_flight.headers["etag"], "u1", "history", {}, read)
+        fresh = await conditional_json(None, "u1", "history", {}, read)
+        return in_flight, revalidated, fresh
+
+    in_flight, revalidated, fresh = asyncio.run(scenario())
+    assert orjson.loads(in_flight.body) == "old"
+    assert revalidated.status_code == 200
+    assert orjson.loads(revalidated.body) == "new"
+    assert revalidated.headers["etag"] != in_flight.headers["etag"]
+    assert orjson.loads(fresh.body) == "new"
+    assert fresh.headers["etag"] == revalidated.headers["etag"]
+
+class RecordingBackend:
+    """
+    Backend remoto simulado: delega en memoria y anota el hilo de cada llamada.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.threads = set()
+
+    def __getattr__(self, name):
+        method = getattr(self.backend, name)
+
+        def call(*args):
+            self.threads.add(threading.get_ident())
+            return method(*args)
+
+        return call
+
+def test_remote_backend_is_not_called_on_the_event_loop(memory_cache, monkeypatch):
+    backend = RecordingBackend(memory_cache.backend)
+    monkeypatch.setattr(responses, "read_cache", ReadCache(backend))
+
+    async def scenario():
+        loop_thread = threading.get_ident()
+        first = await conditional_json(None, "u1", "history", {}, lambda: [1, 2])
+        second = await conditional_json(first.headers["etag"], "u1", "history", {}, lambda: [1, 2])
+        return loop_thread, first, second
+
+    loop_thread, first, second = asyncio.run(scenario())
+    assert second.status_code == 304
+    assert backend.threads and loop_thread not in backend.threads
+
+def test_conditional_json_with_shared_backend(shared_cache_server, monkeypatch):
+    monkeypatch.setattr(responses, "read_cache", ReadCache(SharedCacheBackend(*shared_cache_server)))
+
+    async def scenario():
+        first = await conditional_json(None, "u2", "saved", {}, lambda: {"items": [1]})
+        second = await conditional_json(first.headers["etag"], "u2", "saved", {}, lambda: {"items": [1]})
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert orjson.loads(first.body) == {"items": [1]}
+    assert second.status_code == 304
+
+def test_not_modified_after_the_cached_body_expires(monkeypatch):
+    cache = ReadCache(MemoryCacheBackend(max_bytes=1024 * 1024, ttl=0.05))
+    monkeypatch.setattr(responses, "read_cache", cache)
+    calls = []
+
+    def read():
+        calls.append(1)
+        return {"items": [1]}
+
+    async def scenario():
+        first = await conditional_json(None, "u1", "saved", {}, read)
+        await asyncio.sleep(0.1)   # la entrada caduca, la versión no
+        return first, await conditional_json(first.headers["etag"], "u1", "saved", {}, read)
+
+    first, second = asyncio.run(scenario())
+    assert second.status_code == 304 and len(calls) == 1
@@ -0,0 +1,123 @@
+# tests/test_series_body.py
+import asyncio
+import json
+import msgpack
+import numpy as np
+import pytest
+from fastapi import HTTPException
+from fastapi.exceptions import RequestValidationError
+from app.core import series_body
+from app.core.series_body import PACKED_MEDIA_TYPE, pack_series, parse_series_body, read_series_body
+
+def series(points: int = 4) -> dict:
+    x = np.linspace(0.0, 1.0, points)
+    return {
+        "type": "sine",
+        "points": points,
+        "data": {
+            "labels": [f"{value:.2f}" for value in x],
+            "generated": np.sin(x) + 0.01,
+            "ideal": np.sin(x),
+            "error": np.full(points, 0.01),
+        }
+    }
+
+def as_msgpack(content: dict, binary: bool = True) -> bytes:
+    data = {
+        key: (value.astype("<f8").tobytes() if binary else value.tolist()) if isinstance(value, np.ndarray) else value
+        for key, value in content["data"].items()
+    }
+    return msgpack.packb({**content, "data": data}, use_bin_type=True)
+
+def assert_same_series(parsed, expected: dict):
+    assert parsed.type == expected["type"] and parsed.points == expected["points"]
+    assert parsed.data.labels == expected["data"]["labels"]
+    for field in ("generated", "ideal", "error"):
+        np.testing.assert_array_equal(getattr(parsed.data, field), expected["data"][field])
+
+@pytest.mark.parametrize("binary", [True, False])
+def test_msgpack_body(binary):
+    expected = series()
+    assert_same_series(parse_series_body("application/msgpack", as_msgpack(expected, binary)), expected)
+
+def test_packed_body_round_trip():
+    expected = series(1000)
+    parsed = parse_series_body(PACKED_MEDIA_TYPE, pack_series(expected))
+    assert_same_series(parsed, expected)
+    assert isinstance(parsed.data.generated, np.ndarray)
+
+def test_compact_labels_are_expanded():
+    expected = series(5)
+    content = {**expected, "data": {**expected["data"], "labels": {"start": 0.0, "step": 0.25, "count": 5, "decimals": 2}}}
+    parsed = parse_series_body("application/msgpack", as_msgpack(content))
+    assert parsed.data.labels == ["0.00", "0.25", "0.50", "0.75", "1.00"]
+
+def test_json_body_uses_pydantic_validation():
+    content = {**series(), "data": {**series()["data"], "generated": ["a"]}}
+    body = json.dumps(content, default=lambda values: values.tolist()).encode()
+    with pytest.raises(RequestValidationError):
+        parse_series_body("application/json", body)
+
+def compact(count: int, points: int = 4) -> dict:
+    content = series(points)
+    return {**content, "data": {**content["data"], "labels": {"start": 0.0, "step": 1.0, "count": count, "decimals": 0}}}
+
+@pytest.mark.parametrize("content", [
+    compact(10 ** 9),                   # rango enorme en unos pocos bytes
+    compact(5),                         # no coincide con generated ni points
+    {**compact(4), "points": 5},
+    compact(series_body.MAX_POINTS + 1, series_body.MAX_POINTS + 1),
+    {**compact(4), "data": {**compact(4)["data"], "labels": {"start": 0.0, "count": 4}}},
+])
+def test_rejects_label_ranges_that_do_not_match(content):
+    for body, content_type in ((as_msgpack(content), "application/msgpack"), (pack_series(content), PACKED_MEDIA_TYPE)):
+        with pytest.raises(HTTPException) as error:
+            parse_series_body(content_type, body)
+        assert error.value.status_code == 400
+
+@pytest.mark.parametrize("body", [
+    b"TSF",                                        # demasiado corto
+    b"XXXX" + pack_series(series())[4:],           # sin firma
+    pack_series(series())[:-4],                    # arrays truncados
+    pack_series(series()) + b"\0" * 8,             # bytes de más
+])
+def test_rejects_malformed_packed_bodies(body):
+    with pytest.raises(HTTPException) as error:
+        parse_series_body(PACKED_MEDIA_TYPE, body)
+    assert error.value.status_code == 400
+
+def test_rejects_malformed_msgpack():
+    for body in (b"\xc1", msgpack.packb([1, 2]), as_msgpack(series())[:-3]):
+        with pytest.raises(HTTPException) as error:
+            parse_series_body("application/msgpack", body)
+        assert error.value.status_code == 400
+
+def test_rejects_unknown_content_type():
+    with pytest.raises(HTTPException) as error:
+        parse_series_body("text/csv", b"1,2,3")
+    assert error.value.status_code == 415
+
+class FakeRequest:
+    def __init__(self, chunks: list, content_length: str = None):
+        self.headers = {"content-length": content_length} if content_length else {}
+        self.chunks = chunks
+        self.read = 0
+
+    async def stream(self):
+        for chunk in self.chunks:
+            self.read += 1
+            yield chunk
+
+def test_oversized_bodies_are_rejected_with_413(monkeypatch):
+    monkeypatch.setattr(series_body, "MAX_BODY_SIZE", 10)
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(read_series_body(FakeRequest([b"x"], content_length="11")))
+    assert error.value.status_code == 413
+
+    request = FakeRequest([b"123456", b"789012", b"345"])
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(read_series_body(request))
+    assert error.value.status_code == 413 and request.read == 2   # deja de leer al superarlo
+
+    assert asyncio.run(read_series_body(FakeRequest([b"12345", b"67890"]))) == b"1234567890"
@@ -0,0 +1,72 @@
+# tests/test_series_codec.py
+import numpy as np
+import pytest
+from app.core.series_codec import decode_series_arrays, decode_series_data, encode_series_data, is_packed
+
+def series(points: int = 5) -> dict:
+    x = np.linspace(0.0, 1.0, points)
+    return {
+        "labels": [f"{value:.2f}" for value in x],
+        "generated": np.sin(x) + 1e-3,
+        "ideal": np.sin(x),
+        "error": np.full(points, 1e-3),
+    }
+
+def test_array_format_stores_lists():
+    encoded = encode_series_data(series(), "array")
+    assert not is_packed(encoded)
+    assert isinstance(encoded["generated"], list)
+    assert decode_series_data(encoded) is encoded
+
+def test_float64_round_trip_is_exact():
+    data = series()
+    decoded = decode_series_data(encode_series_data(data, "float64"))
+    assert decoded["labels"] == data["labels"]
+    for field in ("generated", "ideal", "error"):
+        assert decoded[field] == data[field].tolist()
+
+def test_float32_round_trip_within_single_precision():
+    data = series()
+    encoded = encode_series_data(data, "float32")
+    assert len(encoded["generated"]) == 4 * len(data["generated"])
+    decoded = decode_series_data(encoded, as_arrays=True)
+    for field in ("generated", "ideal", "error"):
+        assert decoded[field].dtype == np.float64
+        np.testing.assert_allclose(decoded[field], data[field], rtol=1e-7)
+
+def test_uniform_labels_are_stored_as_a_range_and_expanded():
+    data = series(101)
+    encoded = encode_series_data(data, "float64")
+    assert encoded["labels"] == {"start": 0.0, "step": pytest.approx(0.01), "count": 101, "decimals": 2}
+    assert decode_series_arrays(encoded)["labels"] == data["labels"]
+
+def test_irregular_labels_are_kept_as_a_list():
+    data = {**series(3), "labels": ["a", "b", "c"]}
+    assert encode_series_data(data, "float64")["labels"] == ["a", "b", "c"]
+    data = {**series(3), "labels": ["0.00", "0.10", "0.50"]}
+    assert encode_series_data(data, "float64")["labels"] == ["0.00", "0.10", "0.50"]
+
+def test_float32_labels_range_survives_round_trip():
+    data = series(1000)
+    assert decode_series_data(encode_series_data(data, "float32"))["labels"] == data["labels"]
+
+def test_empty_error_and_unaligned_labels_are_accepted():
+    data = {**series(), "error": np.array([]), "labels": [f"{value}" for value in range(10)]}
+    encoded = encode_series_data(data, "float64")
+    assert encoded["labels"] == data["labels"]   # no se reduce a un rango
+    decoded = decode_series_arrays(encoded)
+    assert len(decoded["error"]) == 0 and decoded["labels"] == data["labels"]
+
+@pytest.mark.parametrize("corrupt", [
+    lambda encoded: {**encoded, "generated": encoded["generated"][:-3]},          # bytes truncados
+    lambda encoded: {**encoded, "ideal": encoded["ideal"][:-8]},                  # un elemento menos
+    lambda encoded: {**encoded, "error": None},
+    lambda encoded: {**encoded, "labels": {**encoded["labels"], "count": 10**9}},
+    lambda encoded: {**encoded, "labels": {"start": 0.0, "step": 0.1}},
+    lambda encoded: {**encoded, "error": encoded["error"][:-8]},
+    lambda encoded: {**encoded, "labels": "0.00"},
+])
+def test_rejects_malformed_or_truncated_buffers(corrupt):
+    encoded = encode_series_data(series(), "float64")
+    with pytest.raises(ValueError):
+        decode_series_arrays(corrupt(encoded))
@@ -0,0 +1,63 @@
+# tests/test_series_service.py
+import pytest
+from app.core import config
+from app.core.write_behind import WriteBehindQueue
+from app.schemas.series_schema import SeriesData, SeriesRequest
+from app.services import series_service
+from app.services.dashboard_service import DashboardService
+from app.services.series_service import SeriesService
+
+def series(series_type: str = "sine", offset: float = 0.0) -> SeriesRequest:
+    return SeriesRequest(type=series_type, points=3, data=SeriesData(
+        labels=["0", "1", "2"],
+        generated=[0.0 + offset, 1.0, 2.0],
+        ideal=[0.0, 1.0, 2.1],
+        error=[]
+    ))
+
+@pytest.fixture
+def store(firebase_fakes, monkeypatch):
+    db, _ = firebase_fakes
+    monkeypatch.setattr(config.settings, "AGGREGATION_WINDOW", 0.0)
+    monkeypatch.setattr(DashboardService, "maybe_publish", staticmethod(lambda: None))
+    queue = WriteBehindQueue(SeriesService._apply_aggregates, window=0.01, max_events=100, maxsize=100)
+    monkeypatch.setattr(series_service, "aggregates", queue)
+    db.collection("users").document("u1").set({"id": "u1", "total_series_generated": 0, "avg_error": 0.0})
+    return db, queue
+
+def test_batch_returns_results_when_user_stats_fail_after_commit(store, monkeypatch):
+    db, queue = store
+    commit_user_stats = SeriesService._commit_user_stats
+    calls = []
+
+    def flaky(transaction, *args):
+        calls.append(args)
+        if len(calls) == 1:
+            raise RuntimeError("contention")
+        return commit_user_stats(transaction, *args)
+
+    monkeypatch.setattr(SeriesService, "_commit_user_stats", staticmethod(flaky))
+
+    response = SeriesService.save_series_batch("u1", [series(), series("cosine", 0.5)])
+    assert response["saved"] == 2
+    assert [item["status"] for item in response["results"]] == [200, 200]
+    stored = {doc.id for doc in db.collection("series_history").stream()}
+    assert stored == {item["id"] for item in response["results"]}
+
+    # Las estadísticas del usuario se aplican en segundo plano, una sola vez; el dashboard
+    # ya se sumó con las series y no se repite
+    queue.stop()
+    assert len(calls) == 2
+    assert db.collection("users").document("u1").get().to_dict()["total_series_generated"] == 2
+    assert DashboardService.read_stats()["total_series_generated"] == 2
+
+def test_single_save_succeeds_when_publish_fails(store, monkeypatch):
+    db, _ = store
+
+    def fail():
+        raise RuntimeError("UNAVAILABLE")
+
+    monkeypatch.setattr(DashboardService, "maybe_publish", staticmethod(fail))
+    response = SeriesService.save_series("u1", series())
+    assert db.collection("series_history").document(response.id).get().exists
+    assert db.collection("users").document("u1").get().to_dict()["total_series_generated"] == 1
@@ -0,0 +1,65 @@
+# tests/test_taylor_service.py
+import math
+import numpy as np
+import pytest
+from cachetools import LRUCache
+from fastapi import HTTPException
+from app.schemas.series_schema import SeriesComputeRequest
+from app.services import taylor_service
+from app.services.taylor_service import TaylorService
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch):
+    monkeypatch.setattr(taylor_service, "_computed_cache", LRUCache(maxsize=4))
+
+def request(**fields) -> SeriesComputeRequest:
+    return SeriesComputeRequest(**{"type": "sine", "start": -1.0, "end": 1.0, "points": 11, "terms": 20, **fields})
+
+@pytest.mark.parametrize("series_type, reference, bound, terms, tolerance", [
+    ("sine", math.sin, math.pi, 20, 1e-12),
+    ("cosine", math.cos, math.pi, 20, 1e-12),
+    ("tangent", math.tan, 1.0, 50, 1e-12),   # radio de convergencia pi/2: más términos
+    ("tangent", math.tan, 1.0, 20, 1e-7),
+])
+def test_matches_math_within_tolerance(series_type, reference, bound, terms, tolerance):
+    x = np.linspace(-bound, bound, 201)
+    generated = TaylorService.evaluate(series_type, x, terms)
+    expected = np.array([reference(value) for value in x])
+    np.testing.assert_allclose(generated, expected, rtol=0, atol=tolerance)
+
+def test_compute_series_reports_error_stats():
+    response = TaylorService.compute_series(request(type="cosine", terms=3))
+    data = response["data"]
+    np.testing.assert_array_equal(data["error"], np.abs(data["generated"] - data["ideal"]))
+    assert response["maxError"] == pytest.approx(float(np.max(data["error"])))
+    assert response["avgError"] == pytest.approx(float(np.mean(data["error"])))
+    assert data["labels"][0] == "-1.0000" and data["labels"][-1] == "1.0000"
+
+@pytest.mark.parametrize("fields", [
+    {"points": TaylorService.MAX_POINTS + 1},
+    {"points": 1},
+    {"terms": 0},
+    {"terms": TaylorService.MAX_TERMS + 1},
+    {"start": 1.0, "end": 1.0},
+    {"type": "custom"},
+])
+def test_rejects_out_of_range_requests(fields):
+    with pytest.raises(HTTPException) as error:
+        TaylorService.compute_series(request(**fields))
+    assert error.value.status_code == 400
+
+def test_accepts_max_points():
+    response = TaylorService.compute_series(request(points=TaylorService.MAX_POINTS, terms=5))
+    assert len(response["data"]["generated"]) == TaylorService.MAX_POINTS
+
+def test_repeated_requests_are_served_from_cache(monkeypatch):
+    first = TaylorService.compute_series(request())
+    monkeypatch.setattr(TaylorService, "evaluate", staticmethod(lambda *args: pytest.fail("recalculada")))
+    assert TaylorService.compute_series(request()) is first
+
+def test_cache_evicts_least_recently_used():
+    first = TaylorService.compute_series(request(points=10))
+    for points in range(11, 15):
+        TaylorService.compute_series(request(points=points))
+    assert TaylorService.compute_series(request(points=10)) is not first
+    assert len(taylor_service._computed_cache) == 4
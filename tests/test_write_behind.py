@@ -0,0 +1,85 @@
+# tests/test_write_behind.py
+import threading
+import pytest
+from app.core.write_behind import WriteBehindQueue
+
+def test_groups_by_max_events_and_flushes_on_stop():
+    groups = []
+    queue = WriteBehindQueue(groups.append, window=60, max_events=3, maxsize=100)
+    assert queue.submit(list(range(7))) == []
+    queue.stop()
+    assert sorted(item for group in groups for item in group) == list(range(7))
+    assert all(len(group) <= 3 for group in groups)
+
+def test_full_queue_returns_the_items_that_do_not_fit():
+    release = threading.Event()
+    groups = []
+
+    def flush(items):
+        release.wait(5)
+        groups.append(items)
+
+    queue = WriteBehindQueue(flush, window=0, max_events=1, maxsize=2)
+    rejected = queue.submit(list(range(10)))
+    assert 0 < len(rejected) <= 10 and rejected == list(range(10 - len(rejected), 10))
+    release.set()
+    queue.stop()
+    assert sorted(item for group in groups for item in group) == list(range(10 - len(rejected)))
+
+def test_requeued_items_are_applied_on_stop():
+    applied = []
+    failures = {"left": 1}
+
+    def flush(items):
+        if failures["left"]:
+            failures["left"] -= 1
+            queue.requeue(items)
+            return
+        applied.extend(items)
+
+    queue = WriteBehindQueue(flush, window=60, max_events=100, maxsize=100)
+    queue.submit(["a", "b"])
+    queue.stop()
+    assert sorted(applied) == ["a", "b"]
+
+@pytest.fixture
+def services(firebase_fakes, monkeypatch):
+    db, _ = firebase_fakes
+    from app.services import series_service
+    from app.services.dashboard_service import DashboardService
+
+    queue = WriteBehindQueue(series_service.SeriesService._apply_aggregates, window=0.01, max_events=100, maxsize=100)
+    monkeypatch.setattr(series_service, "aggregates", queue)
+    monkeypatch.setattr(series_service.SeriesService, "AGGREGATION_ATTEMPTS", 1)
+    monkeypatch.setattr(DashboardService, "maybe_publish", staticmethod(lambda: None))
+    for uid in ("u1", "u2"):
+        db.collection("users").document(uid).set({"id": uid, "avg_error": 0.0})
+    return db, series_service, queue
+
+def test_failed_dashboard_write_is_retried_without_replaying_user_stats(services, monkeypatch):
+    from datetime import datetime
+    from app.services.dashboard_service import DashboardService
+    db, series_service, queue = services
+
+    record_series_many = DashboardService.record_series_many
+    calls = {"count": 0}
+
+    def flaky(entries, writer=None):
+        calls["count"] += 1
+        if calls["count"] == 1:
+            raise RuntimeError("UNAVAILABLE")
+        record_series_many(entries, writer)
+
+    monkeypatch.setattr(DashboardService, "record_series_many", staticmethod(flaky))
+
+    now = datetime.utcnow()
+    queue.submit([("u1", "sine", 0.1, 0.2, now), ("u2", "cosine", 0.3, 0.4, now)])
+    queue.stop()
+
+    assert calls["count"] == 2
+    stats = DashboardService.read_stats()
+    assert stats["total_series_generated"] == 2
+    assert stats["series_stats"]["sine"]["count"] == 1
+    assert stats["series_stats"]["cosine"]["count"] == 1
+    for uid in ("u1", "u2"):
+        assert db.collection("users").document(uid).get().to_dict()["total_series_generated"] == 1